@@ -0,0 +1,3 @@
+"""
+Benchmarks for AI Agent Service
+"""
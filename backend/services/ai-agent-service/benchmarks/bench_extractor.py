@@ -0,0 +1,52 @@
+"""
+Micro-benchmark for the message intent/entity extractor.
+
+Run from the service root:
+    python -m benchmarks.bench_extractor
+"""
+import argparse
+import timeit
+from src.agents.extractor import DEFAULT_PHRASES, Intent, MessageExtractor
+
+MESSAGES = [
+    "Find package PKG175800611738388",
+    "What's the status of package PKG175800611738388?",
+    "Track package TR123456789",
+    "Show me all my packages",
+    "What's the status of my package?",
+    "How do I create a new package?",
+    "Where is my package being delivered?",
+    "Compare PKG1 and PKG2 and TR3 and 507f1f77bcf86cd799439011",
+]
+
+
+def _synthetic_phrases(count: int) -> dict:
+    """Extra trigger phrases to show how cost scales with the phrase table"""
+    phrases = dict(DEFAULT_PHRASES)
+    for i in range(count):
+        phrases[f"custom intent phrase {i}"] = Intent.GENERAL
+    return phrases
+
+
+def bench(extractor: MessageExtractor, number: int) -> float:
+    """Return the mean extraction time per message in microseconds"""
+    elapsed = timeit.timeit(
+        lambda: [extractor.extract(message) for message in MESSAGES],
+        number=number
+    )
+    return elapsed / (number * len(MESSAGES)) * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--number", type=int, default=2000, help="iterations over the message set")
+    args = parser.parse_args()
+
+    print(f"{'phrases':>8} {'us/message':>12}")
+    for extra in (0, 50, 200, 1000):
+        extractor = MessageExtractor(_synthetic_phrases(extra))
+        print(f"{len(extractor.phrases):>8} {bench(extractor, args.number):>12.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""
+Local stand-in for the API gateway's package endpoints.
+
+Serves /api/track/{id}, /api/packages/{id} and /api/packages/user/{user_id}
+with deterministic package documents and configurable latency and error
+rate, so lookups can be load-tested without the real services. Run on its
+own with:
+    python -m benchmarks.fake_gateway --port 3900 --latency-ms 20 --error-rate 0.01
+"""
+import argparse
+import asyncio
+import random
+from typing import Any, Dict, List, Optional
+from fastapi import FastAPI, Header, Response
+
+STATUSES = ["processing", "in transit", "delivered", "cancelled"]
+
+
+def make_package(index: int, user_id: str = "bench-user") -> Dict[str, Any]:
+    """Deterministic package document shaped like the package service's"""
+    return {
+        "_id": f"{index:024x}",
+        "name": f"Package {index}",
+        "description": "Benchmark package",
+        "weight": 1 + index % 20,
+        "userId": user_id,
+        "recipientName": f"Recipient {index}",
+        "recipientAddress": f"{index} Benchmark Street",
+        "recipientContact": "+1000000000",
+        "status": STATUSES[index % len(STATUSES)],
+        "location": f"Hub {index % 12}",
+        "trackingId": f"TR{index:09d}",
+        "eta": f"2026-12-{1 + index % 28:02d}T12:00:00Z",
+        "category": "general",
+        "createdAt": f"2026-{1 + index % 9:02d}-01T00:00:00Z",
+        "updatedAt": f"2026-10-{1 + index % 28:02d}T00:00:00Z"
+    }
+
+
+def _index(identifier: str) -> int:
+    digits = "".join(ch for ch in identifier if ch.isdigit())
+    if len(identifier) == 24:
+        try:
+            return int(identifier, 16)
+        except ValueError:
+            pass
+    return int(digits) if digits else 0
+
+
+def create_app(latency_ms: float = 20.0, jitter_ms: float = 5.0, error_rate: float = 0.0,
+               packages_per_user: int = 25, seed: Optional[int] = 0) -> FastAPI:
+    """
+    Build the fake gateway.
+
+    Each request sleeps for a gaussian latency (latency_ms +/- jitter_ms) and
+    answers 503 with probability error_rate. A fixed seed makes the sequence
+    of latencies and errors reproducible across runs.
+    """
+    app = FastAPI(title="Fake Gateway")
+    rng = random.Random(seed)
+    stats = {"requests": 0, "errors": 0}
+    app.state.stats = stats
+
+    async def delay_or_fail() -> Optional[Response]:
+        stats["requests"] += 1
+        await asyncio.sleep(max(0.0, rng.gauss(latency_ms, jitter_ms)) / 1000)
+        if rng.random() < error_rate:
+            stats["errors"] += 1
+            return Response(status_code=503)
+        return None
+
+    @app.get("/api/track/{identifier}")
+    async def track(identifier: str):
+        return await delay_or_fail() or make_package(_index(identifier))
+
+    @app.get("/api/packages/user/{user_id}")
+    async def user_packages(user_id: str, authorization: Optional[str] = Header(None)) -> Any:
+        failure = await delay_or_fail()
+        if failure is not None:
+            return failure
+        if not authorization:
+            return Response(status_code=401)
+        packages: List[Dict[str, Any]] = [make_package(i, user_id) for i in range(packages_per_user)]
+        return packages
+
+    @app.get("/api/packages/{package_id}")
+    async def package(package_id: str, authorization: Optional[str] = Header(None)) -> Any:
+        failure = await delay_or_fail()
+        if failure is not None:
+            return failure
+        if not authorization:
+            return Response(status_code=401)
+        return make_package(_index(package_id))
+
+    @app.get("/stats")
+    async def get_stats() -> Dict[str, int]:
+        return stats
+
+    return app
+
+
+def main() -> None:
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=3900)
+    parser.add_argument("--latency-ms", type=float, default=20.0)
+    parser.add_argument("--jitter-ms", type=float, default=5.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--packages-per-user", type=int, default=25)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    app = create_app(args.latency_ms, args.jitter_ms, args.error_rate, args.packages_per_user, args.seed)
+    uvicorn.run(app, host="127.0.0.1", port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""
+Stand-in for google.generativeai.GenerativeModel with configurable latency.
+
+Implements the subset the agent uses: generate_content_async (plain and
+stream=True) and count_tokens_async. Latency is modelled as a time to first
+token plus a fixed cost per generated token.
+"""
+import asyncio
+from typing import Any, AsyncIterator, Dict, List
+
+
+class FakeResponse:
+    def __init__(self, text: str):
+        self.text = text
+
+
+class FakeGenerativeModel:
+    """Fake Gemini model producing a fixed-length answer at a configurable pace"""
+
+    def __init__(self, model_name: str = "fake-gemini", tokens: int = 60, first_token_ms: float = 150.0,
+                 token_latency_ms: float = 5.0, tokens_per_chunk: int = 8):
+        self.model_name = f"models/{model_name}"
+        self.tokens = tokens
+        self.first_token_ms = first_token_ms
+        self.token_latency_ms = token_latency_ms
+        self.tokens_per_chunk = tokens_per_chunk
+        self.calls = 0
+
+    def _chunks(self) -> List[str]:
+        words = [f"word{i}" for i in range(self.tokens)]
+        return [
+            " ".join(words[i:i + self.tokens_per_chunk]) + " "
+            for i in range(0, len(words), self.tokens_per_chunk)
+        ]
+
+    async def generate_content_async(self, prompt: Any, stream: bool = False, **kwargs: Any) -> Any:
+        self.calls += 1
+        if stream:
+            return self._stream()
+        await asyncio.sleep((self.first_token_ms + self.tokens * self.token_latency_ms) / 1000)
+        return FakeResponse("".join(self._chunks()))
+
+    async def _stream(self) -> AsyncIterator[FakeResponse]:
+        await asyncio.sleep(self.first_token_ms / 1000)
+        for chunk in self._chunks():
+            await asyncio.sleep(self.tokens_per_chunk * self.token_latency_ms / 1000)
+            yield FakeResponse(chunk)
+
+    async def count_tokens_async(self, contents: Any, **kwargs: Any) -> Dict[str, int]:
+        return {"total_tokens": len(str(contents)) // 4}
@@ -0,0 +1,321 @@
+"""
+Load scenarios for the AI Agent Service against local stubs.
+
+Starts the fake gateway and the service (with a fake Gemini model) on local
+ports in this process, drives each scenario with a fixed number of
+concurrent clients and reports latency percentiles and throughput.
+
+Run from the service root:
+    python -m benchmarks.load
+    python -m benchmarks.load --scenario chat_track --concurrency 50 --duration 20
+    python -m benchmarks.load --json baseline.json
+    python -m benchmarks.load --compare baseline.json --tolerance 0.15
+
+Every client connects from loopback, so admission control (which limits
+each client address) is off except in chat_admission, which overdrives one
+user on purpose and counts requests shed with 429 as handled. Set
+ADMISSION_ENABLED=true to keep it on for every scenario.
+
+With --compare the exit status is 1 if any scenario's p95 grew or its
+throughput dropped by more than the tolerance. Client, service and stubs
+share one event loop, so absolute numbers are for comparing commits on
+the same machine, not capacity planning.
+"""
+import argparse
+import asyncio
+import importlib
+import itertools
+import json
+import logging
+import os
+import socket
+import sys
+import time
+from dataclasses import asdict, dataclass
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+import httpx
+
+from benchmarks.fake_gateway import create_app as create_gateway
+from benchmarks.fake_model import FakeGenerativeModel
+
+AUTH_TOKEN = "bench-token"
+
+# A scenario issues request number i and returns (success, time to first chunk in seconds or None)
+Scenario = Callable[[httpx.AsyncClient, int, int], Awaitable[Tuple[bool, Optional[float]]]]
+
+
+async def _post_json(client: httpx.AsyncClient, path: str, **kwargs: Any) -> Tuple[bool, Optional[float]]:
+    response = await client.post(path, **kwargs)
+    if response.status_code != 200:
+        return False, None
+    body = response.json()
+    return body.get("success", True) is not False, None
+
+
+async def chat_general(client: httpx.AsyncClient, i: int, keys: int) -> Tuple[bool, Optional[float]]:
+    return await _post_json(client, "/chat/", json={"message": f"How long does shipping take to zone {i % keys}?"})
+
+
+async def chat_track(client: httpx.AsyncClient, i: int, keys: int) -> Tuple[bool, Optional[float]]:
+    return await _post_json(client, "/chat/", json={"message": f"Where is my package TR{i % keys:09d}?"})
+
+
+async def chat_stream(client: httpx.AsyncClient, i: int, keys: int) -> Tuple[bool, Optional[float]]:
+    started = time.perf_counter()
+    first_chunk = None
+    success = False
+    payload = {"message": f"Track TR{i % keys:09d} and tell me when it arrives"}
+    async with client.stream("POST", "/chat/stream", json=payload) as response:
+        async for line in response.aiter_lines():
+            if line == "event: chunk" and first_chunk is None:
+                first_chunk = time.perf_counter() - started
+            elif line == "event: done":
+                success = True
+    return success and response.status_code == 200, first_chunk
+
+
+async def tools_track(client: httpx.AsyncClient, i: int, keys: int) -> Tuple[bool, Optional[float]]:
+    return await _post_json(client, "/tools/track-package", params={"tracking_number": f"TR{i % keys:09d}"})
+
+
+async def tools_find(client: httpx.AsyncClient, i: int, keys: int) -> Tuple[bool, Optional[float]]:
+    return await _post_json(
+        client, "/tools/find-package", params={"package_id": f"PKG{i % keys}", "auth_token": AUTH_TOKEN}
+    )
+
+
+async def tools_user_packages(client: httpx.AsyncClient, i: int, keys: int) -> Tuple[bool, Optional[float]]:
+    return await _post_json(
+        client, "/tools/user-packages",
+        params={"user_id": f"user{i % keys}", "auth_token": AUTH_TOKEN, "limit": 10}
+    )
+
+
+async def chat_admission(client: httpx.AsyncClient, i: int, keys: int) -> Tuple[bool, Optional[float]]:
+    # One user far above its rate: most requests should be shed quickly, the rest answered
+    response = await client.post("/chat/", json={"message": "What are your opening hours?", "user_id": "bench-user"})
+    if response.status_code == 429:
+        return "retry-after" in response.headers, None
+    return response.status_code == 200, None
+
+
+SCENARIOS: Dict[str, Scenario] = {
+    "chat_general": chat_general,
+    "chat_track": chat_track,
+    "chat_stream": chat_stream,
+    "tools_track": tools_track,
+    "tools_find": tools_find,
+    "tools_user_packages": tools_user_packages,
+    "chat_admission": chat_admission,
+}
+
+# Scenarios run with admission control enabled regardless of ADMISSION_ENABLED
+ADMISSION_SCENARIOS = frozenset({"chat_admission"})
+
+
+@dataclass
+class ScenarioResult:
+    scenario: str
+    requests: int
+    errors: int
+    rps: float
+    p50_ms: float
+    p95_ms: float
+    p99_ms: float
+    first_chunk_p50_ms: Optional[float] = None
+    shed: Optional[int] = None
+
+
+def percentile(ordered: List[float], q: float) -> float:
+    """Nearest-rank percentile of an ascending list"""
+    if not ordered:
+        return 0.0
+    rank = max(0, min(len(ordered) - 1, int(round(q / 100 * len(ordered) + 0.5)) - 1))
+    return ordered[rank]
+
+
+async def run_scenario(client: httpx.AsyncClient, name: str, concurrency: int, duration: float,
+                       requests: int, warmup: int, keys: int) -> ScenarioResult:
+    scenario = SCENARIOS[name]
+    for i in range(warmup):
+        await scenario(client, i, keys)
+
+    latencies: List[float] = []
+    first_chunks: List[float] = []
+    errors = 0
+    counter = itertools.count()
+    started = time.perf_counter()
+    deadline = started + duration
+
+    async def worker() -> None:
+        nonlocal errors
+        while True:
+            i = next(counter)
+            if (requests and i >= requests) or (not requests and time.perf_counter() >= deadline):
+                return
+            request_started = time.perf_counter()
+            try:
+                ok, first_chunk = await scenario(client, i, keys)
+            except Exception:
+                ok, first_chunk = False, None
+            latencies.append(time.perf_counter() - request_started)
+            if first_chunk is not None:
+                first_chunks.append(first_chunk)
+            errors += not ok
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    first_chunks.sort()
+    return ScenarioResult(
+        scenario=name,
+        requests=len(latencies),
+        errors=errors,
+        rps=round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        p50_ms=round(percentile(latencies, 50) * 1000, 1),
+        p95_ms=round(percentile(latencies, 95) * 1000, 1),
+        p99_ms=round(percentile(latencies, 99) * 1000, 1),
+        first_chunk_p50_ms=round(percentile(first_chunks, 50) * 1000, 1) if first_chunks else None
+    )
+
+
+def compare(results: List[ScenarioResult], baseline: Dict[str, Dict[str, Any]], tolerance: float) -> List[str]:
+    """Return a line per scenario whose p95 or throughput regressed beyond the tolerance"""
+    regressions = []
+    for result in results:
+        before = baseline.get(result.scenario)
+        if not before:
+            continue
+        if result.p95_ms > before["p95_ms"] * (1 + tolerance):
+            regressions.append(f"{result.scenario}: p95 {before['p95_ms']}ms -> {result.p95_ms}ms")
+        if result.rps < before["rps"] * (1 - tolerance):
+            regressions.append(f"{result.scenario}: rps {before['rps']} -> {result.rps}")
+    return regressions
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def _serve(app: Any, port: int) -> Tuple[Any, "asyncio.Task[None]"]:
+    import uvicorn
+
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning", access_log=False))
+    # Ctrl+C should stop the benchmark, not just the embedded servers
+    server.install_signal_handlers = lambda: None
+    task = asyncio.create_task(server.serve())
+    while not server.started:
+        if task.done():
+            task.result()
+        await asyncio.sleep(0.01)
+    return server, task
+
+
+async def run(args: argparse.Namespace) -> List[ScenarioResult]:
+    gateway_port, service_port = _free_port(), _free_port()
+
+    # The service reads these at import time
+    os.environ["GATEWAY_URL"] = f"http://127.0.0.1:{gateway_port}"
+    os.environ.setdefault("GOOGLE_AI_API_KEY", "benchmark")
+    os.environ.setdefault("CONVERSATION_STORE_BACKEND", "memory")
+    os.environ.setdefault("ADMISSION_ENABLED", "false")
+    service = importlib.import_module("main")
+    from src.config import settings
+    from src.dependencies import registry
+    from src.tools.package_lookup import get_lookup_cache
+
+    logging.getLogger().setLevel(logging.WARNING)
+    registry.model = FakeGenerativeModel(
+        tokens=args.model_tokens,
+        first_token_ms=args.model_first_token_ms,
+        token_latency_ms=args.model_token_ms
+    )
+
+    gateway = create_gateway(
+        latency_ms=args.gateway_latency_ms,
+        jitter_ms=args.gateway_jitter_ms,
+        error_rate=args.gateway_error_rate,
+        seed=args.seed
+    )
+    servers = [await _serve(gateway, gateway_port), await _serve(service.app, service_port)]
+
+    results = []
+    admission_enabled = settings.admission_enabled
+    admission = registry.get_admission_controller()
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    try:
+        async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{service_port}", limits=limits,
+                                     timeout=120.0) as client:
+            for name in args.scenario:
+                # Every scenario starts cold so results do not depend on scenario order
+                get_lookup_cache().clear()
+                registry.get_agent().response_cache.clear()
+                settings.admission_enabled = admission_enabled or name in ADMISSION_SCENARIOS
+                rejected = admission.get_stats()["rejected"]
+                result = await run_scenario(
+                    client, name, args.concurrency, args.duration, args.requests, args.warmup, args.keys
+                )
+                if settings.admission_enabled:
+                    result.shed = admission.get_stats()["rejected"] - rejected
+                results.append(result)
+                print(_format_row(result), flush=True)
+    finally:
+        for server, task in reversed(servers):
+            server.should_exit = True
+            await task
+    return results
+
+
+HEADER = (f"{'scenario':<20} {'requests':>8} {'errors':>6} {'rps':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} "
+          f"{'1st chunk':>9} {'shed':>6}")
+
+
+def _format_row(result: ScenarioResult) -> str:
+    first_chunk = f"{result.first_chunk_p50_ms:.1f}" if result.first_chunk_p50_ms is not None else "-"
+    shed = str(result.shed) if result.shed is not None else "-"
+    return (f"{result.scenario:<20} {result.requests:>8} {result.errors:>6} {result.rps:>8.1f} "
+            f"{result.p50_ms:>8.1f} {result.p95_ms:>8.1f} {result.p99_ms:>8.1f} {first_chunk:>9} {shed:>6}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenario", nargs="+", choices=list(SCENARIOS), default=list(SCENARIOS))
+    parser.add_argument("--concurrency", type=int, default=20, help="concurrent clients")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds per scenario")
+    parser.add_argument("--requests", type=int, default=0, help="fixed request count per scenario (overrides --duration)")
+    parser.add_argument("--warmup", type=int, default=20, help="unmeasured requests before each scenario")
+    parser.add_argument("--keys", type=int, default=1000, help="distinct packages/questions per scenario")
+    parser.add_argument("--gateway-latency-ms", type=float, default=20.0)
+    parser.add_argument("--gateway-jitter-ms", type=float, default=5.0)
+    parser.add_argument("--gateway-error-rate", type=float, default=0.0)
+    parser.add_argument("--model-first-token-ms", type=float, default=150.0)
+    parser.add_argument("--model-token-ms", type=float, default=5.0)
+    parser.add_argument("--model-tokens", type=int, default=60)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", dest="json_path", help="write results to this file")
+    parser.add_argument("--compare", help="baseline results file written with --json")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="allowed relative regression")
+    args = parser.parse_args()
+
+    print(HEADER)
+    results = asyncio.run(run(args))
+
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump({result.scenario: asdict(result) for result in results}, f, indent=2)
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,7 @@
 """
 Main application file for the AI Agent Service using proper structure.
 """
+import asyncio
 import os
 import logging
 import uvicorn
@@ -9,7 +10,12 @@ from fastapi.middleware.cors import CORSMiddleware
 from dotenv import load_dotenv
 
 # Import routes
-from src.routes import health_router, chat_router, agent_router, tools_router
+from src.routes import health_router, chat_router, agent_router, tools_router, metrics_router
+from src.tools.http_client import init_http_client, close_http_client
+from src.tools.package_lookup import shutdown_tool_bridge
+from src.services.conversation_store import get_conversation_store
+from src.dependencies import registry
+from src.utils.metrics import MetricsMiddleware
 
 # Load environment variables
 load_dotenv()
@@ -39,17 +45,25 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Per-route latency histograms for /metrics
+app.add_middleware(MetricsMiddleware)
+
 
 @app.on_event("startup")
 async def startup_event():
     """Initialize the AI Agent Service on startup"""
     try:
-        # Test agent initialization
-        from src.agents.package_assistant import PackageAssistantAgent
-        test_agent = PackageAssistantAgent()
+        # Start the pooled HTTP client shared by all package lookups
+        await init_http_client()
+
+        # Start write-behind persistence for conversation history
+        await get_conversation_store().start()
+
+        # Build the shared agent and tool registry; warm-up continues in the background
+        registry.startup()
 
         logger.info("AI Agent Service started successfully with Google Generative AI")
-        logger.info(f"Agent capabilities: {test_agent.get_capabilities()}")
+        logger.info(f"Agent capabilities: {registry.get_agent().get_capabilities()}")
 
     except Exception as e:
         logger.error(f"Failed to initialize AI Agent Service: {str(e)}")
@@ -74,12 +88,17 @@ app.include_router(health_router)
 app.include_router(chat_router)
 app.include_router(agent_router)
 app.include_router(tools_router)
+app.include_router(metrics_router)
 
 
 @app.on_event("shutdown")
 async def shutdown_event():
     """Cleanup on shutdown"""
     logger.info("AI Agent Service shutting down...")
+    await registry.shutdown()
+    await asyncio.to_thread(shutdown_tool_bridge)
+    await get_conversation_store().stop()
+    await close_http_client()
 
 
 if __name__ == "__main__":
@@ -97,5 +116,9 @@ if __name__ == "__main__":
         host=host,
         port=port,
         reload=debug,
-        log_level="info"
+        log_level="info",
+        # Client addresses (used for per-address admission limits) come from
+        # X-Forwarded-For when the peer is one of these trusted proxies
+        proxy_headers=True,
+        forwarded_allow_ips=os.getenv("FORWARDED_ALLOW_IPS", "127.0.0.1")
     )
\ No newline at end of file
@@ -3,7 +3,7 @@ Base agent class for all AI agents
 """
 
 from abc import ABC, abstractmethod
-from typing import Dict, Any, List
+from typing import Dict, Any, List, AsyncIterator
 
 
 class BaseAgent(ABC):
@@ -18,6 +18,22 @@ class BaseAgent(ABC):
         """Handle a user message and return AI response"""
         pass
 
+    async def stream_message(self, message: str, user_context: Dict[str, Any] = None) -> AsyncIterator[Dict[str, Any]]:
+        """Stream a response as events; agents without native streaming emit one chunk"""
+        result = await self.handle_message(message, user_context)
+        if not result.get("success"):
+            yield {"event": "error", "data": result}
+            return
+        yield {"event": "chunk", "data": {"text": result["response"]}}
+        yield {
+            "event": "done",
+            "data": {
+                "success": True,
+                "tools_used": result.get("tools_used", []),
+                "metadata": result.get("metadata", {})
+            }
+        }
+
     @abstractmethod
     def get_capabilities(self) -> List[str]:
         """Return a list of agent capabilities"""
@@ -0,0 +1,199 @@
+"""
+Single-pass intent and entity extraction for user messages
+"""
+import re
+from dataclasses import dataclass, field
+from enum import Enum
+from typing import Dict, Iterable, List, Optional, Tuple
+
+
+class Intent(str, Enum):
+    FIND_PACKAGE = "find_package"
+    TRACK_PACKAGE = "track_package"
+    USER_PACKAGES = "user_packages"
+    PACKAGE_STATUS = "package_status"
+    PACKAGE_LOCATION = "package_location"
+    PACKAGE_ETA = "package_eta"
+    GENERAL = "general"
+
+
+class EntityType(str, Enum):
+    PACKAGE_ID = "package_id"
+    OBJECT_ID = "object_id"
+    TRACKING_NUMBER = "tracking_number"
+
+
+# Trigger phrases and the intent each one signals
+DEFAULT_PHRASES: Dict[str, Intent] = {
+    "find package": Intent.FIND_PACKAGE,
+    "show package": Intent.FIND_PACKAGE,
+    "package id": Intent.FIND_PACKAGE,
+    "track package": Intent.TRACK_PACKAGE,
+    "tracking number": Intent.TRACK_PACKAGE,
+    "track": Intent.TRACK_PACKAGE,
+    "tracking": Intent.TRACK_PACKAGE,
+    "my packages": Intent.USER_PACKAGES,
+    "all packages": Intent.USER_PACKAGES,
+    "show my": Intent.USER_PACKAGES,
+    "package status": Intent.PACKAGE_STATUS,
+    "status": Intent.PACKAGE_STATUS,
+    "where is my": Intent.PACKAGE_LOCATION,
+    "where is": Intent.PACKAGE_LOCATION,
+    "location": Intent.PACKAGE_LOCATION,
+    "eta": Intent.PACKAGE_ETA,
+    "when will": Intent.PACKAGE_ETA,
+    "arrive": Intent.PACKAGE_ETA,
+    "arrival": Intent.PACKAGE_ETA,
+    "expected delivery": Intent.PACKAGE_ETA,
+}
+
+# Phrases that only count as a tool trigger when the message also contains a package reference or number
+NUMBER_QUALIFIED_PHRASES = frozenset({
+    "track", "tracking", "status", "where is", "location", "eta", "when will", "arrive", "arrival"
+})
+
+# Intents asking about one attribute of a referenced package
+ATTRIBUTE_INTENTS = (Intent.PACKAGE_STATUS, Intent.PACKAGE_LOCATION, Intent.PACKAGE_ETA)
+
+
+@dataclass
+class Entity:
+    type: EntityType
+    value: str
+
+
+@dataclass
+class Extraction:
+    """Typed result of scanning one message"""
+    intent: Intent
+    confidence: float
+    entities: List[Entity] = field(default_factory=list)
+    intents: List[Intent] = field(default_factory=list)
+    needs_tools: bool = False
+
+    @property
+    def package_ids(self) -> List[str]:
+        return [e.value for e in self.entities if e.type in (EntityType.PACKAGE_ID, EntityType.OBJECT_ID)]
+
+    @property
+    def tracking_numbers(self) -> List[str]:
+        return [e.value for e in self.entities if e.type == EntityType.TRACKING_NUMBER]
+
+    @property
+    def wants_user_packages(self) -> bool:
+        return Intent.USER_PACKAGES in self.intents
+
+
+def _trie_pattern(phrases: Iterable[str]) -> str:
+    """
+    Compile literal phrases into a prefix-trie shaped regex.
+
+    Shared prefixes are matched once, so the cost of testing a position grows
+    with phrase length rather than with the number of phrases.
+    """
+    trie: Dict[str, dict] = {}
+    for phrase in phrases:
+        node = trie
+        for char in phrase:
+            node = node.setdefault(char, {})
+        node[""] = {}
+
+    def build(node: Dict[str, dict]) -> str:
+        terminal = "" in node
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 and not terminal else "(?:" + "|".join(branches) + ")"
+        return f"(?:{body})?" if terminal else body
+
+    return build(trie)
+
+
+class MessageExtractor:
+    """
+    Classifies a message and extracts package references in one regex scan.
+
+    The compiled pattern combines the entity patterns with a zero-width
+    lookahead over every trigger phrase (matched on word boundaries), so
+    overlapping phrases are still seen.
+    """
+
+    def __init__(self, phrases: Optional[Dict[str, Intent]] = None):
+        self.phrases = dict(DEFAULT_PHRASES if phrases is None else phrases)
+        self._pattern = re.compile(
+            r"(?P<pkg>pkg\d+)"
+            r"|(?P<oid>[0-9a-f]{24})"
+            r"|(?P<tr>tr\d+)"
+            r"|(?P<num>\d+)"
+            rf"|\b(?=(?P<phrase>{_trie_pattern(self.phrases)})\b)"
+        )
+
+    def extract(self, message: str) -> Extraction:
+        """Scan a message once and return its intent, entities and confidence"""
+        entities: List[Entity] = []
+        seen = set()
+        intents: List[Intent] = []
+        has_number = False
+        qualified: List[Intent] = []
+
+        for match in self._pattern.finditer(message.lower()):
+            kind = match.lastgroup
+            if kind == "phrase":
+                phrase = match.group("phrase")
+                intent = self.phrases[phrase]
+                if phrase in NUMBER_QUALIFIED_PHRASES:
+                    qualified.append(intent)
+                elif intent not in intents:
+                    intents.append(intent)
+                continue
+            if kind == "num":
+                has_number = True
+                continue
+
+            has_number = True
+            if kind == "pkg":
+                entity = Entity(EntityType.PACKAGE_ID, match.group("pkg").upper())
+            elif kind == "oid":
+                entity = Entity(EntityType.OBJECT_ID, match.group("oid"))
+            else:
+                entity = Entity(EntityType.TRACKING_NUMBER, match.group("tr").upper())
+            if (entity.type, entity.value) not in seen:
+                seen.add((entity.type, entity.value))
+                entities.append(entity)
+
+        if has_number:
+            for intent in qualified:
+                if intent not in intents:
+                    intents.append(intent)
+
+        intent, confidence = self._classify(entities, intents)
+        return Extraction(
+            intent=intent,
+            confidence=confidence,
+            entities=entities,
+            intents=intents,
+            needs_tools=bool(entities or intents)
+        )
+
+    @staticmethod
+    def _classify(entities: List[Entity], intents: List[Intent]) -> Tuple[Intent, float]:
+        if entities:
+            attribute = next((i for i in intents if i in ATTRIBUTE_INTENTS), None)
+            if attribute is not None:
+                intent = attribute
+            elif all(e.type == EntityType.TRACKING_NUMBER for e in entities):
+                intent = Intent.TRACK_PACKAGE
+            else:
+                intent = Intent.FIND_PACKAGE
+            # An explicit reference plus a matching phrase is the strongest signal
+            return intent, 0.95 if intents else 0.85
+
+        if intents:
+            if Intent.USER_PACKAGES in intents:
+                return Intent.USER_PACKAGES, 0.8
+            return intents[0], 0.6
+
+        return Intent.GENERAL, 0.5
+
+
+default_extractor = MessageExtractor()
@@ -0,0 +1,159 @@
+"""
+Bounded concurrency pool for non-blocking Gemini generations
+"""
+import asyncio
+import time
+from contextlib import asynccontextmanager, contextmanager
+from typing import Dict, Any, Optional, Tuple, AsyncIterator, Iterator
+from src.config import settings
+from src.utils.metrics import GEMINI_CALL_DURATION
+
+
+class GenerationPool:
+    """
+    Caps the number of in-flight LLM generations and reports queueing.
+
+    Generations go through the model's async API so a slow completion never
+    blocks the event loop; callers beyond the cap wait for a free slot.
+    """
+
+    def __init__(self, max_concurrency: int, timeout: Optional[float] = None):
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._queued = 0
+        self._in_flight = 0
+        self._acquired = 0
+        self._completed = 0
+        self._failed = 0
+        self._total_wait = 0.0
+        self._max_wait = 0.0
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[float]:
+        """Acquire a generation slot, yielding the time spent queued in milliseconds"""
+        self._queued += 1
+        started = time.monotonic()
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self._queued -= 1
+
+        wait = time.monotonic() - started
+        self._acquired += 1
+        self._total_wait += wait
+        self._max_wait = max(self._max_wait, wait)
+        self._in_flight += 1
+        try:
+            yield wait * 1000
+            self._completed += 1
+        except BaseException:
+            self._failed += 1
+            raise
+        finally:
+            self._in_flight -= 1
+            self._semaphore.release()
+
+    async def generate(self, model: Any, prompt: Any, mode: str = "generate", timeout: Optional[float] = None,
+                       **kwargs) -> Tuple[Any, float]:
+        """
+        Run a generation within the concurrency cap.
+
+        The prompt may be a string or a list of contents (e.g. a function
+        calling exchange); mode labels the call's duration metric. timeout
+        bounds the model call once a slot is acquired, on top of the pool's
+        own timeout; time spent queued does not count against it.
+
+        Returns:
+            Tuple of (model response, queue wait in milliseconds)
+        """
+        async with self.slot() as wait_ms:
+            with self._timed(mode):
+                response = await asyncio.wait_for(
+                    model.generate_content_async(prompt, **kwargs),
+                    timeout=self._timeout(timeout)
+                )
+            return response, wait_ms
+
+    async def stream(self, model: Any, prompt: str, first_chunk_timeout: Optional[float] = None,
+                     **kwargs) -> AsyncIterator[str]:
+        """
+        Stream a generation's text chunks, holding a slot until the stream ends.
+
+        first_chunk_timeout bounds the time from acquiring the slot to the
+        first chunk; time spent queued does not count against it.
+        """
+        async with self.slot():
+            with self._timed("stream"):
+                texts = self._texts(model, prompt, **kwargs)
+                try:
+                    try:
+                        first = await asyncio.wait_for(texts.__anext__(), timeout=first_chunk_timeout)
+                    except StopAsyncIteration:
+                        return
+                    yield first
+                    async for text in texts:
+                        yield text
+                finally:
+                    await texts.aclose()
+
+    async def _texts(self, model: Any, prompt: str, **kwargs) -> AsyncIterator[str]:
+        response = await asyncio.wait_for(
+            model.generate_content_async(prompt, stream=True, **kwargs),
+            timeout=self.timeout
+        )
+        async for chunk in response:
+            try:
+                text = chunk.text
+            except ValueError:
+                # Chunks without text parts (e.g. safety or finish metadata)
+                continue
+            if text:
+                yield text
+
+    def _timeout(self, timeout: Optional[float]) -> Optional[float]:
+        """The tighter of a per-call timeout and the pool's own"""
+        if timeout is None or self.timeout is None:
+            return self.timeout if timeout is None else timeout
+        return min(timeout, self.timeout)
+
+    @staticmethod
+    @contextmanager
+    def _timed(mode: str) -> Iterator[None]:
+        """Observe a Gemini call's duration, labelled by its outcome"""
+        started = time.perf_counter()
+        outcome = "error"
+        try:
+            yield
+            outcome = "ok"
+        except asyncio.TimeoutError:
+            outcome = "timeout"
+            raise
+        finally:
+            GEMINI_CALL_DURATION.labels(mode, outcome).observe(time.perf_counter() - started)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Return current queue depth, in-flight count and wait-time statistics"""
+        return {
+            "max_concurrency": self.max_concurrency,
+            "in_flight": self._in_flight,
+            "queue_depth": self._queued,
+            "completed": self._completed,
+            "failed": self._failed,
+            "avg_wait_ms": round(self._total_wait / self._acquired * 1000, 2) if self._acquired else 0.0,
+            "max_wait_ms": round(self._max_wait * 1000, 2)
+        }
+
+
+_pool: Optional[GenerationPool] = None
+
+
+def get_generation_pool() -> GenerationPool:
+    """Return the process-wide generation pool"""
+    global _pool
+    if _pool is None:
+        _pool = GenerationPool(
+            max_concurrency=settings.google_ai_max_concurrent_generations,
+            timeout=settings.google_ai_generation_timeout or None
+        )
+    return _pool
@@ -0,0 +1,101 @@
+"""
+Latency-aware routing of generations between a fast and a large Gemini model
+"""
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, Optional, Tuple
+from .extractor import Extraction, Intent
+
+FAST_ROUTE = "fast"
+LARGE_ROUTE = "large"
+
+
+@dataclass
+class ModelRoute:
+    name: str
+    model: Any
+    model_name: str
+    slo: float
+    reason: str
+
+
+class ModelRouter:
+    """
+    Chooses the fast or large model for each generation.
+
+    A request goes to the large model when it references at least
+    large_min_entities packages, has one of large_intents, or its prompt is
+    estimated at large_min_prompt_tokens or more; everything else goes to
+    the fast model. Each route has a latency SLO in seconds, measured on
+    model time only (not time queued for a generation slot). A large
+    generation that exceeds its SLO is abandoned for the fast model, and
+    large-class requests then go straight to the fast model for cooldown
+    seconds. Without a large model every request takes the fast route.
+    """
+
+    def __init__(self, fast_model: Any, fast_name: str, large_model: Any = None, large_name: Optional[str] = None,
+                 fast_slo: float = 4.0, large_slo: float = 8.0, large_min_entities: int = 2,
+                 large_min_prompt_tokens: int = 1500, large_intents: Iterable[str] = (), cooldown: float = 30.0):
+        self.fast_model = fast_model
+        self.fast_name = fast_name
+        self.large_model = large_model
+        self.large_name = large_name
+        self.slos = {FAST_ROUTE: fast_slo, LARGE_ROUTE: large_slo}
+        self.large_min_entities = large_min_entities
+        self.large_min_prompt_tokens = large_min_prompt_tokens
+        self.large_intents = {Intent(intent) for intent in large_intents}
+        self.cooldown = cooldown
+        self._cooldown_until = 0.0
+        self._stats = {route: {"requests": 0, "slo_misses": 0, "fallbacks": 0} for route in self.slos}
+
+    @property
+    def enabled(self) -> bool:
+        return self.large_model is not None
+
+    @property
+    def model_names(self) -> Tuple[str, ...]:
+        """Names of the models a request may be answered by, large first"""
+        if not self.enabled:
+            return (self.fast_name,)
+        return tuple(dict.fromkeys((self.large_name, self.fast_name)))
+
+    def route(self, extraction: Extraction, prompt_tokens: int) -> ModelRoute:
+        """Pick the route for a request from its extraction and estimated prompt size"""
+        reason = self._large_reason(extraction, prompt_tokens) if self.enabled else None
+        if reason is None:
+            return self._fast("simple" if self.enabled else "single_model")
+        if time.monotonic() < self._cooldown_until:
+            return self._fast("large_over_budget")
+        self._stats[LARGE_ROUTE]["requests"] += 1
+        return ModelRoute(LARGE_ROUTE, self.large_model, self.large_name, self.slos[LARGE_ROUTE], reason)
+
+    def _large_reason(self, extraction: Extraction, prompt_tokens: int) -> Optional[str]:
+        if len(extraction.entities) >= self.large_min_entities:
+            return "entities"
+        if extraction.intent in self.large_intents:
+            return "intent"
+        if prompt_tokens >= self.large_min_prompt_tokens:
+            return "prompt_size"
+        return None
+
+    def fallback(self) -> ModelRoute:
+        """Record that the large model exceeded its budget and return the fast route to retry on"""
+        self._stats[LARGE_ROUTE]["fallbacks"] += 1
+        self._stats[LARGE_ROUTE]["slo_misses"] += 1
+        self._cooldown_until = time.monotonic() + self.cooldown
+        return self._fast("fallback")
+
+    def record(self, route: ModelRoute, seconds: float) -> None:
+        """Record a completed generation's latency against its route's SLO"""
+        if seconds > route.slo:
+            self._stats[route.name]["slo_misses"] += 1
+
+    def _fast(self, reason: str) -> ModelRoute:
+        self._stats[FAST_ROUTE]["requests"] += 1
+        return ModelRoute(FAST_ROUTE, self.fast_model, self.fast_name, self.slos[FAST_ROUTE], reason)
+
+    def get_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Per-route request, SLO miss and fallback counts"""
+        stats = {route: {**counts, "slo_seconds": self.slos[route]} for route, counts in self._stats.items()}
+        stats[LARGE_ROUTE]["cooldown_remaining"] = round(max(0.0, self._cooldown_until - time.monotonic()), 1)
+        return stats
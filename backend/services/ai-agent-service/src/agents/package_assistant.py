@@ -2,11 +2,27 @@
 Package Assistant Agent using Google Generative AI.
 """
 import os
+import asyncio
 import json
-from typing import Dict, Any, List
+import logging
+import random
+import time
+from typing import Dict, Any, List, Optional, Tuple, AsyncIterator
 import google.generativeai as genai
 from .base_agent import BaseAgent
+from .extractor import Extraction, default_extractor
+from .generation_pool import get_generation_pool
+from .model_router import LARGE_ROUTE, ModelRoute, ModelRouter
+from .prompt_builder import BuiltPrompt, PromptBuilder
+from .response_cache import ResponseCache
+from .response_templates import ResponseRenderer
+from src.config import settings
+from src.tools.base_tool import BaseTool
 from src.tools.package_lookup import PackageLookupTool
+from src.utils.metrics import FUNCTION_CALL_DURATION, MESSAGE_DURATION, MODEL_ROUND_TRIPS
+from src.utils.timing import PhaseTimer, current_timer
+
+logger = logging.getLogger(__name__)
 
 
 class PackageAssistantAgent(BaseAgent):
@@ -15,8 +31,18 @@ class PackageAssistantAgent(BaseAgent):
     Uses Google Generative AI with custom tools for package management.
     """
 
-    def __init__(self):
-        """Initialize the Package Assistant Agent"""
+    def __init__(self, package_tool: Optional[PackageLookupTool] = None,
+                 model: Optional[genai.GenerativeModel] = None,
+                 large_model: Optional[genai.GenerativeModel] = None):
+        """
+        Initialize the Package Assistant Agent.
+
+        Args:
+            package_tool: Shared lookup tool; a new one is created if omitted
+            model: Preconfigured Gemini model; built from GOOGLE_AI_* settings if omitted
+            large_model: Model for complex requests when routing is enabled; built from
+                GOOGLE_AI_LARGE_MODEL if omitted (or the same as model if that was provided)
+        """
         super().__init__(
             agent_name="Package Assistant",
             description="""
@@ -32,17 +58,72 @@ class PackageAssistantAgent(BaseAgent):
         )
 
         # Initialize Google Generative AI
-        api_key = os.getenv("GOOGLE_AI_API_KEY")
-        if api_key:
-            genai.configure(api_key=api_key)
-            self.model = genai.GenerativeModel(
-                model_name=os.getenv("GOOGLE_AI_MODEL", "gemini-1.5-flash")
-            )
+        if model is not None:
+            self.model = model
+            self.model_name = model.model_name.split("/")[-1]
         else:
-            raise ValueError("GOOGLE_AI_API_KEY environment variable is required")
+            api_key = os.getenv("GOOGLE_AI_API_KEY")
+            if api_key:
+                genai.configure(api_key=api_key)
+                self.model_name = os.getenv("GOOGLE_AI_MODEL", "gemini-1.5-flash")
+                self.model = genai.GenerativeModel(model_name=self.model_name)
+            else:
+                raise ValueError("GOOGLE_AI_API_KEY environment variable is required")
+
+        # Fast/large model routing with per-route latency SLOs
+        if not settings.router_enabled:
+            large_model = None
+        elif large_model is None:
+            large_model = model or genai.GenerativeModel(model_name=settings.google_ai_large_model)
+        self.model_router = ModelRouter(
+            fast_model=self.model,
+            fast_name=self.model_name,
+            large_model=large_model,
+            large_name=large_model.model_name.split("/")[-1] if large_model is not None else None,
+            fast_slo=settings.router_fast_slo,
+            large_slo=settings.router_large_slo,
+            large_min_entities=settings.router_large_min_entities,
+            large_min_prompt_tokens=settings.router_large_min_prompt_tokens,
+            large_intents=[intent.strip() for intent in settings.router_large_intents.split(",") if intent.strip()],
+            cooldown=settings.router_cooldown
+        )
 
         # Initialize package lookup tool
-        self.package_tool = PackageLookupTool()
+        self.package_tool = package_tool or PackageLookupTool()
+
+        # Tools the model may call directly when native function calling is enabled
+        self.function_calling = settings.agent_function_calling
+        self.tools: List[BaseTool] = [self.package_tool]
+        self.function_declarations = [
+            declaration for tool in self.tools for declaration in tool.get_function_declarations()
+        ]
+        self._function_tools = {
+            declaration["name"]: tool for tool in self.tools for declaration in tool.get_function_declarations()
+        }
+
+        # Single-pass intent and entity extractor
+        self.extractor = default_extractor
+
+        # Answers to general questions, invalidated when the model or system prompt changes
+        self.response_cache = ResponseCache(
+            max_entries=settings.response_cache_max_entries,
+            ttl=settings.response_cache_ttl
+        )
+
+        # Opt-in template answers for high-confidence single-package questions
+        self.renderer = ResponseRenderer(
+            enabled_intents=[intent.strip() for intent in settings.fast_path_intents.split(",") if intent.strip()],
+            min_confidence=settings.fast_path_min_confidence
+        )
+
+        # Token-budgeted prompt assembly
+        self.prompt_builder = PromptBuilder(
+            token_budget=settings.prompt_token_budget,
+            max_list_items=settings.prompt_max_list_items
+        )
+
+        # Shared pool that bounds in-flight Gemini generations
+        self.generation_pool = get_generation_pool()
 
         # System prompt for the AI
         self.system_prompt = """You are a Package Assistant AI. You help users with package-related queries.
@@ -50,7 +131,7 @@ class PackageAssistantAgent(BaseAgent):
 Available tools:
 1. find_package_by_id(package_id, auth_token=None) - Find a package by its unique ID
 2. track_package_by_tracking_number(tracking_number) - Track a package by tracking number (public)
-3. get_user_packages(user_id, auth_token) - Get all packages for a user (requires auth)
+3. get_user_packages(user_id, auth_token, summary=False) - Get a user's packages, or counts by status and upcoming ETAs (requires auth)
 
 When a user asks about packages:
 - If they provide a package ID (format like PKG175800611738388 or 24-character hex string), use find_package_by_id
@@ -76,36 +157,89 @@ Be conversational and friendly while providing accurate package information."""
         Returns:
             Dict containing the AI response
         """
+        timer = current_timer() or PhaseTimer()
+        started = time.perf_counter()
+        result = await self._handle_message(message, user_context, timer)
+        response_path = result.get("metadata", {}).get("response_path", "error")
+        MESSAGE_DURATION.labels("sync", response_path).observe(time.perf_counter() - started)
+        self._log_if_slow("sync", message, response_path, started, timer)
+        return result
+
+    async def _handle_message(self, message: str, user_context: Dict[str, Any], timer: PhaseTimer) -> Dict[str, Any]:
         try:
             user_id = user_context.get("user_id") if user_context else None
             auth_token = user_context.get("auth_token") if user_context else None
-            tools_used = []
-
-            # Analyze the message to determine if we need to call tools
-            full_prompt = f"{self.system_prompt}\n\nUser: {message}\n\nAssistant:"
-
-            # Check if user is asking about specific package operations
-            if self._should_use_tools(message):
-                tool_result = await self._execute_tools(message, user_id, auth_token)
-                tools_used = tool_result.get("tools_used", [])
+            history = user_context.get("history") if user_context else None
+
+            with timer.phase("extract"):
+                extraction = self.extractor.extract(message)
+
+            # General questions are answered from the cache without calling Gemini
+            cacheable = self._is_cacheable(extraction, history)
+            if cacheable:
+                with timer.phase("cache"):
+                    cached = self.response_cache.get(message, self.model_router.model_names, self.system_prompt)
+                if cached is not None:
+                    text, model_used = cached
+                    return {
+                        "success": True,
+                        "response": text,
+                        "tools_used": [],
+                        "metadata": self._build_metadata(extraction, timer, response_path="cache", model_used=model_used)
+                    }
+
+            if self.function_calling:
+                with timer.phase("prompt"):
+                    prompt = self.prompt_builder.build(self.system_prompt, message, history)
+                route = self.model_router.route(extraction, prompt.estimated_tokens)
+                async for event in self._function_calling_turn(prompt, route, user_id, auth_token, timer):
+                    if event["event"] == "answer":
+                        answer = event["data"]
+                if cacheable and answer["round_trips"] == 1:
+                    self.response_cache.set(message, answer["route"].model_name, self.system_prompt, answer["text"])
+                return {
+                    "success": True,
+                    "response": answer["text"],
+                    "tools_used": answer["tools_used"],
+                    "metadata": self._build_function_calling_metadata(extraction, timer, prompt, answer)
+                }
 
-                # Include tool results in the prompt
-                if tool_result.get("success"):
-                    full_prompt += f"\n\nTool Results: {json.dumps(tool_result['data'], indent=2)}\n\nBased on the tool results above, provide a helpful response to the user:"
-                else:
-                    full_prompt += f"\n\nTool Error: {tool_result.get('error', 'Unknown error')}\n\nPlease inform the user about this issue and suggest alternatives:"
+            prompt, tool_result = await self._prepare_prompt(message, extraction, user_id, auth_token, history, timer)
+            tools_used = tool_result.get("tools_used", []) if tool_result else []
+
+            # Simple single-package questions are answered from the lookup result directly
+            with timer.phase("render"):
+                rendered = self.renderer.render(extraction, tool_result)
+            if rendered is not None:
+                return {
+                    "success": True,
+                    "response": rendered,
+                    "tools_used": tools_used,
+                    "metadata": self._build_metadata(extraction, timer, response_path="template")
+                }
 
-            # Generate response using Gemini
-            response = self.model.generate_content(full_prompt)
+            # Generate response using Gemini without blocking the event loop
+            generation_started = time.perf_counter()
+            route = self.model_router.route(extraction, prompt.estimated_tokens)
+            response, queue_wait_ms, route = await self._generate(route, prompt.text)
+            timer.add("queue", queue_wait_ms)
+            timer.add("llm", (time.perf_counter() - generation_started) * 1000 - queue_wait_ms)
+            if cacheable:
+                self.response_cache.set(message, route.model_name, self.system_prompt, response.text)
 
             return {
                 "success": True,
                 "response": response.text,
                 "tools_used": tools_used,
-                "metadata": {
-                    "agent_name": self.agent_name,
-                    "model_used": os.getenv("GOOGLE_AI_MODEL", "gemini-1.5-flash")
-                }
+                "metadata": self._build_metadata(
+                    extraction,
+                    timer,
+                    response_path="llm",
+                    prompt_tokens_estimate=prompt.estimated_tokens,
+                    prompt_truncated=prompt.truncated,
+                    queue_wait_ms=round(queue_wait_ms, 2),
+                    **self._route_metadata(route)
+                )
             }
 
         except Exception as e:
@@ -115,84 +249,470 @@ Be conversational and friendly while providing accurate package information."""
                 "response": "I'm sorry, I encountered an error while processing your request. Please try again or contact support if the issue persists."
             }
 
-    def _should_use_tools(self, message: str) -> bool:
-        """Determine if the message requires tool usage"""
-        message_lower = message.lower()
-
-        # Check for package ID patterns (PKG followed by numbers or 24-character hex strings)
-        import re
-        if re.search(r'pkg\d+|[0-9a-f]{24}', message_lower):
-            return True
-
-        # Check for tracking number patterns
-        if re.search(r'tr\d+|track.*\d+', message_lower):
-            return True
-
-        # Check for common phrases that might require tools
-        tool_triggers = [
-            'find package', 'show package', 'package id',
-            'track package', 'tracking number',
-            'my packages', 'all packages', 'show my',
-            'package status', 'where is my'
-        ]
+    async def stream_message(self, message: str, user_context: Dict[str, Any] = None) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Handle a user message, yielding tool progress, text chunks and a final metadata event.
 
-        return any(trigger in message_lower for trigger in tool_triggers)
+        Args:
+            message (str): The user's message
+            user_context (Dict): Optional context about the user (user_id, auth_token, etc.)
 
-    async def _execute_tools(self, message: str, user_id: str = None, auth_token: str = None) -> Dict[str, Any]:
-        """Execute appropriate tools based on the message content"""
-        message_lower = message.lower()
+        Yields:
+            Dicts with an "event" name ("tool_start", "tool_result", "chunk", "done" or "error") and "data"
+        """
+        timer = current_timer() or PhaseTimer()
+        started = time.perf_counter()
+        response_path = "error"
+        try:
+            async for event in self._stream_message(message, user_context, timer):
+                if event["event"] == "done":
+                    response_path = event["data"]["metadata"]["response_path"]
+                yield event
+        finally:
+            MESSAGE_DURATION.labels("stream", response_path).observe(time.perf_counter() - started)
+            self._log_if_slow("stream", message, response_path, started, timer)
+
+    async def _stream_message(self, message: str, user_context: Dict[str, Any],
+                              timer: PhaseTimer) -> AsyncIterator[Dict[str, Any]]:
+        try:
+            user_id = user_context.get("user_id") if user_context else None
+            auth_token = user_context.get("auth_token") if user_context else None
+            history = user_context.get("history") if user_context else None
+            tools_used = []
 
-        # Extract package ID if present (PKG format or MongoDB ObjectId format)
-        import re
+            with timer.phase("extract"):
+                extraction = self.extractor.extract(message)
+
+            cacheable = self._is_cacheable(extraction, history)
+            if cacheable:
+                with timer.phase("cache"):
+                    cached = self.response_cache.get(message, self.model_router.model_names, self.system_prompt)
+                if cached is not None:
+                    text, model_used = cached
+                    yield {"event": "chunk", "data": {"text": text}}
+                    yield {
+                        "event": "done",
+                        "data": {
+                            "success": True,
+                            "tools_used": [],
+                            "metadata": self._build_metadata(extraction, timer, response_path="cache",
+                                                             model_used=model_used)
+                        }
+                    }
+                    return
+
+            if self.function_calling:
+                # Tool round trips are not streamed; the answer arrives as one chunk once they finish
+                with timer.phase("prompt"):
+                    prompt = self.prompt_builder.build(self.system_prompt, message, history)
+                route = self.model_router.route(extraction, prompt.estimated_tokens)
+                async for event in self._function_calling_turn(prompt, route, user_id, auth_token, timer):
+                    if event["event"] != "answer":
+                        yield event
+                        continue
+                    answer = event["data"]
+                    if cacheable and answer["round_trips"] == 1:
+                        self.response_cache.set(message, answer["route"].model_name, self.system_prompt, answer["text"])
+                    yield {"event": "chunk", "data": {"text": answer["text"]}}
+                    yield {
+                        "event": "done",
+                        "data": {
+                            "success": True,
+                            "tools_used": answer["tools_used"],
+                            "metadata": self._build_function_calling_metadata(extraction, timer, prompt, answer)
+                        }
+                    }
+                return
+
+            if extraction.needs_tools:
+                yield {"event": "tool_start", "data": {"message": "Looking up package information..."}}
+
+            prompt, tool_result = await self._prepare_prompt(message, extraction, user_id, auth_token, history, timer)
+            if tool_result:
+                tools_used = tool_result.get("tools_used", [])
+                yield {
+                    "event": "tool_result",
+                    "data": {
+                        "success": tool_result.get("success", False),
+                        "tools_used": tools_used,
+                        "error": tool_result.get("error")
+                    }
+                }
 
-        # Check for PKG format first (case insensitive)
-        pkg_id_match = re.search(r'(pkg\d+)', message_lower)
-        if pkg_id_match:
-            package_id = pkg_id_match.group(1).upper()  # Convert to uppercase
-            result = await self.package_tool.find_package_by_id(package_id, auth_token)
-            return {
-                "success": result["success"],
-                "data": result,
-                "tools_used": ["find_package_by_id"],
-                "error": result.get("message") if not result["success"] else None
+            with timer.phase("render"):
+                rendered = self.renderer.render(extraction, tool_result)
+            if rendered is not None:
+                yield {"event": "chunk", "data": {"text": rendered}}
+                yield {
+                    "event": "done",
+                    "data": {
+                        "success": True,
+                        "tools_used": tools_used,
+                        "metadata": self._build_metadata(extraction, timer, response_path="template")
+                    }
+                }
+                return
+
+            # Includes time the client takes to consume each chunk
+            chunks = []
+            generation_started = time.perf_counter()
+            routing = {"route": self.model_router.route(extraction, prompt.estimated_tokens)}
+            async for text in self._stream(routing, prompt.text):
+                chunks.append(text)
+                yield {"event": "chunk", "data": {"text": text}}
+            timer.add("llm", (time.perf_counter() - generation_started) * 1000)
+
+            if cacheable:
+                self.response_cache.set(message, routing["route"].model_name, self.system_prompt, "".join(chunks))
+
+            yield {
+                "event": "done",
+                "data": {
+                    "success": True,
+                    "tools_used": tools_used,
+                    "metadata": self._build_metadata(
+                        extraction,
+                        timer,
+                        response_path="llm",
+                        prompt_tokens_estimate=prompt.estimated_tokens,
+                        prompt_truncated=prompt.truncated,
+                        **self._route_metadata(routing["route"])
+                    )
+                }
             }
 
-        # Check for MongoDB ObjectId format (24-character hex)
-        package_id_match = re.search(r'([0-9a-f]{24})', message_lower)
-        if package_id_match:
-            package_id = package_id_match.group(1)
-            result = await self.package_tool.find_package_by_id(package_id, auth_token)
-            return {
-                "success": result["success"],
-                "data": result,
-                "tools_used": ["find_package_by_id"],
-                "error": result.get("message") if not result["success"] else None
+        except Exception as e:
+            yield {
+                "event": "error",
+                "data": {
+                    "success": False,
+                    "error": f"Agent error: {str(e)}",
+                    "response": "I'm sorry, I encountered an error while processing your request. Please try again or contact support if the issue persists."
+                }
             }
 
-        # Extract tracking number if present
-        tracking_match = re.search(r'(tr\d+)', message_lower)
-        if tracking_match:
-            tracking_number = tracking_match.group(1).upper()
-            result = await self.package_tool.track_package_by_tracking_number(tracking_number)
-            return {
-                "success": result["success"],
-                "data": result,
-                "tools_used": ["track_package_by_tracking_number"],
-                "error": result.get("message") if not result["success"] else None
-            }
+    def _is_cacheable(self, extraction: Extraction, history: Optional[List[Any]] = None) -> bool:
+        """Only answers that depend on neither tool lookups nor earlier turns are cached"""
+        return settings.response_cache_enabled and not extraction.needs_tools and not history
+
+    def _build_metadata(self, extraction: Extraction, timer: Optional[PhaseTimer] = None,
+                        **extra: Any) -> Dict[str, Any]:
+        """Build response metadata common to every response path"""
+        metadata = {
+            "agent_name": self.agent_name,
+            "model_used": self.model_name,
+            "intent": extraction.intent.value,
+            "intent_confidence": extraction.confidence,
+            **extra
+        }
+        if timer is not None and settings.chat_timing_metadata:
+            metadata["timings"] = timer.as_dict()
+        return metadata
+
+    def _build_function_calling_metadata(self, extraction: Extraction, timer: PhaseTimer, prompt: BuiltPrompt,
+                                         answer: Dict[str, Any]) -> Dict[str, Any]:
+        return self._build_metadata(
+            extraction,
+            timer,
+            response_path="function_calling",
+            prompt_tokens_estimate=prompt.estimated_tokens,
+            prompt_truncated=prompt.truncated,
+            queue_wait_ms=round(answer["queue_wait_ms"], 2),
+            model_round_trips=answer["round_trips"],
+            tool_calls=answer["tool_calls"],
+            **self._route_metadata(answer["route"])
+        )
+
+    @staticmethod
+    def _route_metadata(route: ModelRoute) -> Dict[str, Any]:
+        """Which model produced the answer and why it was chosen"""
+        return {"model_used": route.model_name, "model_route": route.name, "model_route_reason": route.reason}
+
+    async def _generate(self, route: ModelRoute, contents: Any, **kwargs: Any) -> Tuple[Any, float, ModelRoute]:
+        """
+        Run a generation on the routed model.
+
+        A large-model generation is abandoned once its model time (excluding
+        the wait for a generation slot) exceeds the route's SLO, and retried
+        on the fast model.
+
+        Returns:
+            Tuple of (model response, queue wait in milliseconds, route that answered)
+        """
+        started = time.perf_counter()
+        try:
+            response, wait_ms = await self.generation_pool.generate(
+                route.model, contents, timeout=route.slo if route.name == LARGE_ROUTE else None, **kwargs
+            )
+        except asyncio.TimeoutError:
+            if route.name != LARGE_ROUTE:
+                raise
+            logger.warning(f"{route.model_name} exceeded its {route.slo}s budget; retrying on the fast model")
+            route = self.model_router.fallback()
+            started = time.perf_counter()
+            response, wait_ms = await self.generation_pool.generate(route.model, contents, **kwargs)
+        self.model_router.record(route, time.perf_counter() - started - wait_ms / 1000)
+        return response, wait_ms, route
+
+    async def _stream(self, routing: Dict[str, ModelRoute], prompt: str) -> AsyncIterator[str]:
+        """
+        Stream a generation on routing["route"].
+
+        For the large model the SLO applies to the first chunk once a
+        generation slot is acquired: if none arrives in time the stream is
+        abandoned and restarted on the fast model, and routing["route"] is
+        updated to the route that answered.
+        """
+        route = routing["route"]
+        started = time.perf_counter()
+        first: Optional[str] = None
+        if route.name == LARGE_ROUTE:
+            stream = self.generation_pool.stream(route.model, prompt, first_chunk_timeout=route.slo)
+            try:
+                first = await stream.__anext__()
+            except StopAsyncIteration:
+                return
+            except asyncio.TimeoutError:
+                await stream.aclose()
+                logger.warning(f"{route.model_name} missed its {route.slo}s first-chunk budget; streaming from the fast model")
+                route = routing["route"] = self.model_router.fallback()
+                started = time.perf_counter()
+                stream = self.generation_pool.stream(route.model, prompt)
+        else:
+            stream = self.generation_pool.stream(route.model, prompt)
+
+        try:
+            if first is not None:
+                self.model_router.record(route, time.perf_counter() - started)
+                yield first
+            async for text in stream:
+                if first is None:
+                    first = text
+                    self.model_router.record(route, time.perf_counter() - started)
+                yield text
+        finally:
+            await stream.aclose()
+
+    @staticmethod
+    def _log_if_slow(mode: str, message: str, response_path: str, started: float, timer: PhaseTimer) -> None:
+        """Log a sampled structured record of where the time went for slow messages"""
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        if elapsed_ms < settings.slow_request_threshold_ms or random.random() >= settings.slow_request_log_sample_rate:
+            return
+        logger.warning("Slow chat request: " + json.dumps({
+            "mode": mode,
+            "response_path": response_path,
+            "elapsed_ms": round(elapsed_ms, 2),
+            "message_chars": len(message),
+            "timings": timer.as_dict()
+        }))
+
+    async def _prepare_prompt(self, message: str, extraction: Extraction, user_id: str = None,
+                              auth_token: str = None, history: Optional[List[Any]] = None,
+                              timer: Optional[PhaseTimer] = None) -> Tuple[BuiltPrompt, Optional[Dict[str, Any]]]:
+        """Run any tools the message needs and build the token-budgeted prompt for Gemini"""
+        timer = timer or PhaseTimer()
+        tool_result = None
+
+        # Check if user is asking about specific package operations
+        if extraction.needs_tools:
+            with timer.phase("tools"):
+                tool_result = await self._execute_tools(extraction, user_id, auth_token)
+
+        with timer.phase("prompt"):
+            prompt = self.prompt_builder.build(self.system_prompt, message, history, tool_result)
+        return prompt, tool_result
+
+    async def _execute_tools(self, extraction: Extraction, user_id: str = None, auth_token: str = None) -> Dict[str, Any]:
+        """Resolve every package reference found in the message concurrently"""
+        calls = [("find_package_by_id", package_id) for package_id in extraction.package_ids]
+        calls += [("track_package_by_tracking_number", number) for number in extraction.tracking_numbers]
 
         # Check for user package requests
-        user_package_triggers = ['my packages', 'all packages', 'show my']
-        if any(trigger in message_lower for trigger in user_package_triggers) and user_id and auth_token:
-            result = await self.package_tool.get_user_packages(user_id, auth_token)
-            return {
-                "success": result["success"],
-                "data": result,
-                "tools_used": ["get_user_packages"],
-                "error": result.get("message") if not result["success"] else None
+        if extraction.wants_user_packages and user_id and auth_token:
+            calls.append(("get_user_packages", user_id))
+
+        if not calls:
+            return {"success": False, "error": "No appropriate tool found for this query"}
+
+        return await self._run_tool_calls(calls[:settings.agent_max_tool_calls], user_id, auth_token)
+
+    async def _run_tool_calls(self, calls: List[Tuple[str, str]], user_id: str = None,
+                              auth_token: str = None) -> Dict[str, Any]:
+        """Run tool calls concurrently (bounded) and merge them into one tool result"""
+        semaphore = asyncio.Semaphore(settings.agent_max_tool_concurrency)
+
+        async def run(tool_name: str, query: str) -> Dict[str, Any]:
+            async with semaphore:
+                if tool_name == "find_package_by_id":
+                    return await self.package_tool.find_package_by_id(query, auth_token)
+                if tool_name == "track_package_by_tracking_number":
+                    return await self.package_tool.track_package_by_tracking_number(query)
+                # A summary keeps the prompt small for senders with hundreds of packages
+                return await self.package_tool.get_user_packages(user_id, auth_token, summary=True)
+
+        results = await asyncio.gather(*(run(tool_name, query) for tool_name, query in calls))
+        tool_calls = [
+            {"tool": tool_name, "query": query, "result": result}
+            for (tool_name, query), result in zip(calls, results)
+        ]
+        tools_used = list(dict.fromkeys(tool_name for tool_name, _ in calls))
+        errors = [result.get("message") for result in results if not result["success"]]
+        success = len(errors) < len(results)
+
+        return {
+            "success": success,
+            "data": results[0] if len(results) == 1 else {"results": tool_calls},
+            "calls": tool_calls,
+            "tools_used": tools_used,
+            "error": None if success else "; ".join(error for error in errors if error)
+        }
+
+    async def _function_calling_turn(self, prompt: BuiltPrompt, route: ModelRoute, user_id: str = None,
+                                     auth_token: str = None,
+                                     timer: Optional[PhaseTimer] = None) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Let the model request tool calls until it answers in text.
+
+        The function calls of one model response run concurrently. Calls beyond
+        the turn's tool budget are answered with an error instead of being
+        executed, and the last allowed round trip disables function calling
+        so the turn always ends with text.
+
+        Yields:
+            "tool_start" and "tool_result" events per round of calls, then one
+            "answer" event with the text, tools executed, round trips, queue wait and
+            the route that answered (the fast one for the rest of the turn after a fallback)
+        """
+        timer = timer or PhaseTimer()
+        context = {"user_id": user_id, "auth_token": auth_token}
+        tools = [{"function_declarations": self.function_declarations}]
+        contents: List[Any] = [{"role": "user", "parts": [prompt.text]}]
+        max_round_trips = max(1, settings.agent_max_model_round_trips)
+        tools_used: List[str] = []
+        tool_calls = 0
+        queue_wait_ms = 0.0
+        round_trips = 0
+
+        while True:
+            round_trips += 1
+            final = round_trips >= max_round_trips
+            started = time.perf_counter()
+            response, wait_ms, route = await self._generate(
+                route,
+                contents,
+                mode="function_calling",
+                tools=tools,
+                # Built per call: the SDK converts (and consumes) the dict in place
+                tool_config={"function_calling_config": {"mode": "none"}} if final else None
+            )
+            queue_wait_ms += wait_ms
+            timer.add("queue", wait_ms)
+            timer.add("llm", (time.perf_counter() - started) * 1000 - wait_ms)
+
+            calls = [] if final else self._function_calls(response)
+            if not calls:
+                break
+
+            names = [name for name, _ in calls]
+            yield {"event": "tool_start", "data": {"message": "Looking up package information...", "calls": names}}
+            budget = max(0, settings.agent_max_tool_calls - tool_calls)
+            with timer.phase("tools"):
+                results = await self._run_function_calls(calls, context, budget)
+            tool_calls += min(len(calls), budget)
+            executed = [name for name in names[:budget] if name in self._function_tools]
+            tools_used.extend(executed)
+
+            contents.append(response.candidates[0].content)
+            contents.append({
+                "role": "function",
+                "parts": [
+                    genai.protos.Part(function_response=genai.protos.FunctionResponse(
+                        name=name,
+                        response={"result": json.loads(self.prompt_builder.serialize(
+                            self.prompt_builder.project_lookup(result, self.prompt_builder.max_list_items)
+                        ))}
+                    ))
+                    for name, result in zip(names, results)
+                ]
+            })
+            errors = [result.get("message") for result in results if not result.get("success")]
+            success = len(errors) < len(results)
+            yield {
+                "event": "tool_result",
+                "data": {
+                    "success": success,
+                    "tools_used": list(dict.fromkeys(executed)),
+                    "error": None if success else "; ".join(error for error in errors if error)
+                }
             }
 
-        return {"success": False, "error": "No appropriate tool found for this query"}
+        MODEL_ROUND_TRIPS.observe(round_trips)
+        yield {
+            "event": "answer",
+            "data": {
+                "text": response.text,
+                "tools_used": list(dict.fromkeys(tools_used)),
+                "round_trips": round_trips,
+                "tool_calls": tool_calls,
+                "queue_wait_ms": queue_wait_ms,
+                "route": route
+            }
+        }
+
+    @staticmethod
+    def _function_calls(response: Any) -> List[Tuple[str, Dict[str, Any]]]:
+        """Extract the (name, args) function calls requested by a model response"""
+        candidates = getattr(response, "candidates", None)
+        if not candidates:
+            return []
+        return [
+            (part.function_call.name, type(part.function_call).to_dict(part.function_call).get("args") or {})
+            for part in candidates[0].content.parts
+            if "function_call" in part
+        ]
+
+    async def _run_function_calls(self, calls: List[Tuple[str, Dict[str, Any]]], context: Dict[str, Any],
+                                  budget: int) -> List[Dict[str, Any]]:
+        """Run model-requested calls concurrently (bounded), refusing those beyond the budget"""
+        semaphore = asyncio.Semaphore(settings.agent_max_tool_concurrency)
+
+        async def run(name: str, args: Dict[str, Any], allowed: bool) -> Dict[str, Any]:
+            if not allowed:
+                return {
+                    "success": False,
+                    "message": "Tool call budget for this turn is exhausted; answer with the information gathered so far."
+                }
+            tool = self._function_tools.get(name)
+            if tool is None:
+                return {"success": False, "message": f"Unknown function: {name}"}
+            async with semaphore:
+                started = time.perf_counter()
+                outcome = "error"
+                try:
+                    result = await tool.call_function(name, args, context)
+                    outcome = "ok" if result.get("success") else "failed"
+                    return result
+                except Exception as e:
+                    return {"success": False, "message": f"{name} failed: {str(e)}"}
+                finally:
+                    FUNCTION_CALL_DURATION.labels(name, outcome).observe(time.perf_counter() - started)
+
+        return await asyncio.gather(*(run(name, args, i < budget) for i, (name, args) in enumerate(calls)))
+
+    async def warm_up(self, timeout: float = 10.0) -> None:
+        """
+        Open the Gemini channel with a cheap token-count call.
+
+        Token counting authenticates and connects like a generation but
+        produces no output, so the first user request starts on a warm channel.
+        The large model is warmed too when routing is enabled.
+        """
+        models = [self.model]
+        if self.model_router.enabled and self.model_router.large_model is not self.model:
+            models.append(self.model_router.large_model)
+        for model in models:
+            await asyncio.wait_for(model.count_tokens_async("ping"), timeout=timeout)
 
     def get_capabilities(self) -> List[str]:
         """Return a list of agent capabilities"""
@@ -0,0 +1,146 @@
+"""
+Token-budgeted prompt assembly with compact tool-result serialization
+"""
+import json
+import math
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+# Fields the assistant needs to answer package questions, keyed by the name used in the prompt.
+# Values list the source keys in both normalized find results and raw gateway documents.
+PACKAGE_FIELDS = {
+    "id": ("id", "_id"),
+    "tracking_number": ("tracking_number", "trackingId", "trackingNumber"),
+    "name": ("name",),
+    "status": ("status",),
+    "location": ("location",),
+    "eta": ("eta",),
+    "recipient_name": ("recipient_name", "recipientName"),
+    "category": ("category",),
+    "last_update": ("last_update", "lastUpdate", "updated_at", "updatedAt"),
+}
+
+TOOL_RESULTS_INSTRUCTION = "Based on the tool results above, provide a helpful response to the user:"
+TOOL_ERROR_INSTRUCTION = "Please inform the user about this issue and suggest alternatives:"
+
+
+@dataclass
+class BuiltPrompt:
+    text: str
+    estimated_tokens: int
+    truncated: bool = False
+
+
+class PromptBuilder:
+    """
+    Assembles the Gemini prompt within a token budget.
+
+    The system prompt, user message and instructions are always kept. Tool
+    results are projected to the fields an answer needs and serialized as
+    compact JSON; long package lists are cut to max_list_items with an
+    "N more" marker and shrunk further if the budget requires. Conversation
+    history fills whatever budget remains, newest turns first.
+    """
+
+    def __init__(self, token_budget: int = 3000, max_list_items: int = 10, chars_per_token: float = 4.0):
+        self.token_budget = token_budget
+        self.max_list_items = max_list_items
+        self.chars_per_token = chars_per_token
+
+    def estimate_tokens(self, text: str) -> int:
+        """Cheap token estimate based on average characters per token"""
+        return math.ceil(len(text) / self.chars_per_token)
+
+    def build(self, system_prompt: str, message: str, history: Optional[List[Any]] = None,
+              tool_result: Optional[Dict[str, Any]] = None) -> BuiltPrompt:
+        """Build the prompt text and report its estimated token count"""
+        head = f"{system_prompt}\n\n"
+        question = f"User: {message}\n\nAssistant:"
+        budget = self.token_budget - self.estimate_tokens(head + question)
+        truncated = False
+
+        tool_section = ""
+        if tool_result is not None:
+            if tool_result.get("success"):
+                max_items = self.max_list_items
+                while True:
+                    payload = self.serialize(self.project_tool_data(tool_result.get("data"), max_items))
+                    tool_section = f"\n\nTool Results: {payload}\n\n{TOOL_RESULTS_INSTRUCTION}"
+                    if self.estimate_tokens(tool_section) <= budget or max_items == 0:
+                        break
+                    max_items //= 2
+                    truncated = True
+            else:
+                tool_section = f"\n\nTool Error: {tool_result.get('error', 'Unknown error')}\n\n{TOOL_ERROR_INSTRUCTION}"
+            budget -= self.estimate_tokens(tool_section)
+
+        history_section = ""
+        if history:
+            lines: List[str] = []
+            remaining = budget - self.estimate_tokens("Conversation so far:\n\n\n")
+            for entry in reversed(history):
+                line = f"{'User' if entry.role == 'user' else 'Assistant'}: {entry.content}"
+                cost = self.estimate_tokens(line + "\n")
+                if cost > remaining:
+                    truncated = True
+                    break
+                lines.append(line)
+                remaining -= cost
+            if lines:
+                history_section = "Conversation so far:\n" + "\n".join(reversed(lines)) + "\n\n"
+
+        text = head + history_section + question + tool_section
+        return BuiltPrompt(text=text, estimated_tokens=self.estimate_tokens(text), truncated=truncated)
+
+    def project_tool_data(self, data: Any, max_items: int) -> Any:
+        """Project the agent's tool data (one lookup result or several) for the prompt"""
+        if isinstance(data, dict) and "results" in data and "success" not in data:
+            return [
+                {"tool": call["tool"], "query": call["query"], **self.project_lookup(call["result"], max_items)}
+                for call in data["results"]
+            ]
+        if isinstance(data, dict):
+            return self.project_lookup(data, max_items)
+        return data
+
+    def project_lookup(self, result: Dict[str, Any], max_items: int) -> Dict[str, Any]:
+        """Keep only the parts of a PackageLookupTool result an answer needs"""
+        projected: Dict[str, Any] = {"success": result.get("success")}
+        for key in ("message", "suggestion"):
+            if result.get(key):
+                projected[key] = result[key]
+
+        if result.get("summary"):
+            projected["summary"] = result["summary"]
+
+        data = result.get("data")
+        if isinstance(data, list):
+            projected["total"] = result.get("total", result.get("count", len(data)))
+            if result.get("next_cursor"):
+                projected["next_cursor"] = result["next_cursor"]
+            projected["packages"] = [self.project_package(package) for package in data[:max_items]]
+            hidden = len(data) - len(projected["packages"])
+            if hidden > 0:
+                projected["more"] = f"{hidden} more not shown"
+        elif isinstance(data, dict):
+            projected["package"] = self.project_package(data)
+        return projected
+
+    @staticmethod
+    def project_package(package: Any) -> Any:
+        """Reduce a package document to the answer-relevant, non-empty fields"""
+        if not isinstance(package, dict):
+            return package
+        projected = {}
+        for field, sources in PACKAGE_FIELDS.items():
+            for source in sources:
+                value = package.get(source)
+                if value not in (None, ""):
+                    projected[field] = value
+                    break
+        return projected
+
+    @staticmethod
+    def serialize(data: Any) -> str:
+        """Compact JSON without indentation or spaces after separators"""
+        return json.dumps(data, separators=(",", ":"), default=str)
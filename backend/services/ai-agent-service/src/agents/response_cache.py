@@ -0,0 +1,64 @@
+"""
+Answer cache for messages that do not need tool lookups
+"""
+import hashlib
+import re
+from typing import Any, Dict, Iterable, Optional, Tuple
+from src.utils.cache import TTLCache
+
+_WHITESPACE = re.compile(r"\s+")
+_TRAILING_PUNCTUATION = re.compile(r"[\s?!.]+$")
+
+
+class ResponseCache:
+    """
+    Caches LLM answers to general (non-tool) questions.
+
+    Entries are keyed on a hash of the system prompt, the name of the model
+    that produced the answer and the normalized message. Lookups name the
+    models currently in use, so answers from a replaced model are never
+    served, and a system prompt change drops every entry.
+    """
+
+    def __init__(self, max_entries: int = 500, ttl: float = 3600.0):
+        self._cache = TTLCache(max_entries=max_entries, default_ttl=ttl)
+        self._system_prompt: Optional[str] = None
+        self._fingerprint: Optional[str] = None
+
+    @staticmethod
+    def normalize(message: str) -> str:
+        """Lowercase, collapse whitespace and drop trailing punctuation"""
+        return _TRAILING_PUNCTUATION.sub("", _WHITESPACE.sub(" ", message.lower()).strip())
+
+    def _version(self, system_prompt: str) -> str:
+        """Return the system prompt fingerprint, clearing the cache when it changes"""
+        if system_prompt is not self._system_prompt:
+            fingerprint = hashlib.sha256(system_prompt.encode()).hexdigest()[:12]
+            if self._fingerprint is not None and fingerprint != self._fingerprint:
+                self._cache.clear()
+            self._system_prompt = system_prompt
+            self._fingerprint = fingerprint
+        return self._fingerprint
+
+    def get(self, message: str, model_names: Iterable[str], system_prompt: str) -> Optional[Tuple[str, str]]:
+        """Return (answer, model name) for a message answered by any of model_names, if cached"""
+        version = self._version(system_prompt)
+        normalized = self.normalize(message)
+        for model_name in model_names:
+            response = self._cache.get((version, model_name, normalized))
+            if response is not None:
+                return response, model_name
+        return None
+
+    def set(self, message: str, model_name: str, system_prompt: str, response: str) -> None:
+        """Cache the answer model_name gave to a message"""
+        if not response:
+            return
+        version = self._version(system_prompt)
+        self._cache.set((version, model_name, self.normalize(message)), response)
+
+    def clear(self) -> None:
+        self._cache.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {**self._cache.get_stats(), "version": self._fingerprint}
@@ -0,0 +1,90 @@
+"""
+Deterministic responses for simple single-package questions
+"""
+from datetime import datetime
+from typing import Any, Dict, Optional
+from .extractor import Extraction, Intent
+
+
+class ResponseRenderer:
+    """
+    Renders status, location and ETA answers straight from a lookup result.
+
+    Used as a fast path instead of asking Gemini to rephrase structured data.
+    Returns None whenever the question or result is not a clean fit, so the
+    caller can fall back to the LLM.
+    """
+
+    SUPPORTED_INTENTS = (Intent.PACKAGE_STATUS, Intent.PACKAGE_LOCATION, Intent.PACKAGE_ETA)
+
+    def __init__(self, enabled_intents, min_confidence: float = 0.9):
+        self.enabled_intents = {Intent(intent) for intent in enabled_intents} & set(self.SUPPORTED_INTENTS)
+        self.min_confidence = min_confidence
+
+    def can_render(self, extraction: Extraction) -> bool:
+        """Whether a message qualifies for the template path before any tool runs"""
+        return (
+            extraction.intent in self.enabled_intents
+            and extraction.confidence >= self.min_confidence
+            and len(extraction.entities) == 1
+            and not extraction.wants_user_packages
+        )
+
+    def render(self, extraction: Extraction, tool_result: Optional[Dict[str, Any]]) -> Optional[str]:
+        """Render an answer for a successful single-package lookup, or None"""
+        if not self.can_render(extraction) or not tool_result or not tool_result.get("success"):
+            return None
+
+        package = self._package_fields((tool_result.get("data") or {}).get("data"))
+        if package is None or not package["status"]:
+            return None
+
+        label = f"**{package['name']}** ({package['reference']})" if package["name"] else f"**{package['reference']}**"
+        status = str(package["status"]).lower()
+        location = package["location"]
+        eta = self._format_date(package["eta"])
+
+        if extraction.intent == Intent.PACKAGE_LOCATION:
+            if location:
+                return f"Package {label} was last reported at **{location}**. Its current status is {status}."
+            return f"There is no location update for package {label} yet. Its current status is {status}."
+
+        if extraction.intent == Intent.PACKAGE_ETA:
+            if status == "delivered":
+                return f"Package {label} has already been delivered."
+            if eta:
+                return f"Package {label} is expected to arrive on **{eta}**. Its current status is {status}."
+            return f"There is no estimated delivery date for package {label} yet. Its current status is {status}."
+
+        parts = [f"Package {label} is currently **{status}**."]
+        if location:
+            parts.append(f"Last reported location: {location}.")
+        if eta and status != "delivered":
+            parts.append(f"Estimated delivery: {eta}.")
+        return " ".join(parts)
+
+    @staticmethod
+    def _package_fields(data: Any) -> Optional[Dict[str, Any]]:
+        """Read fields from either a normalized find result or a raw tracking document"""
+        if not isinstance(data, dict):
+            return None
+        reference = (
+            data.get("tracking_number") or data.get("trackingId") or data.get("trackingNumber")
+            or data.get("id") or data.get("_id")
+        )
+        return {
+            "reference": reference,
+            "name": data.get("name"),
+            "status": data.get("status"),
+            "location": data.get("location"),
+            "eta": data.get("eta")
+        }
+
+    @staticmethod
+    def _format_date(value: Any) -> Optional[str]:
+        if not value:
+            return None
+        try:
+            return datetime.fromisoformat(str(value).replace("Z", "+00:00")).strftime("%B %d, %Y")
+        except ValueError:
+            return str(value)
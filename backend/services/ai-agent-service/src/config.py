@@ -12,6 +12,67 @@ class Settings(BaseSettings):
     google_ai_model: str = os.getenv("GOOGLE_AI_MODEL", "gemini-pro")
     google_ai_temperature: float = float(os.getenv("GOOGLE_AI_TEMPERATURE", "0.7"))
     google_ai_max_tokens: int = int(os.getenv("GOOGLE_AI_MAX_TOKENS", "1000"))
+    google_ai_max_concurrent_generations: int = int(os.getenv("GOOGLE_AI_MAX_CONCURRENT_GENERATIONS", "8"))
+    google_ai_generation_timeout: float = float(os.getenv("GOOGLE_AI_GENERATION_TIMEOUT", "60.0"))
+
+    # Model routing: complex requests go to a large model, the rest to GOOGLE_AI_MODEL.
+    # SLOs are per-route latency budgets in seconds (time to first chunk when streaming);
+    # a large generation over budget is retried on the fast model.
+    router_enabled: bool = os.getenv("MODEL_ROUTER_ENABLED", "false").lower() == "true"
+    google_ai_large_model: str = os.getenv("GOOGLE_AI_LARGE_MODEL", "gemini-1.5-pro")
+    router_fast_slo: float = float(os.getenv("MODEL_ROUTER_FAST_SLO", "4.0"))
+    router_large_slo: float = float(os.getenv("MODEL_ROUTER_LARGE_SLO", "8.0"))
+    router_large_min_entities: int = int(os.getenv("MODEL_ROUTER_LARGE_MIN_ENTITIES", "2"))
+    router_large_min_prompt_tokens: int = int(os.getenv("MODEL_ROUTER_LARGE_MIN_PROMPT_TOKENS", "1500"))
+    router_large_intents: str = os.getenv("MODEL_ROUTER_LARGE_INTENTS", "")
+    router_cooldown: float = float(os.getenv("MODEL_ROUTER_COOLDOWN", "30.0"))
+
+    # Probe Gemini once at startup so the first chat does not pay connection setup
+    agent_warmup_enabled: bool = os.getenv("AGENT_WARMUP_ENABLED", "true").lower() == "true"
+    agent_warmup_timeout: float = float(os.getenv("AGENT_WARMUP_TIMEOUT", "10.0"))
+
+    # Per-phase timings in chat response metadata, and sampled logs of slow chat requests
+    chat_timing_metadata: bool = os.getenv("CHAT_TIMING_METADATA", "false").lower() == "true"
+    slow_request_threshold_ms: float = float(os.getenv("SLOW_REQUEST_THRESHOLD_MS", "5000"))
+    slow_request_log_sample_rate: float = float(os.getenv("SLOW_REQUEST_LOG_SAMPLE_RATE", "1.0"))
+
+    # Chat admission control: token buckets (requests/second and burst) with a bounded wait queue
+    admission_enabled: bool = os.getenv("ADMISSION_ENABLED", "true").lower() == "true"
+    admission_global_rate: float = float(os.getenv("ADMISSION_GLOBAL_RATE", "50"))
+    admission_global_burst: float = float(os.getenv("ADMISSION_GLOBAL_BURST", "100"))
+    admission_user_rate: float = float(os.getenv("ADMISSION_USER_RATE", "2"))
+    admission_user_burst: float = float(os.getenv("ADMISSION_USER_BURST", "5"))
+    # Per client address, across user IDs; anonymous callers also get a user-sized bucket per address.
+    # Behind a gateway or load balancer the address is the proxy's unless its X-Forwarded-For is
+    # trusted: list the proxy addresses in FORWARDED_ALLOW_IPS ("*" trusts every peer).
+    admission_client_rate: float = float(os.getenv("ADMISSION_CLIENT_RATE", "10"))
+    admission_client_burst: float = float(os.getenv("ADMISSION_CLIENT_BURST", "20"))
+    admission_max_queue: int = int(os.getenv("ADMISSION_MAX_QUEUE", "50"))
+    admission_max_wait: float = float(os.getenv("ADMISSION_MAX_WAIT", "2.0"))
+    admission_max_tracked_users: int = int(os.getenv("ADMISSION_MAX_TRACKED_USERS", "10000"))
+
+    # Answer cache for general (non-tool) questions
+    response_cache_enabled: bool = os.getenv("RESPONSE_CACHE_ENABLED", "true").lower() == "true"
+    response_cache_max_entries: int = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "500"))
+    response_cache_ttl: float = float(os.getenv("RESPONSE_CACHE_TTL", "3600.0"))
+
+    # Prompt Assembly Configuration
+    prompt_token_budget: int = int(os.getenv("PROMPT_TOKEN_BUDGET", "3000"))
+    prompt_max_list_items: int = int(os.getenv("PROMPT_MAX_LIST_ITEMS", "10"))
+
+    # Template fast path: comma-separated intents (package_status, package_location, package_eta)
+    # answered directly from lookup results instead of calling Gemini
+    fast_path_intents: str = os.getenv("FAST_PATH_INTENTS", "")
+    fast_path_min_confidence: float = float(os.getenv("FAST_PATH_MIN_CONFIDENCE", "0.9"))
+
+    # Agent Tool Execution Configuration
+    agent_max_tool_calls: int = int(os.getenv("AGENT_MAX_TOOL_CALLS", "10"))
+    agent_max_tool_concurrency: int = int(os.getenv("AGENT_MAX_TOOL_CONCURRENCY", "5"))
+
+    # Native function calling: the model requests tool calls instead of regex-based tool selection.
+    # agent_max_tool_calls caps the tool calls of a whole turn; the last allowed round trip must answer in text.
+    agent_function_calling: bool = os.getenv("AGENT_FUNCTION_CALLING", "false").lower() == "true"
+    agent_max_model_round_trips: int = int(os.getenv("AGENT_MAX_MODEL_ROUND_TRIPS", "4"))
 
     # Service URLs
     user_service_url: str = os.getenv("USER_SERVICE_URL", "http://localhost:3001")
@@ -19,9 +80,73 @@ class Settings(BaseSettings):
     delivery_service_url: str = os.getenv("DELIVERY_SERVICE_URL", "http://localhost:3003")
     gateway_url: str = os.getenv("GATEWAY_URL", "http://localhost:3000")
 
+    # Upstream HTTP Client Configuration
+    http_max_connections: int = int(os.getenv("HTTP_MAX_CONNECTIONS", "100"))
+    http_max_keepalive_connections: int = int(os.getenv("HTTP_MAX_KEEPALIVE_CONNECTIONS", "20"))
+    http_keepalive_expiry: float = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "30.0"))
+    http_connect_timeout: float = float(os.getenv("HTTP_CONNECT_TIMEOUT", "5.0"))
+    http_read_timeout: float = float(os.getenv("HTTP_READ_TIMEOUT", "15.0"))
+    http_write_timeout: float = float(os.getenv("HTTP_WRITE_TIMEOUT", "5.0"))
+    http_pool_timeout: float = float(os.getenv("HTTP_POOL_TIMEOUT", "5.0"))
+
+    # Query tracking and authenticated package endpoints concurrently when a token is present
+    lookup_hedged_requests: bool = os.getenv("LOOKUP_HEDGED_REQUESTS", "false").lower() == "true"
+
+    # Per-endpoint circuit breakers for gateway lookups
+    circuit_breaker_failure_rate: float = float(os.getenv("CIRCUIT_BREAKER_FAILURE_RATE", "0.5"))
+    circuit_breaker_min_calls: int = int(os.getenv("CIRCUIT_BREAKER_MIN_CALLS", "10"))
+    circuit_breaker_window: float = float(os.getenv("CIRCUIT_BREAKER_WINDOW", "30.0"))
+    circuit_breaker_open_seconds: float = float(os.getenv("CIRCUIT_BREAKER_OPEN_SECONDS", "15.0"))
+    circuit_breaker_half_open_probes: int = int(os.getenv("CIRCUIT_BREAKER_HALF_OPEN_PROBES", "1"))
+
+    # Jittered retries of failed lookups, capped by a process-wide retry budget
+    lookup_max_retries: int = int(os.getenv("LOOKUP_MAX_RETRIES", "2"))
+    lookup_retry_backoff: float = float(os.getenv("LOOKUP_RETRY_BACKOFF", "0.1"))
+    retry_budget_ratio: float = float(os.getenv("RETRY_BUDGET_RATIO", "0.2"))
+    retry_budget_min_retries: int = int(os.getenv("RETRY_BUDGET_MIN_RETRIES", "10"))
+    retry_budget_window: float = float(os.getenv("RETRY_BUDGET_WINDOW", "10.0"))
+
+    # Seconds a synchronous tool wrapper waits for its lookup on the tool bridge loop
+    tool_bridge_timeout: float = float(os.getenv("TOOL_BRIDGE_TIMEOUT", "30.0"))
+
+    # Largest page size accepted for user package listings
+    user_packages_max_limit: int = int(os.getenv("USER_PACKAGES_MAX_LIMIT", "100"))
+
+    # Bulk Lookup Configuration
+    bulk_lookup_concurrency: int = int(os.getenv("BULK_LOOKUP_CONCURRENCY", "10"))
+    bulk_lookup_max_items: int = int(os.getenv("BULK_LOOKUP_MAX_ITEMS", "500"))
+
+    # Chat session warm-up: lookups prefetched when a signed-in user opens the chat
+    session_prefetch_enabled: bool = os.getenv("SESSION_PREFETCH_ENABLED", "true").lower() == "true"
+    session_prefetch_max_packages: int = int(os.getenv("SESSION_PREFETCH_MAX_PACKAGES", "10"))
+
+    # Package Lookup Cache Configuration (a TTL of 0 disables caching for that endpoint)
+    lookup_cache_max_entries: int = int(os.getenv("LOOKUP_CACHE_MAX_ENTRIES", "1000"))
+    lookup_cache_track_ttl: float = float(os.getenv("LOOKUP_CACHE_TRACK_TTL", "30.0"))
+    lookup_cache_package_ttl: float = float(os.getenv("LOOKUP_CACHE_PACKAGE_TTL", "30.0"))
+    lookup_cache_user_packages_ttl: float = float(os.getenv("LOOKUP_CACHE_USER_PACKAGES_TTL", "15.0"))
+
+    # Package status events that update or invalidate cached lookups ("amqp" or "memory" broker)
+    package_events_enabled: bool = os.getenv("PACKAGE_EVENTS_ENABLED", "false").lower() == "true"
+    package_events_broker: str = os.getenv("PACKAGE_EVENTS_BROKER", "amqp")
+    rabbitmq_uri: str = os.getenv("RABBITMQ_URI", "amqp://localhost:5672")
+    package_events_exchange: str = os.getenv("PACKAGE_EVENTS_EXCHANGE", "packaroo.events")
+    package_events_batch_size: int = int(os.getenv("PACKAGE_EVENTS_BATCH_SIZE", "100"))
+    package_events_batch_interval: float = float(os.getenv("PACKAGE_EVENTS_BATCH_INTERVAL", "0.2"))
+    package_events_reconnect_initial: float = float(os.getenv("PACKAGE_EVENTS_RECONNECT_INITIAL", "1.0"))
+    package_events_reconnect_max: float = float(os.getenv("PACKAGE_EVENTS_RECONNECT_MAX", "30.0"))
+
     # Database Configuration
     mongodb_uri: str = os.getenv("MONGODB_URI", "mongodb://localhost:27017/packaroo")
 
+    # Conversation Store Configuration ("mongodb" or "memory")
+    conversation_store_backend: str = os.getenv("CONVERSATION_STORE_BACKEND", "mongodb")
+    conversation_max_messages: int = int(os.getenv("CONVERSATION_MAX_MESSAGES", "20"))
+    conversation_cache_size: int = int(os.getenv("CONVERSATION_CACHE_SIZE", "1000"))
+    conversation_flush_interval: float = float(os.getenv("CONVERSATION_FLUSH_INTERVAL", "1.0"))
+    conversation_flush_batch_size: int = int(os.getenv("CONVERSATION_FLUSH_BATCH_SIZE", "100"))
+    conversation_store_timeout_ms: int = int(os.getenv("CONVERSATION_STORE_TIMEOUT_MS", "2000"))
+
     # JWT Configuration
     jwt_secret: str = os.getenv("JWT_SECRET", "your-jwt-secret-key")
     jwt_algorithm: str = "HS256"
@@ -0,0 +1,199 @@
+"""
+Process-wide agent and tool registry, exposed to routes as FastAPI dependencies
+"""
+
+import asyncio
+import logging
+import time
+from typing import Any, Dict, Optional
+from fastapi import HTTPException, Request, status
+from src.config import settings
+from src.agents.package_assistant import PackageAssistantAgent
+from src.services.agent_service import AgentService
+from src.services.chat_service import ChatService
+from src.services.conversation_store import get_conversation_store
+from src.services.package_events import PackageEventConsumer, create_event_broker
+from src.services.tools_service import ToolsService
+from src.tools.package_lookup import PackageLookupTool, get_tool_bridge
+from src.utils.metrics import stats_collector
+from src.utils.rate_limit import AdmissionController, AdmissionRejected
+
+logger = logging.getLogger(__name__)
+
+
+class AgentRegistry:
+    """
+    Owns the single PackageAssistantAgent and PackageLookupTool of the process.
+
+    The agent is built once at startup and warmed in the background;
+    readiness is reported only after warm-up has finished. Services are
+    created on first use and share the registry's agent and tool.
+    """
+
+    def __init__(self):
+        self.package_tool: Optional[PackageLookupTool] = None
+        self.agent: Optional[PackageAssistantAgent] = None
+        # Model to build the agent with instead of the configured Gemini model (e.g. a benchmark fake)
+        self.model: Optional[Any] = None
+        self._chat_service: Optional[ChatService] = None
+        self._agent_service: Optional[AgentService] = None
+        self._tools_service: Optional[ToolsService] = None
+        self._admission: Optional[AdmissionController] = None
+        self.event_consumer: Optional[PackageEventConsumer] = None
+        self._warmup_task: Optional[asyncio.Task] = None
+        self._warmup: Dict[str, Any] = {"state": "pending"}
+
+    def startup(self) -> None:
+        """Build the shared tool and agent, start consuming package events if enabled and warm the agent"""
+        if self.agent is None:
+            self.package_tool = PackageLookupTool()
+            self.agent = PackageAssistantAgent(package_tool=self.package_tool, model=self.model)
+            self._register_stats()
+        if settings.package_events_enabled and self.event_consumer is None:
+            self.event_consumer = PackageEventConsumer(
+                self.package_tool,
+                create_event_broker(),
+                batch_size=settings.package_events_batch_size,
+                batch_interval=settings.package_events_batch_interval,
+                reconnect_initial=settings.package_events_reconnect_initial,
+                reconnect_max=settings.package_events_reconnect_max
+            )
+            self.event_consumer.start()
+            stats_collector.register("package_events", self.event_consumer.get_stats)
+        if self._warmup_task is None:
+            self._warmup_task = asyncio.create_task(self._warm_up())
+
+    def _register_stats(self) -> None:
+        """Expose component counters (cache ratios, in-flight, queue depths) on /metrics"""
+        tool, agent = self.package_tool, self.agent
+        stats_collector.register("lookup_cache", tool.cache.get_stats)
+        stats_collector.register("lookup_singleflight", tool.singleflight.get_stats)
+        stats_collector.register(
+            "circuit", lambda: {endpoint: b.get_stats() for endpoint, b in tool.breakers.items()}, label="endpoint"
+        )
+        stats_collector.register("retry_budget", tool.retry_budget.get_stats)
+        stats_collector.register("tool_bridge", get_tool_bridge().get_stats)
+        stats_collector.register("generation", agent.generation_pool.get_stats)
+        stats_collector.register("model_router", agent.model_router.get_stats, label="route")
+        stats_collector.register("response_cache", agent.response_cache.get_stats)
+        stats_collector.register("conversation_store", get_conversation_store().get_stats)
+        stats_collector.register("admission", self.get_admission_controller().get_stats)
+
+    async def shutdown(self) -> None:
+        if self.event_consumer is not None:
+            await self.event_consumer.stop()
+            self.event_consumer = None
+        if self._warmup_task is not None and not self._warmup_task.done():
+            self._warmup_task.cancel()
+            try:
+                await self._warmup_task
+            except asyncio.CancelledError:
+                pass
+
+    async def _warm_up(self) -> None:
+        if not settings.agent_warmup_enabled:
+            self._warmup = {"state": "skipped"}
+            return
+
+        started = time.perf_counter()
+        self._warmup = {"state": "running"}
+        try:
+            await self.agent.warm_up(timeout=settings.agent_warmup_timeout)
+            self._warmup = {"state": "done"}
+        except Exception as e:
+            # The agent still works without a warm channel; the first call just pays the setup
+            logger.warning(f"Agent warm-up probe failed: {str(e)}")
+            self._warmup = {"state": "failed", "error": str(e)}
+        self._warmup["duration_ms"] = round((time.perf_counter() - started) * 1000, 1)
+        logger.info(f"Agent warm-up {self._warmup['state']} in {self._warmup['duration_ms']}ms")
+
+    @property
+    def ready(self) -> bool:
+        return self.agent is not None and self._warmup["state"] in ("done", "failed", "skipped")
+
+    def get_warmup_status(self) -> Dict[str, Any]:
+        return dict(self._warmup)
+
+    def get_agent(self) -> PackageAssistantAgent:
+        if self.agent is None:
+            raise RuntimeError("Agent registry has not been started")
+        return self.agent
+
+    def get_package_tool(self) -> PackageLookupTool:
+        if self.package_tool is None:
+            self.package_tool = PackageLookupTool()
+        return self.package_tool
+
+    def get_admission_controller(self) -> AdmissionController:
+        if self._admission is None:
+            self._admission = AdmissionController(
+                global_rate=settings.admission_global_rate,
+                global_burst=settings.admission_global_burst,
+                user_rate=settings.admission_user_rate,
+                user_burst=settings.admission_user_burst,
+                client_rate=settings.admission_client_rate,
+                client_burst=settings.admission_client_burst,
+                max_queue=settings.admission_max_queue,
+                max_wait=settings.admission_max_wait,
+                max_users=settings.admission_max_tracked_users
+            )
+        return self._admission
+
+    def get_chat_service(self) -> ChatService:
+        if self._chat_service is None:
+            self._chat_service = ChatService(agent=self.get_agent())
+        return self._chat_service
+
+    def get_agent_service(self) -> AgentService:
+        if self._agent_service is None:
+            self._agent_service = AgentService(agent=self.get_agent())
+        return self._agent_service
+
+    def get_tools_service(self) -> ToolsService:
+        if self._tools_service is None:
+            self._tools_service = ToolsService(package_tool=self.get_package_tool())
+        return self._tools_service
+
+
+registry = AgentRegistry()
+
+
+def get_registry() -> AgentRegistry:
+    return registry
+
+
+def get_chat_service() -> ChatService:
+    return registry.get_chat_service()
+
+
+def get_agent_service() -> AgentService:
+    return registry.get_agent_service()
+
+
+def get_tools_service() -> ToolsService:
+    return registry.get_tools_service()
+
+
+async def admit_chat(user_id: Optional[str], http_request: Optional[Request] = None) -> None:
+    """
+    Admission control for chat endpoints; waits briefly or sheds the request.
+
+    The client address of http_request limits anonymous callers and callers
+    rotating user IDs. It is the proxy's address when the service runs
+    behind one, unless the proxy is listed in FORWARDED_ALLOW_IPS so that
+    uvicorn takes the address from X-Forwarded-For.
+
+    Raises:
+        HTTPException: 429 with Retry-After when the request is shed
+    """
+    if not settings.admission_enabled:
+        return
+    try:
+        client = http_request.client.host if http_request is not None and http_request.client else None
+        await registry.get_admission_controller().admit(user_id, client)
+    except AdmissionRejected as e:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=str(e),
+            headers={"Retry-After": e.retry_after_header}
+        )
@@ -28,6 +28,15 @@ class ChatResponse(BaseModel):
     metadata: Dict[str, Any] = {}
     error: Optional[str] = None
 
+class ChatSessionRequest(BaseModel):
+    user_id: str
+    auth_token: str
+
+class ChatSessionResponse(BaseModel):
+    success: bool
+    prefetch: str
+    message: Optional[str] = None
+
 class AgentStatusResponse(BaseModel):
     status: str
     agent_name: str
@@ -36,7 +45,7 @@ class AgentStatusResponse(BaseModel):
 
 class Conversation(BaseModel):
     id: str
-    user_id: str
+    user_id: Optional[str] = None
     messages: List[ChatMessage] = []
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: datetime = Field(default_factory=datetime.utcnow)
@@ -52,6 +61,27 @@ class PackageInfo(BaseModel):
     created_at: datetime
     updated_at: datetime
 
+class BulkTrackRequest(BaseModel):
+    tracking_numbers: List[str]
+    stream: bool = False
+
+class BulkFindRequest(BaseModel):
+    package_ids: List[str]
+    auth_token: Optional[str] = None
+    stream: bool = False
+
+class BulkLookupItem(BaseModel):
+    index: int
+    id: str
+    result: Dict[str, Any]
+
+class BulkLookupResponse(BaseModel):
+    success: bool
+    count: int
+    succeeded: int
+    failed: int
+    results: List[BulkLookupItem] = []
+
 class ToolExecutionRequest(BaseModel):
     tool_name: str
     parameters: Dict[str, Any]
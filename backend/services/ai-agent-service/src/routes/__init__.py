@@ -6,5 +6,6 @@ from .health import router as health_router
 from .chat import router as chat_router
 from .agent import router as agent_router
 from .tools import router as tools_router
+from .metrics import router as metrics_router
 
-__all__ = ["health_router", "chat_router", "agent_router", "tools_router"]
\ No newline at end of file
+__all__ = ["health_router", "chat_router", "agent_router", "tools_router", "metrics_router"]
\ No newline at end of file
@@ -2,18 +2,16 @@
 Agent status and information routes
 """
 
-from fastapi import APIRouter, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status
 from src.models.schemas import AgentStatusResponse
+from src.dependencies import get_agent_service
 from src.services.agent_service import AgentService
 
 router = APIRouter(prefix="/agent", tags=["agent"])
 
-# Service instance
-agent_service = AgentService()
-
 
 @router.get("/status", response_model=AgentStatusResponse)
-async def get_agent_status():
+async def get_agent_status(agent_service: AgentService = Depends(get_agent_service)):
     """Get the current status and capabilities of the AI agent"""
     try:
         return await agent_service.get_agent_status()
@@ -25,7 +23,7 @@ async def get_agent_status():
 
 
 @router.get("/capabilities")
-async def get_agent_capabilities():
+async def get_agent_capabilities(agent_service: AgentService = Depends(get_agent_service)):
     """Get agent capabilities"""
     try:
         return await agent_service.get_agent_capabilities()
@@ -33,4 +31,22 @@ async def get_agent_capabilities():
         raise HTTPException(
             status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
             detail=f"AI Agent not available: {str(e)}"
-        )
\ No newline at end of file
+        )
+
+
+@router.get("/generation")
+async def get_generation_stats(agent_service: AgentService = Depends(get_agent_service)):
+    """Get concurrency and queueing statistics for LLM generations"""
+    return agent_service.get_generation_stats()
+
+
+@router.get("/response-cache")
+async def get_response_cache_stats(agent_service: AgentService = Depends(get_agent_service)):
+    """Get statistics for the general-question answer cache"""
+    try:
+        return agent_service.get_response_cache_stats()
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=f"AI Agent not available: {str(e)}"
+        )
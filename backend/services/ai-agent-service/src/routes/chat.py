@@ -2,18 +2,19 @@
 Chat conversation routes
 """
 
-from fastapi import APIRouter
-from src.models.schemas import ChatRequest, ChatResponse
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from fastapi.responses import StreamingResponse
+from src.models.schemas import ChatRequest, ChatResponse, ChatSessionRequest, ChatSessionResponse
+from src.dependencies import admit_chat, get_chat_service
 from src.services.chat_service import ChatService
+from src.utils.timing import start_timer
 
 router = APIRouter(prefix="/chat", tags=["chat"])
 
-# Service instance
-chat_service = ChatService()
-
 
 @router.post("/", response_model=ChatResponse)
-async def chat_with_agent(request: ChatRequest):
+async def chat_with_agent(request: ChatRequest, response: Response, http_request: Request,
+                          chat_service: ChatService = Depends(get_chat_service)):
     """
     Main chat endpoint for interacting with the AI agent.
 
@@ -22,11 +23,74 @@ async def chat_with_agent(request: ChatRequest):
     - Tracking packages by tracking number
     - Viewing user packages
     - Answering package-related questions
+
+    A Server-Timing header reports how long each phase of the request took.
+    Requests over the per-user or global rate limit wait briefly for
+    admission or are rejected with 429 and Retry-After.
+    """
+    timer = start_timer()
+    with timer.phase("admission"):
+        await admit_chat(request.user_id, http_request)
+    result = await chat_service.process_chat_message(request)
+    response.headers["Server-Timing"] = timer.server_timing()
+    return result
+
+
+@router.post("/stream")
+async def stream_chat_with_agent(request: ChatRequest, http_request: Request,
+                                 chat_service: ChatService = Depends(get_chat_service)):
+    """
+    Streaming chat endpoint using Server-Sent Events.
+
+    Emits tool progress events first, then text chunks as Gemini produces
+    them, then a final "done" event carrying tools_used and metadata.
+    Headers are sent before any phase runs, so phase timings are only
+    available in the "done" metadata (when enabled).
     """
-    return await chat_service.process_chat_message(request)
+    timer = start_timer()
+    with timer.phase("admission"):
+        await admit_chat(request.user_id, http_request)
+    return StreamingResponse(
+        chat_service.stream_chat_message(request),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@router.post("/session", response_model=ChatSessionResponse, status_code=status.HTTP_202_ACCEPTED)
+async def open_chat_session(request: ChatSessionRequest, http_request: Request,
+                            chat_service: ChatService = Depends(get_chat_service)):
+    """
+    Warm-up call for when a signed-in user opens the chat widget.
+
+    Returns immediately and prefetches the user's package list and the
+    tracking data of their active packages in the background, so the
+    first question about them is answered from cache. Goes through the
+    same admission control as chat messages, since each call fans out
+    into gateway lookups.
+    """
+    await admit_chat(request.user_id, http_request)
+    return chat_service.open_session(request)
 
 
 @router.post("/reset")
-async def reset_conversation(conversation_id: str = None):
-    """Reset a conversation or all conversations"""
-    return await chat_service.reset_conversation(conversation_id)
\ No newline at end of file
+async def reset_conversation(user_id: str, conversation_id: str = None,
+                             chat_service: ChatService = Depends(get_chat_service)):
+    """
+    Delete one of the caller's conversations, or all of them.
+
+    Only conversations owned by user_id are deleted; naming another user's
+    conversation is rejected with 403.
+    """
+    if not user_id:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Provide the user_id whose conversations to reset"
+        )
+    try:
+        return await chat_service.reset_conversation(conversation_id, user_id)
+    except PermissionError:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Conversation belongs to another user"
+        )
\ No newline at end of file
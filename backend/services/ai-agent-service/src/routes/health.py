@@ -2,8 +2,10 @@
 Health check routes
 """
 
-from fastapi import APIRouter
-from typing import Dict
+from fastapi import APIRouter, Depends
+from fastapi.responses import JSONResponse
+from typing import Any, Dict
+from src.dependencies import AgentRegistry, get_registry
 
 router = APIRouter(prefix="/health", tags=["health"])
 
@@ -15,9 +17,14 @@ async def health_check() -> Dict[str, str]:
 
 
 @router.get("/ready")
-async def readiness_check() -> Dict[str, str]:
-    """Readiness check endpoint"""
-    return {"status": "ready", "service": "ai-agent-service"}
+async def readiness_check(registry: AgentRegistry = Depends(get_registry)) -> Dict[str, Any]:
+    """Readiness check endpoint; 503 until the shared agent has been built and warmed"""
+    if not registry.ready:
+        return JSONResponse(
+            status_code=503,
+            content={"status": "warming_up", "service": "ai-agent-service", "warmup": registry.get_warmup_status()}
+        )
+    return {"status": "ready", "service": "ai-agent-service", "warmup": registry.get_warmup_status()}
 
 
 @router.get("/live")
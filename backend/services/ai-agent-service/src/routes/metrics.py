@@ -0,0 +1,14 @@
+"""
+Prometheus metrics route
+"""
+
+from fastapi import APIRouter, Response
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
+
+router = APIRouter(tags=["metrics"])
+
+
+@router.get("/metrics")
+async def metrics() -> Response:
+    """Prometheus text exposition of latency histograms and component statistics"""
+    return Response(content=generate_latest(), media_type=CONTENT_TYPE_LATEST)
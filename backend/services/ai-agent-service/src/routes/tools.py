@@ -2,18 +2,20 @@
 Direct tool access routes
 """
 
-from fastapi import APIRouter, HTTPException, status
-from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
+from typing import Optional, List
+from src.config import settings
+from src.models.schemas import BulkFindRequest, BulkTrackRequest, BulkLookupResponse
+from src.dependencies import get_tools_service
 from src.services.tools_service import ToolsService
 
 router = APIRouter(prefix="/tools", tags=["tools"])
 
-# Service instance
-tools_service = ToolsService()
-
 
 @router.post("/find-package")
-async def find_package_endpoint(package_id: str, auth_token: Optional[str] = None):
+async def find_package_endpoint(package_id: str, auth_token: Optional[str] = None,
+                                tools_service: ToolsService = Depends(get_tools_service)):
     """Direct endpoint for finding a package by ID"""
     try:
         result = await tools_service.find_package(package_id, auth_token)
@@ -26,7 +28,7 @@ async def find_package_endpoint(package_id: str, auth_token: Optional[str] = Non
 
 
 @router.post("/track-package")
-async def track_package_endpoint(tracking_number: str):
+async def track_package_endpoint(tracking_number: str, tools_service: ToolsService = Depends(get_tools_service)):
     """Direct endpoint for tracking a package by tracking number"""
     try:
         result = await tools_service.track_package(tracking_number)
@@ -38,11 +40,66 @@ async def track_package_endpoint(tracking_number: str):
         )
 
 
+@router.post("/find-packages", response_model=BulkLookupResponse)
+async def find_packages_endpoint(request: BulkFindRequest, tools_service: ToolsService = Depends(get_tools_service)):
+    """
+    Find many packages by ID in one request.
+
+    Returns per-item results (including failures) in request order, or
+    NDJSON lines in completion order when stream is true.
+    """
+    _check_bulk_size(request.package_ids)
+    if request.stream:
+        return StreamingResponse(
+            tools_service.stream_find_packages(request.package_ids, request.auth_token),
+            media_type="application/x-ndjson"
+        )
+    return await tools_service.find_packages(request.package_ids, request.auth_token)
+
+
+@router.post("/track-packages", response_model=BulkLookupResponse)
+async def track_packages_endpoint(request: BulkTrackRequest, tools_service: ToolsService = Depends(get_tools_service)):
+    """
+    Track many packages by tracking number in one request.
+
+    Returns per-item results (including failures) in request order, or
+    NDJSON lines in completion order when stream is true.
+    """
+    _check_bulk_size(request.tracking_numbers)
+    if request.stream:
+        return StreamingResponse(
+            tools_service.stream_track_packages(request.tracking_numbers),
+            media_type="application/x-ndjson"
+        )
+    return await tools_service.track_packages(request.tracking_numbers)
+
+
+def _check_bulk_size(ids: List[str]) -> None:
+    if not ids:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="At least one ID is required"
+        )
+    if len(ids) > settings.bulk_lookup_max_items:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {settings.bulk_lookup_max_items} IDs can be looked up per request"
+        )
+
+
 @router.post("/user-packages")
-async def get_user_packages_endpoint(user_id: str, auth_token: str):
-    """Direct endpoint for getting user's packages"""
+async def get_user_packages_endpoint(user_id: str, auth_token: str, limit: Optional[int] = None,
+                                     cursor: Optional[str] = None,
+                                     package_status: Optional[str] = Query(None, alias="status"),
+                                     created_after: Optional[str] = None, created_before: Optional[str] = None,
+                                     summary: bool = False,
+                                     tools_service: ToolsService = Depends(get_tools_service)):
+    """Direct endpoint for getting user's packages, paginated via limit/cursor or summarized"""
     try:
-        result = await tools_service.get_user_packages(user_id, auth_token)
+        result = await tools_service.get_user_packages(
+            user_id, auth_token, limit=limit, cursor=cursor, status=package_status,
+            created_after=created_after, created_before=created_before, summary=summary
+        )
         return result
     except Exception as e:
         raise HTTPException(
@@ -51,7 +108,41 @@ async def get_user_packages_endpoint(user_id: str, auth_token: str):
         )
 
 
+@router.get("/cache")
+async def get_cache_stats(tools_service: ToolsService = Depends(get_tools_service)):
+    """Get lookup cache statistics"""
+    return tools_service.get_cache_stats()
+
+
+@router.get("/stats")
+async def get_lookup_stats(tools_service: ToolsService = Depends(get_tools_service)):
+    """Get lookup cache statistics and per-path package lookup timings"""
+    return tools_service.get_lookup_stats()
+
+
+@router.get("/circuits")
+async def get_circuit_stats(tools_service: ToolsService = Depends(get_tools_service)):
+    """Get upstream circuit breaker states and retry budget usage"""
+    return tools_service.get_circuit_stats()
+
+
+@router.post("/cache/invalidate")
+async def invalidate_cache(
+    package_id: Optional[str] = None,
+    tracking_number: Optional[str] = None,
+    user_id: Optional[str] = None,
+    tools_service: ToolsService = Depends(get_tools_service)
+):
+    """Invalidate cached lookups for a package, tracking number and/or user"""
+    if not any([package_id, tracking_number, user_id]):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Provide at least one of package_id, tracking_number or user_id"
+        )
+    return tools_service.invalidate_cache(package_id, tracking_number, user_id)
+
+
 @router.get("/available")
-async def get_available_tools():
+async def get_available_tools(tools_service: ToolsService = Depends(get_tools_service)):
     """Get list of available tools"""
     return tools_service.get_available_tools()
\ No newline at end of file
@@ -3,8 +3,9 @@ Agent service for managing AI agent operations
 """
 
 import logging
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 from src.agents.package_assistant import PackageAssistantAgent
+from src.agents.generation_pool import get_generation_pool
 from src.models.schemas import AgentStatusResponse
 
 logger = logging.getLogger(__name__)
@@ -13,11 +14,11 @@ logger = logging.getLogger(__name__)
 class AgentService:
     """Service for managing AI agents"""
 
-    def __init__(self):
-        self._agent_instance: PackageAssistantAgent = None
+    def __init__(self, agent: Optional[PackageAssistantAgent] = None):
+        self._agent_instance = agent
 
     def get_agent(self) -> PackageAssistantAgent:
-        """Get the global agent instance (singleton pattern)"""
+        """Get the injected agent, building a private one only when none was provided"""
         if self._agent_instance is None:
             self._agent_instance = PackageAssistantAgent()
         return self._agent_instance
@@ -48,6 +49,14 @@ class AgentService:
             logger.error(f"Error getting agent capabilities: {str(e)}")
             raise e
 
+    def get_generation_stats(self) -> Dict[str, Any]:
+        """Get in-flight, queue-depth and wait-time statistics for LLM generations"""
+        return get_generation_pool().get_stats()
+
+    def get_response_cache_stats(self) -> Dict[str, Any]:
+        """Get hit/miss counters for the general-question answer cache"""
+        return self.get_agent().response_cache.get_stats()
+
     def health_check(self) -> bool:
         """Check if the agent service is healthy"""
         try:
@@ -2,10 +2,19 @@
 Chat service for handling AI conversations
 """
 
+import asyncio
+import json
 import logging
-from typing import Dict, Any
+import uuid
+from contextlib import nullcontext
+from typing import Dict, Any, AsyncIterator, ContextManager, List, Optional, Tuple
 from src.agents.package_assistant import PackageAssistantAgent
-from src.models.schemas import ChatRequest, ChatResponse
+from src.config import settings
+from src.models.schemas import (
+    ChatRequest, ChatResponse, ChatMessage, ChatSessionRequest, ChatSessionResponse, MessageRole
+)
+from src.services.conversation_store import ConversationStore, get_conversation_store
+from src.utils.timing import current_timer
 
 logger = logging.getLogger(__name__)
 
@@ -13,11 +22,21 @@ logger = logging.getLogger(__name__)
 class ChatService:
     """Service for handling AI chat conversations"""
 
-    def __init__(self):
-        self._agent_instance: PackageAssistantAgent = None
+    def __init__(self, agent: Optional[PackageAssistantAgent] = None,
+                 conversation_store: Optional[ConversationStore] = None):
+        self._agent_instance = agent
+        self._conversation_store = conversation_store
+        # In-flight session prefetches by user, so repeated opens do not pile up
+        self._prefetches: Dict[str, asyncio.Task] = {}
+
+    @property
+    def conversation_store(self) -> ConversationStore:
+        if self._conversation_store is None:
+            self._conversation_store = get_conversation_store()
+        return self._conversation_store
 
     def get_agent(self) -> PackageAssistantAgent:
-        """Get the global agent instance (singleton pattern)"""
+        """Get the injected agent, building a private one only when none was provided"""
         if self._agent_instance is None:
             self._agent_instance = PackageAssistantAgent()
         return self._agent_instance
@@ -35,12 +54,9 @@ class ChatService:
         try:
             agent = self.get_agent()
 
-            # Prepare user context
-            user_context = {
-                "user_id": request.user_id,
-                "auth_token": request.auth_token,
-                "conversation_id": request.conversation_id
-            }
+            # Prepare user context, including recent turns of this conversation
+            conversation_id, history = await self._load_conversation(request)
+            user_context = self._build_user_context(request, conversation_id, history)
 
             # Get response from the agent
             result = await agent.handle_message(
@@ -49,10 +65,11 @@ class ChatService:
             )
 
             if result["success"]:
+                await self._record_turn(request, conversation_id, result["response"], result.get("tools_used", []))
                 return ChatResponse(
                     success=True,
                     response=result["response"],
-                    conversation_id=request.conversation_id,
+                    conversation_id=conversation_id,
                     tools_used=result.get("tools_used", []),
                     metadata=result.get("metadata", {})
                 )
@@ -60,6 +77,7 @@ class ChatService:
                 return ChatResponse(
                     success=False,
                     response=result["response"],
+                    conversation_id=conversation_id,
                     error=result.get("error")
                 )
 
@@ -71,14 +89,138 @@ class ChatService:
                 error=str(e)
             )
 
-    async def reset_conversation(self, conversation_id: str = None) -> Dict[str, str]:
-        """Reset a conversation or all conversations"""
+    async def stream_chat_message(self, request: ChatRequest) -> AsyncIterator[str]:
+        """
+        Process a chat message and stream the AI response as Server-Sent Events.
+
+        Args:
+            request: ChatRequest containing the user message and context
+
+        Yields:
+            SSE frames: tool progress first, then text chunks, then a final "done" frame
+        """
+        conversation_id, history = await self._load_conversation(request)
+
+        # Flush an initial frame straight away so clients get the first byte immediately
+        yield self._format_sse("start", {"conversation_id": conversation_id})
+
+        try:
+            agent = self.get_agent()
+            user_context = self._build_user_context(request, conversation_id, history)
+
+            chunks = []
+            async for event in agent.stream_message(message=request.message, user_context=user_context):
+                data = event["data"]
+                if event["event"] == "chunk":
+                    chunks.append(data["text"])
+                elif event["event"] == "done":
+                    await self._record_turn(request, conversation_id, "".join(chunks), data.get("tools_used", []))
+                    data = {**data, "conversation_id": conversation_id}
+                yield self._format_sse(event["event"], data)
+
+        except Exception as e:
+            logger.error(f"Error streaming chat message: {str(e)}")
+            yield self._format_sse("error", {
+                "success": False,
+                "response": "I'm sorry, I encountered an error while processing your request. Please try again.",
+                "error": str(e)
+            })
+
+    def open_session(self, request: ChatSessionRequest) -> ChatSessionResponse:
+        """
+        Start prefetching a signed-in user's packages in the background.
+
+        The first question of a chat is almost always about the user's own
+        packages, so their list, summary and the tracking documents of
+        packages still on their way are cached before it arrives.
+        """
+        if not settings.session_prefetch_enabled:
+            return ChatSessionResponse(success=True, prefetch="disabled")
+        if request.user_id in self._prefetches:
+            return ChatSessionResponse(success=True, prefetch="in_progress")
+
+        task = asyncio.create_task(self._prefetch(request.user_id, request.auth_token))
+        self._prefetches[request.user_id] = task
+        task.add_done_callback(lambda _: self._prefetches.pop(request.user_id, None))
+        return ChatSessionResponse(success=True, prefetch="scheduled")
+
+    async def _prefetch(self, user_id: str, auth_token: str) -> None:
+        try:
+            result = await self.get_agent().package_tool.prefetch_user(
+                user_id,
+                auth_token,
+                max_packages=settings.session_prefetch_max_packages,
+                concurrency=settings.bulk_lookup_concurrency
+            )
+            if not result["success"]:
+                logger.info(f"Session prefetch for user {user_id} skipped: {result.get('message')}")
+        except Exception as e:
+            logger.warning(f"Session prefetch for user {user_id} failed: {str(e)}")
+
+    async def _load_conversation(self, request: ChatRequest) -> Tuple[str, List[ChatMessage]]:
+        """Resolve the conversation ID for a request and load its recent history"""
+        if request.conversation_id:
+            try:
+                with self._phase("history_load"):
+                    history = await self.conversation_store.get_history(request.conversation_id, request.user_id)
+                return request.conversation_id, history
+            except PermissionError:
+                logger.warning(f"Conversation {request.conversation_id} requested by another user; starting a new one")
+        return uuid.uuid4().hex, []
+
+    @staticmethod
+    def _build_user_context(request: ChatRequest, conversation_id: str,
+                            history: List[ChatMessage]) -> Dict[str, Any]:
+        """Build the agent user context from a chat request"""
+        return {
+            "user_id": request.user_id,
+            "auth_token": request.auth_token,
+            "conversation_id": conversation_id,
+            "history": history
+        }
+
+    async def _record_turn(self, request: ChatRequest, conversation_id: str, response: str,
+                           tools_used: List[str]) -> None:
+        """Append the user message and assistant reply to the conversation"""
         try:
-            # In a real implementation, this would clear conversation history from storage
+            with self._phase("history_save"):
+                await self.conversation_store.append(conversation_id, request.user_id, [
+                    ChatMessage(role=MessageRole.USER, content=request.message),
+                    ChatMessage(role=MessageRole.ASSISTANT, content=response, metadata={"tools_used": tools_used})
+                ])
+        except Exception as e:
+            logger.error(f"Error saving conversation {conversation_id}: {str(e)}")
+
+    @staticmethod
+    def _phase(name: str) -> ContextManager[None]:
+        """Time a phase on the current request's timer, if one was started"""
+        timer = current_timer()
+        return timer.phase(name) if timer is not None else nullcontext()
+
+    @staticmethod
+    def _format_sse(event: str, data: Dict[str, Any]) -> str:
+        """Format a single Server-Sent Events frame"""
+        return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+    async def reset_conversation(self, conversation_id: str = None, user_id: str = None) -> Dict[str, Any]:
+        """
+        Delete one of a user's conversations, or all of them.
+
+        Raises:
+            PermissionError: if conversation_id belongs to a different user
+        """
+        try:
+            if conversation_id:
+                deleted = await self.conversation_store.delete(conversation_id, user_id)
+            else:
+                deleted = await self.conversation_store.delete_user(user_id)
             return {
                 "message": f"Conversation {'with ID ' + conversation_id if conversation_id else 'history'} reset successfully",
-                "conversation_id": conversation_id
+                "conversation_id": conversation_id,
+                "deleted": deleted
             }
+        except PermissionError:
+            raise
         except Exception as e:
             logger.error(f"Error resetting conversation: {str(e)}")
-            raise e
\ No newline at end of file
+            raise e
@@ -0,0 +1,381 @@
+"""
+Conversation history storage with an in-memory hot tier and write-behind persistence
+"""
+
+import asyncio
+import logging
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+from src.config import settings
+from src.models.schemas import ChatMessage, Conversation
+
+logger = logging.getLogger(__name__)
+
+
+class ConversationBackend(ABC):
+    """Abstract persistence layer for conversations"""
+
+    @abstractmethod
+    async def load(self, conversation_id: str) -> Optional[Conversation]:
+        """Load a conversation, or None if it does not exist"""
+        pass
+
+    @abstractmethod
+    async def append_batch(self, batch: Dict[str, Tuple[Optional[str], List[ChatMessage]]], max_messages: int) -> None:
+        """Append messages to many conversations, keeping only the newest max_messages of each"""
+        pass
+
+    @abstractmethod
+    async def delete(self, conversation_id: str) -> int:
+        """Delete a conversation; returns the number deleted"""
+        pass
+
+    @abstractmethod
+    async def delete_user(self, user_id: str) -> List[str]:
+        """Delete every conversation belonging to a user; returns the deleted conversation IDs"""
+        pass
+
+    async def close(self) -> None:
+        """Release any connections held by the backend"""
+        pass
+
+
+class InMemoryConversationBackend(ConversationBackend):
+    """Process-local backend for tests and local development without MongoDB"""
+
+    def __init__(self):
+        self.conversations: Dict[str, Conversation] = {}
+
+    async def load(self, conversation_id: str) -> Optional[Conversation]:
+        conversation = self.conversations.get(conversation_id)
+        return conversation.model_copy(deep=True) if conversation else None
+
+    async def append_batch(self, batch: Dict[str, Tuple[Optional[str], List[ChatMessage]]], max_messages: int) -> None:
+        now = datetime.utcnow()
+        for conversation_id, (user_id, messages) in batch.items():
+            conversation = self.conversations.get(conversation_id)
+            if conversation is None:
+                conversation = Conversation(id=conversation_id, user_id=user_id, created_at=now)
+                self.conversations[conversation_id] = conversation
+            conversation.messages = (conversation.messages + messages)[-max_messages:]
+            conversation.updated_at = now
+
+    async def delete(self, conversation_id: str) -> int:
+        return int(self.conversations.pop(conversation_id, None) is not None)
+
+    async def delete_user(self, user_id: str) -> List[str]:
+        ids = [cid for cid, conversation in self.conversations.items() if conversation.user_id == user_id]
+        for conversation_id in ids:
+            del self.conversations[conversation_id]
+        return ids
+
+
+class MongoConversationBackend(ConversationBackend):
+    """MongoDB backend using the async Motor driver"""
+
+    def __init__(self, uri: str, collection: str = "ai_conversations", timeout_ms: int = 2000):
+        # Imported here so the in-memory backend works without the driver installed
+        from motor.motor_asyncio import AsyncIOMotorClient
+        from pymongo import UpdateOne
+
+        self._update_one = UpdateOne
+        # Fail fast so an unavailable database degrades chats to stateless instead of stalling them
+        self._client = AsyncIOMotorClient(
+            uri,
+            serverSelectionTimeoutMS=timeout_ms,
+            connectTimeoutMS=timeout_ms,
+            socketTimeoutMS=timeout_ms * 5
+        )
+        database = self._client.get_default_database("packaroo")
+        self._collection = database[collection]
+        self._indexed = False
+
+    async def _ensure_indexes(self) -> None:
+        if not self._indexed:
+            await self._collection.create_index("user_id")
+            self._indexed = True
+
+    async def load(self, conversation_id: str) -> Optional[Conversation]:
+        document = await self._collection.find_one({"_id": conversation_id})
+        if document is None:
+            return None
+        return Conversation(id=document.pop("_id"), **document)
+
+    async def append_batch(self, batch: Dict[str, Tuple[Optional[str], List[ChatMessage]]], max_messages: int) -> None:
+        await self._ensure_indexes()
+        now = datetime.utcnow()
+        operations = [
+            self._update_one(
+                {"_id": conversation_id},
+                {
+                    "$push": {
+                        "messages": {
+                            "$each": [{**m.model_dump(), "role": m.role.value} for m in messages],
+                            "$slice": -max_messages
+                        }
+                    },
+                    "$set": {"updated_at": now},
+                    "$setOnInsert": {"user_id": user_id, "created_at": now}
+                },
+                upsert=True
+            )
+            for conversation_id, (user_id, messages) in batch.items()
+        ]
+        if operations:
+            await self._collection.bulk_write(operations, ordered=False)
+
+    async def delete(self, conversation_id: str) -> int:
+        result = await self._collection.delete_one({"_id": conversation_id})
+        return result.deleted_count
+
+    async def delete_user(self, user_id: str) -> List[str]:
+        ids = await self._collection.distinct("_id", {"user_id": user_id})
+        if ids:
+            await self._collection.delete_many({"_id": {"$in": ids}, "user_id": user_id})
+        return ids
+
+    async def close(self) -> None:
+        self._client.close()
+
+
+class ConversationStore:
+    """
+    Bounded conversation history with an LRU hot tier and write-behind batching.
+
+    Reads are served from memory for active conversations. Appends update the
+    hot tier immediately and are persisted in batches by a background task,
+    either every flush_interval seconds or as soon as flush_batch_size
+    messages are pending. Each conversation keeps at most max_messages.
+    """
+
+    def __init__(self, backend: ConversationBackend, max_messages: int = 20, hot_max_entries: int = 1000,
+                 flush_interval: float = 1.0, flush_batch_size: int = 100):
+        self.backend = backend
+        self.max_messages = max_messages
+        self.hot_max_entries = hot_max_entries
+        self.flush_interval = flush_interval
+        self.flush_batch_size = flush_batch_size
+        self._hot: "OrderedDict[str, Conversation]" = OrderedDict()
+        self._pending: Dict[str, Tuple[Optional[str], List[ChatMessage]]] = {}
+        self._pending_count = 0
+        self._flush_requested: Optional[asyncio.Event] = None
+        self._flusher: Optional[asyncio.Task] = None
+        # Held while a batch is written or a delete runs, so a flush never recreates a deleted conversation
+        self._flush_lock = asyncio.Lock()
+
+    async def start(self) -> None:
+        """Start the background flusher"""
+        self._flush_requested = asyncio.Event()
+        self._flusher = asyncio.create_task(self._run_flusher())
+
+    async def stop(self) -> None:
+        """Stop the flusher, persist anything pending and close the backend"""
+        if self._flusher is not None:
+            self._flusher.cancel()
+            try:
+                await self._flusher
+            except asyncio.CancelledError:
+                pass
+            self._flusher = None
+        await self.flush()
+        await self.backend.close()
+
+    async def get_history(self, conversation_id: str, user_id: Optional[str] = None) -> List[ChatMessage]:
+        """
+        Return the message window for a conversation.
+
+        Raises:
+            PermissionError: if the conversation belongs to a different user
+        """
+        conversation = self._hot.get(conversation_id)
+        if conversation is not None:
+            self._hot.move_to_end(conversation_id)
+        else:
+            try:
+                conversation = await self._load(conversation_id)
+            except Exception as e:
+                logger.error(f"Error loading conversation {conversation_id}: {str(e)}")
+                return []
+
+            if conversation is None:
+                return []
+
+        if conversation.user_id != user_id:
+            raise PermissionError(f"Conversation {conversation_id} belongs to another user")
+        return list(conversation.messages)
+
+    async def append(self, conversation_id: str, user_id: Optional[str], messages: List[ChatMessage]) -> None:
+        """
+        Append messages to a conversation; persistence happens in the background.
+
+        A conversation missing from the hot tier (new, or evicted since its
+        history was read) is loaded first so the cached copy holds the full
+        window. If loading fails the messages are still queued for the
+        backend but nothing is cached.
+
+        Raises:
+            PermissionError: if the conversation belongs to a different user
+        """
+        conversation = self._hot.get(conversation_id)
+        if conversation is not None:
+            self._hot.move_to_end(conversation_id)
+        else:
+            try:
+                conversation = await self._load(conversation_id)
+                if conversation is None:
+                    conversation = Conversation(id=conversation_id, user_id=user_id)
+                    self._remember(conversation)
+            except Exception as e:
+                logger.error(f"Error loading conversation {conversation_id}: {str(e)}")
+
+        if conversation is not None:
+            if conversation.user_id != user_id:
+                raise PermissionError(f"Conversation {conversation_id} belongs to another user")
+            conversation.messages = (conversation.messages + messages)[-self.max_messages:]
+            conversation.updated_at = datetime.utcnow()
+
+        _, pending = self._pending.setdefault(conversation_id, (user_id, []))
+        pending.extend(messages)
+        self._pending_count += len(messages)
+
+        if self._flusher is None:
+            # No background flusher (e.g. outside the app lifespan): write through
+            await self.flush()
+        elif self._pending_count >= self.flush_batch_size:
+            self._flush_requested.set()
+
+    async def delete(self, conversation_id: str, user_id: Optional[str]) -> int:
+        """
+        Delete a conversation from memory, the pending buffer and the backend.
+
+        Waits for any in-flight flush so it cannot write the conversation back.
+        Returns 1 if the conversation existed (even if it was never flushed), else 0.
+
+        Raises:
+            PermissionError: if the conversation belongs to a different user
+        """
+        async with self._flush_lock:
+            conversation = self._hot.get(conversation_id)
+            pending = self._pending.get(conversation_id)
+            if conversation is not None:
+                owner = conversation.user_id
+            elif pending is not None:
+                owner = pending[0]
+            else:
+                stored = await self.backend.load(conversation_id)
+                if stored is None:
+                    return 0
+                owner = stored.user_id
+            if owner != user_id:
+                raise PermissionError(f"Conversation {conversation_id} belongs to another user")
+
+            self._forget(conversation_id)
+            deleted = await self.backend.delete(conversation_id)
+            return max(deleted, int(conversation is not None or pending is not None))
+
+    async def delete_user(self, user_id: str) -> int:
+        """Delete every conversation belonging to a user; returns the number deleted"""
+        async with self._flush_lock:
+            ids = {cid for cid, c in self._hot.items() if c.user_id == user_id}
+            ids.update(cid for cid, (owner, _) in self._pending.items() if owner == user_id)
+            for conversation_id in ids:
+                self._forget(conversation_id)
+            ids.update(await self.backend.delete_user(user_id))
+            return len(ids)
+
+    def _forget(self, conversation_id: str) -> None:
+        self._hot.pop(conversation_id, None)
+        pending = self._pending.pop(conversation_id, None)
+        if pending:
+            self._pending_count -= len(pending[1])
+
+    async def flush(self) -> None:
+        """Persist all pending appends in one batch"""
+        async with self._flush_lock:
+            if not self._pending:
+                return
+
+            batch, self._pending, self._pending_count = self._pending, {}, 0
+            try:
+                await self.backend.append_batch(batch, self.max_messages)
+            except Exception as e:
+                logger.error(f"Error persisting {len(batch)} conversation(s): {str(e)}")
+                # Put the batch back in front of anything appended meanwhile and retry on the next flush
+                for conversation_id, (owner, messages) in batch.items():
+                    _, newer = self._pending.get(conversation_id, (owner, []))
+                    self._pending[conversation_id] = (owner, (messages + newer)[-self.max_messages:])
+                self._pending_count = sum(len(messages) for _, messages in self._pending.values())
+
+    async def _run_flusher(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._flush_requested.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._flush_requested.clear()
+            await self.flush()
+
+    async def _load(self, conversation_id: str) -> Optional[Conversation]:
+        """
+        Load a conversation from the backend into the hot tier.
+
+        Messages still waiting to be flushed are newer than what the backend
+        returned, so they are appended to the loaded window (or make up the
+        whole conversation if it was never flushed). Backend errors propagate
+        and leave the hot tier untouched.
+        """
+        conversation = await self.backend.load(conversation_id)
+        cached = self._hot.get(conversation_id)
+        if cached is not None:
+            # Another request loaded or created it while the backend was queried
+            self._hot.move_to_end(conversation_id)
+            return cached
+
+        pending = self._pending.get(conversation_id)
+        if conversation is None:
+            if not pending:
+                return None
+            conversation = Conversation(id=conversation_id, user_id=pending[0])
+        if pending:
+            conversation.messages = (conversation.messages + pending[1])[-self.max_messages:]
+        self._remember(conversation)
+        return conversation
+
+    def _remember(self, conversation: Conversation) -> None:
+        self._hot[conversation.id] = conversation
+        self._hot.move_to_end(conversation.id)
+        while len(self._hot) > self.hot_max_entries:
+            self._hot.popitem(last=False)
+
+    def get_stats(self) -> Dict[str, int]:
+        return {
+            "hot_conversations": len(self._hot),
+            "pending_conversations": len(self._pending),
+            "pending_messages": self._pending_count
+        }
+
+
+_store: Optional[ConversationStore] = None
+
+
+def create_conversation_backend() -> ConversationBackend:
+    """Build the configured backend ("mongodb" or "memory")"""
+    if settings.conversation_store_backend == "memory":
+        return InMemoryConversationBackend()
+    return MongoConversationBackend(settings.mongodb_uri, timeout_ms=settings.conversation_store_timeout_ms)
+
+
+def get_conversation_store() -> ConversationStore:
+    """Return the process-wide conversation store"""
+    global _store
+    if _store is None:
+        _store = ConversationStore(
+            backend=create_conversation_backend(),
+            max_messages=settings.conversation_max_messages,
+            hot_max_entries=settings.conversation_cache_size,
+            flush_interval=settings.conversation_flush_interval,
+            flush_batch_size=settings.conversation_flush_batch_size
+        )
+    return _store
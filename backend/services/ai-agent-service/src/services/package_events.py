@@ -0,0 +1,313 @@
+"""
+Package and delivery status events that keep the lookup cache fresh
+"""
+import asyncio
+import json
+import logging
+import random
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+from src.config import settings
+from src.tools.package_lookup import PackageLookupTool
+
+logger = logging.getLogger(__name__)
+
+# Routing keys published on the packaroo.events topic exchange by package-service and delivery-service
+EVENT_BINDINGS = ("package.created", "package.updated", "delivery.updated")
+
+# Package status implied by a delivery status, as applied by package-service's delivery consumer
+DELIVERY_TO_PACKAGE_STATUS = {
+    "in transit": "in transit",
+    "delivered": "delivered",
+    "failed": "cancelled"
+}
+
+
+async def _no_ack() -> None:
+    pass
+
+
+@dataclass
+class EventMessage:
+    routing_key: str
+    body: bytes
+    ack: Callable[[], Awaitable[None]] = _no_ack
+
+
+class EventBroker(ABC):
+    """Source of package status events"""
+
+    @abstractmethod
+    def subscribe(self, bindings: Tuple[str, ...],
+                  on_subscribed: Callable[[], None] = lambda: None) -> AsyncIterator[EventMessage]:
+        """
+        Connect and yield messages matching bindings until the connection is lost.
+
+        on_subscribed is called once the subscription is in place, before the
+        first message. Events published while no subscription exists are not
+        delivered later. Raises (or stops iterating) when disconnected; the
+        consumer reconnects.
+        """
+
+    async def close(self) -> None:
+        """Release any connections held by the broker"""
+
+
+def topic_matches(binding: str, routing_key: str) -> bool:
+    """AMQP topic match: * is exactly one word, # is zero or more"""
+    def match(pattern: List[str], words: List[str]) -> bool:
+        if not pattern:
+            return not words
+        if pattern[0] == "#":
+            return any(match(pattern[1:], words[i:]) for i in range(len(words) + 1))
+        return bool(words) and pattern[0] in ("*", words[0]) and match(pattern[1:], words[1:])
+
+    return match(binding.split("."), routing_key.split("."))
+
+
+class InMemoryEventBroker(EventBroker):
+    """Process-local topic broker for tests and local development without RabbitMQ"""
+
+    def __init__(self):
+        self._subscribers: List[Tuple[Tuple[str, ...], "asyncio.Queue[Optional[EventMessage]]"]] = []
+        self.published = 0
+        self.acked = 0
+
+    async def subscribe(self, bindings: Tuple[str, ...],
+                        on_subscribed: Callable[[], None] = lambda: None) -> AsyncIterator[EventMessage]:
+        queue: "asyncio.Queue[Optional[EventMessage]]" = asyncio.Queue()
+        subscriber = (bindings, queue)
+        self._subscribers.append(subscriber)
+        on_subscribed()
+        try:
+            while True:
+                message = await queue.get()
+                if message is None:
+                    raise ConnectionError("In-memory broker disconnected")
+                yield message
+        finally:
+            self._subscribers.remove(subscriber)
+
+    def publish(self, routing_key: str, payload: Dict[str, Any]) -> None:
+        """Deliver an event to every subscriber bound to its routing key"""
+        self.published += 1
+        body = json.dumps(payload, default=str).encode()
+        for bindings, queue in self._subscribers:
+            if any(topic_matches(binding, routing_key) for binding in bindings):
+                queue.put_nowait(EventMessage(routing_key, body, self._ack))
+
+    def disconnect(self) -> None:
+        """Drop every subscriber's connection and undelivered events, as a broker restart would"""
+        for _, queue in self._subscribers:
+            while not queue.empty():
+                queue.get_nowait()
+            queue.put_nowait(None)
+
+    async def _ack(self) -> None:
+        self.acked += 1
+
+
+class AmqpEventBroker(EventBroker):
+    """
+    RabbitMQ broker using aio-pika, with an exclusive queue per service instance.
+
+    The queue lives only as long as the connection, so events published
+    while disconnected (and any not yet acknowledged) are dropped with it.
+    """
+
+    def __init__(self, uri: str, exchange: str = "packaroo.events", prefetch: int = 200):
+        # Imported here so the in-memory broker works without the client installed
+        import aio_pika
+
+        self._aio_pika = aio_pika
+        self.uri = uri
+        self.exchange = exchange
+        self.prefetch = prefetch
+
+    async def subscribe(self, bindings: Tuple[str, ...],
+                        on_subscribed: Callable[[], None] = lambda: None) -> AsyncIterator[EventMessage]:
+        aio_pika = self._aio_pika
+        connection = await aio_pika.connect(self.uri)
+        try:
+            channel = await connection.channel()
+            await channel.set_qos(prefetch_count=self.prefetch)
+            exchange = await channel.declare_exchange(self.exchange, aio_pika.ExchangeType.TOPIC, durable=True)
+            # Every instance caches independently, so each needs its own copy of every event
+            queue = await channel.declare_queue(exclusive=True, auto_delete=True)
+            for binding in bindings:
+                await queue.bind(exchange, routing_key=binding)
+            logger.info(f"Subscribed to {self.exchange} ({', '.join(bindings)})")
+            on_subscribed()
+
+            async with queue.iterator() as messages:
+                async for message in messages:
+                    yield EventMessage(message.routing_key or "", message.body, message.ack)
+        finally:
+            await connection.close()
+
+
+class PackageEventConsumer:
+    """
+    Applies package and delivery status events to the lookup cache in batches.
+
+    Messages are collected until batch_size arrive or batch_interval seconds
+    pass after the first, then applied in one pass (the latest status per
+    package wins) and acknowledged. A lost connection is retried with
+    jittered exponential backoff from reconnect_initial up to reconnect_max
+    seconds. Events sent while disconnected are lost with the exclusive
+    queue, so every time a subscription is re-established the cached
+    lookups are dropped and refetched on demand; while disconnected they
+    are only bounded by their TTL.
+    """
+
+    def __init__(self, tool: PackageLookupTool, broker: EventBroker, batch_size: int = 100,
+                 batch_interval: float = 0.2, reconnect_initial: float = 1.0, reconnect_max: float = 30.0):
+        self.tool = tool
+        self.broker = broker
+        self.batch_size = batch_size
+        self.batch_interval = batch_interval
+        self.reconnect_initial = reconnect_initial
+        self.reconnect_max = reconnect_max
+        self._task: Optional[asyncio.Task] = None
+        self._received = 0
+        self._malformed = 0
+        self._batches = 0
+        self._updated = 0
+        self._invalidated = 0
+        self._reconnects = 0
+        self._resyncs = 0
+
+    def start(self) -> None:
+        """Start consuming in the background"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop consuming and close the broker"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.broker.close()
+
+    async def _run(self) -> None:
+        failures = 0
+        while True:
+            batches = self._batches_of(self.broker.subscribe(EVENT_BINDINGS, self._resync))
+            try:
+                async for batch in batches:
+                    failures = 0
+                    await self._apply(batch)
+                logger.warning("Package event stream ended")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Package event consumer disconnected: {str(e)}")
+            finally:
+                await batches.aclose()
+            delay = min(self.reconnect_max, self.reconnect_initial * 2 ** failures)
+            failures += 1
+            self._reconnects += 1
+            await asyncio.sleep(random.uniform(delay / 2, delay))
+
+    async def _batches_of(self, messages: AsyncIterator[EventMessage]) -> AsyncIterator[List[EventMessage]]:
+        """Group messages into batches of up to batch_size, waiting at most batch_interval after the first"""
+        loop = asyncio.get_running_loop()
+        pending: Optional["asyncio.Future[EventMessage]"] = None
+        try:
+            while True:
+                if pending is None:
+                    pending = asyncio.ensure_future(messages.__anext__())
+                try:
+                    batch = [await pending]
+                except StopAsyncIteration:
+                    return
+                pending = None
+                deadline = loop.time() + self.batch_interval
+                while len(batch) < self.batch_size:
+                    pending = asyncio.ensure_future(messages.__anext__())
+                    done, _ = await asyncio.wait({pending}, timeout=max(0.0, deadline - loop.time()))
+                    if not done:
+                        break
+                    try:
+                        batch.append(pending.result())
+                    except StopAsyncIteration:
+                        yield batch
+                        return
+                    pending = None
+                yield batch
+        finally:
+            if pending is not None:
+                pending.cancel()
+                await asyncio.gather(pending, return_exceptions=True)
+            await messages.aclose()
+
+    def _resync(self) -> None:
+        """Drop cached lookups that may have missed events while the subscription was down"""
+        if not self._reconnects:
+            return
+        self._invalidated += self.tool.invalidate_all()
+        self._resyncs += 1
+
+    async def _apply(self, batch: List[EventMessage]) -> None:
+        self._received += len(batch)
+        statuses: Dict[str, Optional[str]] = {}
+        owners: Set[str] = set()
+        for message in batch:
+            try:
+                self._collect(message.routing_key, json.loads(message.body), statuses, owners)
+            except (ValueError, TypeError, AttributeError) as e:
+                self._malformed += 1
+                logger.warning(f"Ignoring malformed {message.routing_key} event: {str(e)}")
+
+        result = self.tool.apply_status_events(statuses, owners)
+        self._batches += 1
+        self._updated += result["updated"]
+        self._invalidated += result["invalidated"]
+        for message in batch:
+            await message.ack()
+
+    @staticmethod
+    def _collect(routing_key: str, event: Dict[str, Any], statuses: Dict[str, Optional[str]],
+                 owners: Set[str]) -> None:
+        """Fold one event into the batch's latest status per package (newest last) and changed owners"""
+        if routing_key.startswith("delivery."):
+            status = event.get("status")
+            identifiers = [event.get("packageId")]
+            status = DELIVERY_TO_PACKAGE_STATUS.get(status, "processing") if status else None
+        else:
+            status = event.get("status")
+            identifiers = [event.get("id"), event.get("trackingId")]
+            if event.get("ownerId"):
+                owners.add(str(event["ownerId"]))
+        for identifier in identifiers:
+            if identifier:
+                # Re-insert so the dict stays ordered oldest to newest event
+                statuses.pop(str(identifier), None)
+                statuses[str(identifier)] = status
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "received": self._received,
+            "malformed": self._malformed,
+            "batches": self._batches,
+            "entries_updated": self._updated,
+            "entries_invalidated": self._invalidated,
+            "reconnects": self._reconnects,
+            "resyncs": self._resyncs
+        }
+
+
+def create_event_broker() -> EventBroker:
+    """Build the configured broker ("amqp" or "memory")"""
+    if settings.package_events_broker == "memory":
+        return InMemoryEventBroker()
+    return AmqpEventBroker(
+        settings.rabbitmq_uri,
+        exchange=settings.package_events_exchange,
+        prefetch=settings.package_events_batch_size * 2
+    )
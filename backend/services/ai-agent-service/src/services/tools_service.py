@@ -2,8 +2,12 @@
 Tools service for direct tool access operations
 """
 
+import asyncio
+import json
 import logging
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, AsyncIterator, Awaitable, Callable
+from src.config import settings
+from src.models.schemas import BulkLookupItem, BulkLookupResponse
 from src.tools.package_lookup import PackageLookupTool
 
 logger = logging.getLogger(__name__)
@@ -12,8 +16,8 @@ logger = logging.getLogger(__name__)
 class ToolsService:
     """Service for managing and executing tools"""
 
-    def __init__(self):
-        self.package_tool = PackageLookupTool()
+    def __init__(self, package_tool: Optional[PackageLookupTool] = None):
+        self.package_tool = package_tool or PackageLookupTool()
 
     async def find_package(self, package_id: str, auth_token: Optional[str] = None) -> Dict[str, Any]:
         """Find a package by ID using the package lookup tool"""
@@ -43,10 +47,16 @@ class ToolsService:
                 "suggestion": "Please try again later or contact support."
             }
 
-    async def get_user_packages(self, user_id: str, auth_token: str) -> Dict[str, Any]:
-        """Get all packages for a user"""
+    async def get_user_packages(self, user_id: str, auth_token: str, limit: Optional[int] = None,
+                                cursor: Optional[str] = None, status: Optional[str] = None,
+                                created_after: Optional[str] = None, created_before: Optional[str] = None,
+                                summary: bool = False) -> Dict[str, Any]:
+        """Get a page of a user's packages, or a summary of them"""
         try:
-            result = await self.package_tool.get_user_packages(user_id, auth_token)
+            result = await self.package_tool.get_user_packages(
+                user_id, auth_token, limit=limit, cursor=cursor, status=status,
+                created_after=created_after, created_before=created_before, summary=summary
+            )
             logger.info(f"User packages lookup for {user_id}: {'success' if result['success'] else 'failed'}")
             return result
         except Exception as e:
@@ -57,6 +67,81 @@ class ToolsService:
                 "suggestion": "Please try again later or contact support."
             }
 
+    async def find_packages(self, package_ids: List[str], auth_token: Optional[str] = None) -> BulkLookupResponse:
+        """Find many packages by ID with bounded upstream concurrency"""
+        return await self._bulk_lookup(package_ids, lambda package_id: self.find_package(package_id, auth_token))
+
+    async def track_packages(self, tracking_numbers: List[str]) -> BulkLookupResponse:
+        """Track many packages by tracking number with bounded upstream concurrency"""
+        return await self._bulk_lookup(tracking_numbers, self.track_package)
+
+    def stream_find_packages(self, package_ids: List[str], auth_token: Optional[str] = None) -> AsyncIterator[str]:
+        """Find many packages, yielding NDJSON lines as each lookup completes"""
+        return self._stream_bulk_lookup(package_ids, lambda package_id: self.find_package(package_id, auth_token))
+
+    def stream_track_packages(self, tracking_numbers: List[str]) -> AsyncIterator[str]:
+        """Track many packages, yielding NDJSON lines as each lookup completes"""
+        return self._stream_bulk_lookup(tracking_numbers, self.track_package)
+
+    def _bounded_lookups(self, ids: List[str], lookup: Callable[[str], Awaitable[Dict[str, Any]]]) -> List["asyncio.Task"]:
+        """Start one task per ID, limited to bulk_lookup_concurrency upstream calls at a time"""
+        semaphore = asyncio.Semaphore(settings.bulk_lookup_concurrency)
+
+        async def run(index: int, item_id: str) -> BulkLookupItem:
+            async with semaphore:
+                result = await lookup(item_id)
+            return BulkLookupItem(index=index, id=item_id, result=result)
+
+        return [asyncio.ensure_future(run(index, item_id)) for index, item_id in enumerate(ids)]
+
+    async def _bulk_lookup(self, ids: List[str], lookup: Callable[[str], Awaitable[Dict[str, Any]]]) -> BulkLookupResponse:
+        items = await asyncio.gather(*self._bounded_lookups(ids, lookup))
+        succeeded = sum(1 for item in items if item.result.get("success"))
+        return BulkLookupResponse(
+            success=succeeded == len(items),
+            count=len(items),
+            succeeded=succeeded,
+            failed=len(items) - succeeded,
+            results=list(items)
+        )
+
+    async def _stream_bulk_lookup(self, ids: List[str], lookup: Callable[[str], Awaitable[Dict[str, Any]]]) -> AsyncIterator[str]:
+        tasks = self._bounded_lookups(ids, lookup)
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                item = await next_done
+                yield json.dumps(item.model_dump(), default=str) + "\n"
+        finally:
+            # Client disconnected before the stream finished
+            for task in tasks:
+                task.cancel()
+
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """Get lookup cache hit/miss/eviction counters"""
+        return self.package_tool.get_cache_stats()
+
+    def get_lookup_stats(self) -> Dict[str, Any]:
+        """Get cache counters and which lookup path answered package finds"""
+        return {
+            "cache": self.package_tool.get_cache_stats(),
+            "lookups": self.package_tool.get_lookup_stats()
+        }
+
+    def get_circuit_stats(self) -> Dict[str, Any]:
+        """Get per-endpoint circuit breaker states and retry budget usage"""
+        return self.package_tool.get_circuit_stats()
+
+    def invalidate_cache(self, package_id: Optional[str] = None, tracking_number: Optional[str] = None,
+                         user_id: Optional[str] = None) -> Dict[str, Any]:
+        """Invalidate cached lookups for a package, tracking number and/or user"""
+        removed = self.package_tool.invalidate(
+            package_id=package_id,
+            tracking_number=tracking_number,
+            user_id=user_id
+        )
+        logger.info(f"Invalidated {removed} cached lookup(s)")
+        return {"success": True, "invalidated": removed}
+
     def get_available_tools(self) -> Dict[str, List[Dict[str, Any]]]:
         """Get list of available tools and their information"""
         return {
@@ -75,9 +160,22 @@ class ToolsService:
                 },
                 {
                     "name": "get_user_packages",
-                    "description": "Get all packages for a user",
-                    "parameters": ["user_id", "auth_token"],
+                    "description": "Get a user's packages, paginated and filtered, or summarized by status",
+                    "parameters": ["user_id", "auth_token", "limit", "cursor", "status",
+                                   "created_after", "created_before", "summary"],
                     "endpoint": "/tools/user-packages"
+                },
+                {
+                    "name": "find_packages",
+                    "description": "Find many packages by ID in one request",
+                    "parameters": ["package_ids", "auth_token (optional)", "stream (optional)"],
+                    "endpoint": "/tools/find-packages"
+                },
+                {
+                    "name": "track_packages",
+                    "description": "Track many packages by tracking number in one request",
+                    "parameters": ["tracking_numbers", "stream (optional)"],
+                    "endpoint": "/tools/track-packages"
                 }
             ]
         }
@@ -3,7 +3,7 @@ Base tool class for all AI tools
 """
 
 from abc import ABC, abstractmethod
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional
 
 
 class BaseTool(ABC):
@@ -25,6 +25,21 @@ class BaseTool(ABC):
             "description": self.description
         }
 
+    def get_function_declarations(self) -> List[Dict[str, Any]]:
+        """
+        Declare the functions this tool exposes to model function calling.
+
+        Each declaration is a dict with name, description and an OpenAPI-style
+        parameters schema. Arguments the caller supplies (user ID, auth token)
+        are not declared; they come from the context passed to call_function().
+        """
+        return []
+
+    async def call_function(self, name: str, args: Dict[str, Any],
+                            context: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Run one declared function with model-supplied args and the caller's context"""
+        return {"success": False, "message": f"Unknown function: {name}"}
+
     def validate_result(self, result: Dict[str, Any]) -> bool:
         """Validate tool execution result"""
         return isinstance(result, dict) and "success" in result
\ No newline at end of file
@@ -0,0 +1,56 @@
+"""
+Shared, connection-pooled HTTP client for upstream service calls
+"""
+import logging
+from typing import Optional
+import httpx
+from src.config import settings
+
+logger = logging.getLogger(__name__)
+
+_client: Optional[httpx.AsyncClient] = None
+
+
+def create_http_client() -> httpx.AsyncClient:
+    """Build an AsyncClient with the configured pool limits and per-phase timeouts"""
+    return httpx.AsyncClient(
+        timeout=httpx.Timeout(
+            connect=settings.http_connect_timeout,
+            read=settings.http_read_timeout,
+            write=settings.http_write_timeout,
+            pool=settings.http_pool_timeout
+        ),
+        limits=httpx.Limits(
+            max_connections=settings.http_max_connections,
+            max_keepalive_connections=settings.http_max_keepalive_connections,
+            keepalive_expiry=settings.http_keepalive_expiry
+        )
+    )
+
+
+async def init_http_client() -> httpx.AsyncClient:
+    """Create the process-wide client (called from the app startup hook)"""
+    global _client
+    if _client is None or _client.is_closed:
+        _client = create_http_client()
+        logger.info(
+            f"Shared HTTP client started (max_connections={settings.http_max_connections}, "
+            f"keepalive={settings.http_max_keepalive_connections})"
+        )
+    return _client
+
+
+async def close_http_client() -> None:
+    """Close the process-wide client (called from the app shutdown hook)"""
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        logger.info("Shared HTTP client closed")
+    _client = None
+
+
+def get_http_client() -> Optional[httpx.AsyncClient]:
+    """Return the shared client, or None if it has not been started"""
+    if _client is None or _client.is_closed:
+        return None
+    return _client
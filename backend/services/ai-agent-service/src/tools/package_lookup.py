@@ -2,24 +2,471 @@
 Package lookup tools for the AI agent service
 """
 import asyncio
+import hashlib
 import httpx
 import os
-from typing import Dict, Any, Optional
+import random
+import threading
+import time
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+from typing import Dict, Any, Optional, AsyncIterator, Hashable, Iterable, List, Set, Tuple
+from src.config import settings
+from src.utils.cache import TTLCache
+from src.utils.circuit_breaker import CircuitBreaker, CircuitOpenError, RetryBudget
+from src.utils.metrics import TOOL_CALL_DURATION
+from src.utils.singleflight import SingleFlight
 from .base_tool import BaseTool
+from .http_client import create_http_client, get_http_client
+from .tool_bridge import ToolBridge
 
 # Configuration
 PACKAGE_SERVICE_URL = os.getenv("PACKAGE_SERVICE_URL", "http://localhost:3002")
 GATEWAY_URL = os.getenv("GATEWAY_URL", "http://localhost:3000")
 
+# Cache namespaces, one per upstream endpoint
+TRACK_ENDPOINT = "track"
+PACKAGE_ENDPOINT = "package"
+USER_PACKAGES_ENDPOINT = "user_packages"
+
+_lookup_cache: Optional[TTLCache] = None
+_lookup_singleflight: Optional[SingleFlight] = None
+_circuit_breakers: Optional[Dict[str, CircuitBreaker]] = None
+_retry_budget: Optional[RetryBudget] = None
+_tool_bridge: Optional[ToolBridge] = None
+
+# find_package_by_id outcomes: strategy -> answering endpoint -> count/total latency.
+# Updated from the app's event loop, the tool bridge thread and sync callers alike.
+_lookup_stats: Dict[str, Dict[str, Dict[str, float]]] = {}
+_lookup_stats_lock = threading.Lock()
+
+
+# Gateway statuses worth retrying: the request never reached a healthy upstream
+RETRYABLE_STATUSES = frozenset({502, 503, 504})
+
+# Package statuses that no longer have an upcoming delivery
+FINAL_STATUSES = frozenset({"delivered", "cancelled"})
+
+# Number of upcoming ETAs included in a user package summary
+SUMMARY_NEXT_ETAS = 5
+
+# User package query parameters that select a page rather than filter the list
+PAGE_PARAMS = frozenset({"limit", "cursor"})
+
+
+class InvalidCursorError(ValueError):
+    """Raised for a user packages cursor that is malformed or past the end of the list"""
+
+
+def _parse_datetime(value: Any) -> Optional[datetime]:
+    """Parse an ISO date/time (as sent by the gateway) into an aware UTC datetime"""
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+def get_lookup_cache() -> TTLCache:
+    """Return the process-wide lookup cache shared by every PackageLookupTool"""
+    global _lookup_cache
+    if _lookup_cache is None:
+        _lookup_cache = TTLCache(max_entries=settings.lookup_cache_max_entries)
+    return _lookup_cache
+
+
+def get_lookup_singleflight() -> SingleFlight:
+    """Return the process-wide coalescer for in-flight gateway lookups"""
+    global _lookup_singleflight
+    if _lookup_singleflight is None:
+        _lookup_singleflight = SingleFlight()
+    return _lookup_singleflight
+
+
+def get_circuit_breakers() -> Dict[str, CircuitBreaker]:
+    """Return the process-wide circuit breaker of each upstream endpoint"""
+    global _circuit_breakers
+    if _circuit_breakers is None:
+        _circuit_breakers = {
+            endpoint: CircuitBreaker(
+                name=endpoint,
+                failure_rate=settings.circuit_breaker_failure_rate,
+                min_calls=settings.circuit_breaker_min_calls,
+                window=settings.circuit_breaker_window,
+                open_seconds=settings.circuit_breaker_open_seconds,
+                half_open_probes=settings.circuit_breaker_half_open_probes
+            )
+            for endpoint in (TRACK_ENDPOINT, PACKAGE_ENDPOINT, USER_PACKAGES_ENDPOINT)
+        }
+    return _circuit_breakers
+
+
+def get_retry_budget() -> RetryBudget:
+    """Return the retry budget shared by every upstream endpoint"""
+    global _retry_budget
+    if _retry_budget is None:
+        _retry_budget = RetryBudget(
+            ratio=settings.retry_budget_ratio,
+            min_retries=settings.retry_budget_min_retries,
+            window=settings.retry_budget_window
+        )
+    return _retry_budget
+
+
+def _auth_scope(auth_token: str) -> str:
+    """Derive a cache scope from a token without keeping the token itself in memory"""
+    return hashlib.sha256(auth_token.encode()).hexdigest()[:16]
+
 
 class PackageLookupTool(BaseTool):
     """Tool for looking up package information"""
 
-    def __init__(self):
+    def __init__(self, client: Optional[httpx.AsyncClient] = None, cache: Optional[TTLCache] = None,
+                 singleflight: Optional[SingleFlight] = None,
+                 breakers: Optional[Dict[str, CircuitBreaker]] = None,
+                 retry_budget: Optional[RetryBudget] = None):
         super().__init__(
             name="package_lookup",
             description="Tool for finding and tracking packages"
         )
+        self._client = client
+        self.cache = cache if cache is not None else get_lookup_cache()
+        self.singleflight = singleflight or get_lookup_singleflight()
+        self.breakers = breakers or get_circuit_breakers()
+        self.retry_budget = retry_budget or get_retry_budget()
+        self.cache_ttls = {
+            TRACK_ENDPOINT: settings.lookup_cache_track_ttl,
+            PACKAGE_ENDPOINT: settings.lookup_cache_package_ttl,
+            USER_PACKAGES_ENDPOINT: settings.lookup_cache_user_packages_ttl
+        }
+
+    @asynccontextmanager
+    async def _client_session(self) -> AsyncIterator[httpx.AsyncClient]:
+        """
+        Yield the pooled HTTP client.
+
+        Uses the client passed to the constructor, else the process-wide shared client.
+        Outside the app lifespan (e.g. the sync wrappers) a short-lived client is created.
+        """
+        client = self._client or get_http_client()
+        if client is not None:
+            yield client
+            return
+
+        async with create_http_client() as client:
+            yield client
+
+    async def _fetch(self, endpoint: str, path: str, cache_key: Hashable,
+                     headers: Optional[Dict[str, str]] = None,
+                     params: Optional[Dict[str, Any]] = None) -> Tuple[int, Any]:
+        """
+        GET a gateway path, serving successful responses from the lookup cache.
+
+        Concurrent misses for the same cache key (which includes the auth scope)
+        share a single upstream request.
+
+        Returns:
+            Tuple of (status code, parsed JSON body for 200 responses else None)
+        """
+        cached = self.cache.get(cache_key)
+        if cached is not None:
+            return 200, cached
+
+        return await self.singleflight.do(
+            cache_key,
+            lambda: self._request(endpoint, path, cache_key, headers, params)
+        )
+
+    async def _fetch_unshared(self, endpoint: str, path: str, cache_key: Hashable,
+                              headers: Optional[Dict[str, str]] = None) -> Tuple[int, Any]:
+        """
+        Like _fetch, but without joining or starting a shared single-flight call.
+
+        Cancelling the caller cancels the upstream request itself, which then
+        records no breaker outcome and caches nothing.
+        """
+        cached = self.cache.get(cache_key)
+        if cached is not None:
+            return 200, cached
+        return await self._request(endpoint, path, cache_key, headers)
+
+    async def _request(self, endpoint: str, path: str, cache_key: Optional[Hashable],
+                       headers: Optional[Dict[str, str]] = None,
+                       params: Optional[Dict[str, Any]] = None) -> Tuple[int, Any]:
+        """
+        Perform the upstream GET and cache a successful response (unless cache_key is None).
+
+        Each attempt goes through the endpoint's circuit breaker. Transport
+        errors and 5xx responses count as failures. Connection failures and
+        502/503/504 are retried with jittered exponential backoff while the
+        shared retry budget allows; read/write timeouts are not, since the
+        caller has already waited a full timeout. A pool timeout means this
+        process ran out of connections before anything was sent, so it is
+        raised at once without touching the breaker or the retry budget.
+
+        Raises:
+            CircuitOpenError: if the endpoint's circuit is open
+        """
+        breaker = self.breakers[endpoint]
+        self.retry_budget.record_request()
+        attempt = 0
+        while True:
+            if not breaker.allow():
+                raise CircuitOpenError(endpoint, breaker.retry_after())
+
+            error: Optional[Exception] = None
+            started = time.perf_counter()
+            try:
+                async with self._client_session() as client:
+                    response = await client.get(f"{GATEWAY_URL}{path}", headers=headers, params=params)
+            except httpx.PoolTimeout as e:
+                TOOL_CALL_DURATION.labels(endpoint, type(e).__name__).observe(time.perf_counter() - started)
+                breaker.record_abandoned()
+                raise
+            except httpx.TransportError as e:
+                TOOL_CALL_DURATION.labels(endpoint, type(e).__name__).observe(time.perf_counter() - started)
+                breaker.record_failure()
+                error = e
+                retryable = not isinstance(e, (httpx.ReadTimeout, httpx.WriteTimeout))
+            except BaseException:
+                breaker.record_abandoned()
+                raise
+            else:
+                TOOL_CALL_DURATION.labels(endpoint, str(response.status_code)).observe(time.perf_counter() - started)
+                if response.status_code < 500:
+                    breaker.record_success()
+                    break
+                breaker.record_failure()
+                retryable = response.status_code in RETRYABLE_STATUSES
+
+            if not retryable or attempt >= settings.lookup_max_retries or not self.retry_budget.try_spend():
+                if error is not None:
+                    raise error
+                return response.status_code, None
+            attempt += 1
+            # Full jitter keeps retries from many callers from arriving in lockstep
+            await asyncio.sleep(random.uniform(0, settings.lookup_retry_backoff * 2 ** attempt))
+
+        if response.status_code != 200:
+            return response.status_code, None
+
+        data = response.json()
+        if data is not None and cache_key is not None:
+            self.cache.set(cache_key, data, ttl=self.cache_ttls[endpoint])
+        return 200, data
+
+    async def _fetch_tracking(self, identifier: str, shared: bool = True) -> Tuple[int, Any]:
+        """Public tracking lookup; shared across users"""
+        fetch = self._fetch if shared else self._fetch_unshared
+        return await fetch(
+            TRACK_ENDPOINT,
+            f"/api/track/{identifier}",
+            (TRACK_ENDPOINT, identifier)
+        )
+
+    async def _fetch_package(self, package_id: str, auth_token: str, shared: bool = True) -> Tuple[int, Any]:
+        """Authenticated package lookup; scoped to the caller's token"""
+        fetch = self._fetch if shared else self._fetch_unshared
+        return await fetch(
+            PACKAGE_ENDPOINT,
+            f"/api/packages/{package_id}",
+            (PACKAGE_ENDPOINT, package_id, _auth_scope(auth_token)),
+            headers=self._auth_headers(auth_token)
+        )
+
+    async def _fetch_user_packages(self, user_id: str, auth_token: str,
+                                   params: Optional[Dict[str, Any]] = None) -> Tuple[int, Any]:
+        """
+        Authenticated user package list; scoped to the user, token and query.
+
+        limit and cursor are forwarded, but an upstream that ignores them answers
+        with the user's whole list. A bare list is therefore filtered and cached
+        once per set of filters, and every page is sliced from that copy. Only
+        page envelopes are cached per page. A bare list that may itself be a
+        page (a cursor was sent, or it holds exactly limit items) is never
+        cached as the whole list; the list is refetched without page params.
+        """
+        params = {key: value for key, value in (params or {}).items() if value is not None}
+        scope = _auth_scope(auth_token)
+        filters = tuple(sorted((key, value) for key, value in params.items() if key not in PAGE_PARAMS))
+        list_key = (USER_PACKAGES_ENDPOINT, user_id, scope, "list", filters)
+        page_key = (USER_PACKAGES_ENDPOINT, user_id, scope, "page", tuple(sorted(params.items())))
+
+        for key in (list_key, page_key):
+            cached = self.cache.get(key)
+            if cached is not None:
+                return 200, cached
+
+        async def fetch() -> Tuple[int, Any]:
+            status_code, payload = await self._request(
+                USER_PACKAGES_ENDPOINT,
+                f"/api/packages/user/{user_id}",
+                None,
+                headers=self._auth_headers(auth_token),
+                params=params or None
+            )
+            if isinstance(payload, list) and ("cursor" in params or len(payload) == params.get("limit")):
+                status_code, payload = await self._request(
+                    USER_PACKAGES_ENDPOINT,
+                    f"/api/packages/user/{user_id}",
+                    None,
+                    headers=self._auth_headers(auth_token),
+                    params=dict(filters) or None
+                )
+            if status_code != 200 or payload is None:
+                return status_code, payload
+            ttl = self.cache_ttls[USER_PACKAGES_ENDPOINT]
+            if isinstance(payload, list):
+                payload = [package for package in payload if self._matches(package, params)]
+                self.cache.set(list_key, payload, ttl=ttl)
+            else:
+                self.cache.set(page_key, payload, ttl=ttl)
+            return status_code, payload
+
+        return await self.singleflight.do(page_key, fetch)
+
+    @staticmethod
+    def _auth_headers(auth_token: str) -> Dict[str, str]:
+        return {
+            "Content-Type": "application/json",
+            "Authorization": f"Bearer {auth_token}"
+        }
+
+    @staticmethod
+    def _normalize_package(package_data: Dict[str, Any], package_id: str) -> Dict[str, Any]:
+        """Map a gateway package document onto the fields the agent reports"""
+        return {
+            "id": package_data.get("_id") or package_data.get("id", package_id),
+            "tracking_number": package_data.get("trackingId") or package_data.get("trackingNumber"),
+            "status": package_data.get("status", "Unknown"),
+            "name": package_data.get("name"),
+            "description": package_data.get("description"),
+            "weight": package_data.get("weight"),
+            "recipient_name": package_data.get("recipientName"),
+            "recipient_contact": package_data.get("recipientContact"),
+            "location": package_data.get("location"),
+            "eta": package_data.get("eta"),
+            "category": package_data.get("category"),
+            "created_at": package_data.get("createdAt"),
+            "updated_at": package_data.get("updatedAt"),
+            "last_update": package_data.get("lastUpdate")
+        }
+
+    def invalidate(self, package_id: Optional[str] = None, tracking_number: Optional[str] = None,
+                   user_id: Optional[str] = None) -> int:
+        """
+        Drop cached lookups for a package, tracking number and/or user.
+
+        Returns:
+            Number of cache entries removed
+        """
+        removed = 0
+        if package_id:
+            # The tracking endpoint also resolves package IDs
+            removed += int(self.cache.invalidate((TRACK_ENDPOINT, package_id)))
+            removed += self.cache.invalidate_prefix((PACKAGE_ENDPOINT, package_id))
+        if tracking_number:
+            removed += int(self.cache.invalidate((TRACK_ENDPOINT, tracking_number)))
+        if user_id:
+            removed += self.cache.invalidate_prefix((USER_PACKAGES_ENDPOINT, user_id))
+        return removed
+
+    def invalidate_all(self) -> int:
+        """Drop every cached package, tracking and user package lookup; returns the number removed"""
+        return sum(
+            self.cache.invalidate_prefix((endpoint,))
+            for endpoint in (TRACK_ENDPOINT, PACKAGE_ENDPOINT, USER_PACKAGES_ENDPOINT)
+        )
+
+    def apply_status_events(self, statuses: Dict[str, Optional[str]], owners: Iterable[str] = ()) -> Dict[str, int]:
+        """
+        Bring cached lookups in line with package status events.
+
+        Cached track and package documents are matched by their _id, id and
+        trackingId, whichever identifier they were looked up by: a delivery
+        event names the package's _id while chats look packages up by
+        tracking number. Matches get the new status in place and keep their
+        expiry; packages whose event carried no status are invalidated. User
+        package lists (and their summaries) that contain a changed package,
+        or belong to one of owners, are invalidated since filters and counts
+        depend on status.
+
+        Args:
+            statuses: New status per package ID or tracking number (None if unknown),
+                oldest event first; a document matching several takes the newest
+            owners: Users whose package lists changed, e.g. because a package was created
+
+        Returns:
+            Dict with the number of cache entries updated and invalidated
+        """
+        updated = invalidated = 0
+        rank = {identifier: position for position, identifier in enumerate(statuses)}
+
+        def new_status(doc: Any) -> Optional[str]:
+            """Status from the newest event about a cached document: "" if it had none, None if no event"""
+            matched = [identifier for identifier in self._document_ids(doc) if identifier in rank]
+            return (statuses[max(matched, key=rank.__getitem__)] or "") if matched else None
+
+        for endpoint in (TRACK_ENDPOINT, PACKAGE_ENDPOINT):
+            for key in self.cache.find_keys((endpoint,), lambda doc: bool(new_status(doc))):
+                updated += self.cache.update_prefix(key, lambda doc: {**doc, "status": new_status(doc)})
+            for key in self.cache.find_keys((endpoint,), lambda doc: new_status(doc) == ""):
+                invalidated += int(self.cache.invalidate(key))
+        for identifier, status in statuses.items():
+            if not status:
+                invalidated += self.invalidate(package_id=identifier, tracking_number=identifier)
+
+        users = set(owners)
+        if statuses:
+            identifiers = set(statuses)
+            keys = self.cache.find_keys(
+                (USER_PACKAGES_ENDPOINT,), lambda payload: self._lists_any(payload, identifiers)
+            )
+            users.update(key[1] for key in keys)
+        for user_id in users:
+            invalidated += self.invalidate(user_id=user_id)
+        return {"updated": updated, "invalidated": invalidated}
+
+    @staticmethod
+    def _document_ids(doc: Any) -> Set[str]:
+        """Identifiers a cached package document can be referred to by"""
+        if not isinstance(doc, dict):
+            return set()
+        return {str(doc[field]) for field in ("_id", "id", "trackingId") if doc.get(field)}
+
+    @classmethod
+    def _lists_any(cls, payload: Any, identifiers: Set[str]) -> bool:
+        """Whether a cached user package list contains a package with one of identifiers"""
+        if isinstance(payload, dict):
+            payload = payload.get("packages", payload.get("items"))
+        if not isinstance(payload, list):
+            return False
+        return any(cls._document_ids(package) & identifiers for package in payload)
+
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """Return lookup cache counters, per-endpoint TTLs and coalescing counters"""
+        return {
+            **self.cache.get_stats(),
+            "ttls": dict(self.cache_ttls),
+            "singleflight": self.singleflight.get_stats()
+        }
+
+    def get_circuit_stats(self) -> Dict[str, Any]:
+        """Return the state of each endpoint's circuit breaker and the retry budget"""
+        return {
+            "circuits": {endpoint: breaker.get_stats() for endpoint, breaker in self.breakers.items()},
+            "retry_budget": self.retry_budget.get_stats()
+        }
+
+    @staticmethod
+    def _service_unavailable(message: str) -> Dict[str, Any]:
+        return {
+            "success": False,
+            "message": message,
+            "suggestion": "The service might be temporarily unavailable. Please try again later."
+        }
 
     async def execute(self, method: str, *args, **kwargs) -> Dict[str, Any]:
         """Execute package lookup operations"""
@@ -36,6 +483,76 @@ class PackageLookupTool(BaseTool):
                 "suggestion": "Available methods: find_by_id, track_by_number, get_user_packages"
             }
 
+    def get_function_declarations(self) -> List[Dict[str, Any]]:
+        """Function calling schemas for the three lookups"""
+        return [
+            {
+                "name": "find_package_by_id",
+                "description": "Find a package by its unique ID (PKG followed by digits, or a 24-character hex string).",
+                "parameters": {
+                    "type": "object",
+                    "properties": {
+                        "package_id": {"type": "string", "description": "The package ID"}
+                    },
+                    "required": ["package_id"]
+                }
+            },
+            {
+                "name": "track_package_by_tracking_number",
+                "description": "Track a package by its tracking number (e.g. TR123456789).",
+                "parameters": {
+                    "type": "object",
+                    "properties": {
+                        "tracking_number": {"type": "string", "description": "The tracking number"}
+                    },
+                    "required": ["tracking_number"]
+                }
+            },
+            {
+                "name": "get_user_packages",
+                "description": "List the signed-in user's packages, or summarize them as counts by status "
+                               "and upcoming ETAs. Prefer summary unless the user asks for individual packages.",
+                "parameters": {
+                    "type": "object",
+                    "properties": {
+                        "summary": {"type": "boolean", "description": "Return counts and upcoming ETAs only"},
+                        "status": {"type": "string", "description": "Only packages with this status, e.g. 'in transit'"},
+                        "limit": {"type": "integer", "description": "Maximum number of packages to list"}
+                    }
+                }
+            }
+        ]
+
+    async def call_function(self, name: str, args: Dict[str, Any],
+                            context: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Run a declared lookup; user ID and auth token come from the context, never the model"""
+        context = context or {}
+        auth_token = context.get("auth_token")
+        try:
+            if name == "find_package_by_id":
+                return await self.find_package_by_id(str(args["package_id"]), auth_token)
+            if name == "track_package_by_tracking_number":
+                return await self.track_package_by_tracking_number(str(args["tracking_number"]))
+            if name == "get_user_packages":
+                user_id = context.get("user_id")
+                if not user_id or not auth_token:
+                    return {
+                        "success": False,
+                        "message": "The user is not signed in, so their packages cannot be listed.",
+                        "suggestion": "Please log in to view your packages."
+                    }
+                limit = args.get("limit")
+                return await self.get_user_packages(
+                    user_id,
+                    auth_token,
+                    limit=int(limit) if limit is not None else None,
+                    status=args.get("status"),
+                    summary=bool(args.get("summary", False))
+                )
+        except KeyError as e:
+            return {"success": False, "message": f"Missing argument {e} for {name}"}
+        return await super().call_function(name, args, context)
+
     async def find_package_by_id(self, package_id: str, auth_token: Optional[str] = None) -> Dict[str, Any]:
         """
         Find a package by its ID using the tracking API (public) or packages API (authenticated).
@@ -47,95 +564,39 @@ class PackageLookupTool(BaseTool):
         Returns:
             Dict containing package information or error message
         """
+        started = time.monotonic()
         try:
-            headers = {"Content-Type": "application/json"}
+            if auth_token and settings.lookup_hedged_requests:
+                return await self._find_package_hedged(package_id, auth_token, started)
+
+            # First try the public tracking endpoint (works for both tracking numbers and package IDs)
+            tracking_error: Optional[Exception] = None
+            try:
+                status_code, package_data = await self._fetch_tracking(package_id)
+
+                if status_code == 200:
+                    return self._package_found(package_id, package_data, TRACK_ENDPOINT, "sequential", started)
+            except Exception as e:
+                tracking_error = e  # Fall through to authenticated endpoint
+
+            # If tracking endpoint fails and we have auth, try the authenticated packages endpoint
             if auth_token:
-                headers["Authorization"] = f"Bearer {auth_token}"
-
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                # First try the public tracking endpoint (works for both tracking numbers and package IDs)
-                try:
-                    response = await client.get(f"{GATEWAY_URL}/api/track/{package_id}")
-
-                    if response.status_code == 200:
-                        package_data = response.json()
-                        return {
-                            "success": True,
-                            "data": {
-                                "id": package_data.get("_id") or package_data.get("id", package_id),
-                                "tracking_number": package_data.get("trackingId") or package_data.get("trackingNumber"),
-                                "status": package_data.get("status", "Unknown"),
-                                "name": package_data.get("name"),
-                                "description": package_data.get("description"),
-                                "weight": package_data.get("weight"),
-                                "recipient_name": package_data.get("recipientName"),
-                                "recipient_contact": package_data.get("recipientContact"),
-                                "location": package_data.get("location"),
-                                "eta": package_data.get("eta"),
-                                "category": package_data.get("category"),
-                                "created_at": package_data.get("createdAt"),
-                                "updated_at": package_data.get("updatedAt"),
-                                "last_update": package_data.get("lastUpdate")
-                            },
-                            "message": f"Found package {package_id} successfully!"
-                        }
-                except:
-                    pass  # Fall through to authenticated endpoint
-
-                # If tracking endpoint fails and we have auth, try the authenticated packages endpoint
-                if auth_token:
-                    response = await client.get(
-                        f"{GATEWAY_URL}/api/packages/{package_id}",
-                        headers=headers
-                    )
-
-                    if response.status_code == 200:
-                        package_data = response.json()
-                        return {
-                            "success": True,
-                            "data": {
-                                "id": package_data.get("_id") or package_data.get("id", package_id),
-                                "tracking_number": package_data.get("trackingId") or package_data.get("trackingNumber"),
-                                "status": package_data.get("status", "Unknown"),
-                                "name": package_data.get("name"),
-                                "description": package_data.get("description"),
-                                "weight": package_data.get("weight"),
-                                "recipient_name": package_data.get("recipientName"),
-                                "recipient_contact": package_data.get("recipientContact"),
-                                "location": package_data.get("location"),
-                                "eta": package_data.get("eta"),
-                                "category": package_data.get("category"),
-                                "created_at": package_data.get("createdAt"),
-                                "updated_at": package_data.get("updatedAt"),
-                                "last_update": package_data.get("lastUpdate")
-                            },
-                            "message": f"Found package {package_id} successfully!"
-                        }
-                    elif response.status_code == 404:
-                        return {
-                            "success": False,
-                            "message": f"Package with ID '{package_id}' was not found. Please check the package ID and try again.",
-                            "suggestion": "Make sure you have the correct package ID format (PKG followed by numbers)."
-                        }
-                    elif response.status_code == 401:
-                        return {
-                            "success": False,
-                            "message": "Authentication required. Please log in to view this package.",
-                            "suggestion": "This package might be private and requires authentication."
-                        }
-                    else:
-                        return {
-                            "success": False,
-                            "message": f"Unable to fetch package information. Service returned status: {response.status_code}",
-                            "suggestion": "Please try again later or contact support if the issue persists."
-                        }
-                else:
-                    # No auth token and tracking endpoint failed
-                    return {
-                        "success": False,
-                        "message": f"Package with ID '{package_id}' was not found or requires authentication.",
-                        "suggestion": "Please log in to view private package details, or verify the package ID is correct."
-                    }
+                status_code, package_data = await self._fetch_package(package_id, auth_token)
+
+                if status_code == 200:
+                    return self._package_found(package_id, package_data, PACKAGE_ENDPOINT, "sequential", started)
+                self._record_lookup("sequential", None, started)
+                return self._package_lookup_failed(package_id, status_code)
+            else:
+                # No auth token and tracking endpoint failed
+                self._record_lookup("sequential", None, started)
+                if isinstance(tracking_error, CircuitOpenError):
+                    raise tracking_error
+                return {
+                    "success": False,
+                    "message": f"Package with ID '{package_id}' was not found or requires authentication.",
+                    "suggestion": "Please log in to view private package details, or verify the package ID is correct."
+                }
 
         except httpx.TimeoutException:
             return {
@@ -144,11 +605,9 @@ class PackageLookupTool(BaseTool):
                 "suggestion": "The service might be busy. Please try again in a moment."
             }
         except httpx.ConnectError:
-            return {
-                "success": False,
-                "message": "Unable to connect to the package service.",
-                "suggestion": "The service might be temporarily unavailable. Please try again later."
-            }
+            return self._service_unavailable("Unable to connect to the package service.")
+        except CircuitOpenError:
+            return self._service_unavailable("The package service is not responding right now.")
         except Exception as e:
             return {
                 "success": False,
@@ -156,6 +615,102 @@ class PackageLookupTool(BaseTool):
                 "suggestion": "Please try again or contact support if the problem continues."
             }
 
+    async def _find_package_hedged(self, package_id: str, auth_token: str, started: float) -> Dict[str, Any]:
+        """
+        Query the public tracking and authenticated package endpoints concurrently.
+
+        The first successful answer wins and the other request is cancelled. If
+        neither succeeds, the authenticated endpoint's outcome decides the error.
+        Both requests bypass single-flight coalescing: a shared call is shielded
+        from cancellation, so the loser would otherwise run to completion and
+        still record its breaker outcome and cache entry.
+        """
+        requests = {
+            asyncio.ensure_future(self._fetch_tracking(package_id, shared=False)): TRACK_ENDPOINT,
+            asyncio.ensure_future(self._fetch_package(package_id, auth_token, shared=False)): PACKAGE_ENDPOINT
+        }
+        pending = set(requests)
+        authenticated = None
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    endpoint = requests[task]
+                    if task.exception() is None:
+                        status_code, package_data = task.result()
+                        if status_code == 200:
+                            return self._package_found(package_id, package_data, endpoint, "hedged", started)
+                    if endpoint == PACKAGE_ENDPOINT:
+                        authenticated = task
+        finally:
+            for task in pending:
+                task.cancel()
+
+        self._record_lookup("hedged", None, started)
+        if authenticated.exception() is not None:
+            raise authenticated.exception()
+        status_code, _ = authenticated.result()
+        return self._package_lookup_failed(package_id, status_code)
+
+    def _package_found(self, package_id: str, package_data: Dict[str, Any], endpoint: str,
+                       strategy: str, started: float) -> Dict[str, Any]:
+        """Build a successful find result, recording which endpoint answered"""
+        elapsed_ms = self._record_lookup(strategy, endpoint, started)
+        return {
+            "success": True,
+            "data": self._normalize_package(package_data, package_id),
+            "message": f"Found package {package_id} successfully!",
+            "lookup": {"strategy": strategy, "source": endpoint, "elapsed_ms": elapsed_ms}
+        }
+
+    @staticmethod
+    def _package_lookup_failed(package_id: str, status_code: int) -> Dict[str, Any]:
+        """Map an authenticated package endpoint status to a user-facing error"""
+        if status_code == 404:
+            return {
+                "success": False,
+                "message": f"Package with ID '{package_id}' was not found. Please check the package ID and try again.",
+                "suggestion": "Make sure you have the correct package ID format (PKG followed by numbers)."
+            }
+        elif status_code == 401:
+            return {
+                "success": False,
+                "message": "Authentication required. Please log in to view this package.",
+                "suggestion": "This package might be private and requires authentication."
+            }
+        else:
+            return {
+                "success": False,
+                "message": f"Unable to fetch package information. Service returned status: {status_code}",
+                "suggestion": "Please try again later or contact support if the issue persists."
+            }
+
+    @staticmethod
+    def _record_lookup(strategy: str, source: Optional[str], started: float) -> float:
+        """Record which path answered a find_package_by_id call and how long it took"""
+        elapsed_ms = (time.monotonic() - started) * 1000
+        with _lookup_stats_lock:
+            stats = _lookup_stats.setdefault(strategy, {}).setdefault(
+                source or "none", {"count": 0, "total_ms": 0.0}
+            )
+            stats["count"] += 1
+            stats["total_ms"] += elapsed_ms
+        return round(elapsed_ms, 2)
+
+    def get_lookup_stats(self) -> Dict[str, Any]:
+        """Return per-strategy counts and average latency by answering endpoint"""
+        with _lookup_stats_lock:
+            return {
+                strategy: {
+                    source: {
+                        "count": stats["count"],
+                        "avg_ms": round(stats["total_ms"] / stats["count"], 2)
+                    }
+                    for source, stats in sources.items()
+                }
+                for strategy, sources in _lookup_stats.items()
+            }
+
     async def track_package_by_tracking_number(self, tracking_number: str) -> Dict[str, Any]:
         """
         Track a package using its tracking number (public endpoint).
@@ -167,30 +722,30 @@ class PackageLookupTool(BaseTool):
             Dict containing tracking information or error message
         """
         try:
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                # Use the public tracking endpoint
-                response = await client.get(f"{GATEWAY_URL}/api/track/{tracking_number}")
+            # Use the public tracking endpoint
+            status_code, tracking_data = await self._fetch_tracking(tracking_number)
 
-                if response.status_code == 200:
-                    tracking_data = response.json()
-                    return {
-                        "success": True,
-                        "data": tracking_data,
-                        "message": f"Successfully tracked package with tracking number: {tracking_number}"
-                    }
-                elif response.status_code == 404:
-                    return {
-                        "success": False,
-                        "message": f"No package found with tracking number '{tracking_number}'.",
-                        "suggestion": "Please verify the tracking number and try again. Tracking numbers are usually provided when you create a package."
-                    }
-                else:
-                    return {
-                        "success": False,
-                        "message": f"Unable to track package. Service returned status: {response.status_code}",
-                        "suggestion": "Please try again later."
-                    }
+            if status_code == 200:
+                return {
+                    "success": True,
+                    "data": tracking_data,
+                    "message": f"Successfully tracked package with tracking number: {tracking_number}"
+                }
+            elif status_code == 404:
+                return {
+                    "success": False,
+                    "message": f"No package found with tracking number '{tracking_number}'.",
+                    "suggestion": "Please verify the tracking number and try again. Tracking numbers are usually provided when you create a package."
+                }
+            else:
+                return {
+                    "success": False,
+                    "message": f"Unable to track package. Service returned status: {status_code}",
+                    "suggestion": "Please try again later."
+                }
 
+        except CircuitOpenError:
+            return self._service_unavailable("Package tracking is not responding right now.")
         except Exception as e:
             return {
                 "success": False,
@@ -198,58 +753,70 @@ class PackageLookupTool(BaseTool):
                 "suggestion": "Please try again or contact support."
             }
 
-    async def get_user_packages(self, user_id: str, auth_token: str) -> Dict[str, Any]:
+    async def get_user_packages(self, user_id: str, auth_token: str, limit: Optional[int] = None,
+                                cursor: Optional[str] = None, status: Optional[str] = None,
+                                created_after: Optional[str] = None, created_before: Optional[str] = None,
+                                summary: bool = False) -> Dict[str, Any]:
         """
-        Get all packages belonging to a user.
+        Get packages belonging to a user, optionally paginated, filtered or summarized.
+
+        Filters and pagination are passed through to the upstream. When it answers
+        with a bare list instead of a page envelope, they are applied here instead.
 
         Args:
             user_id (str): The user's ID
             auth_token (str): Authentication token
+            limit (int, optional): Page size (capped at user_packages_max_limit)
+            cursor (str, optional): Cursor returned as next_cursor by the previous page
+            status (str, optional): Only packages with this status
+            created_after (str, optional): ISO date; only packages created at or after it
+            created_before (str, optional): ISO date; only packages created before it
+            summary (bool): Return counts by status and upcoming ETAs instead of packages
 
         Returns:
-            Dict containing user's packages or error message
+            Dict containing user's packages (or their summary) or error message
         """
         try:
-            headers = {
-                "Content-Type": "application/json",
-                "Authorization": f"Bearer {auth_token}"
-            }
-
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                response = await client.get(
-                    f"{GATEWAY_URL}/api/packages/user/{user_id}",
-                    headers=headers
-                )
+            filters = {"status": status, "createdAfter": created_after, "createdBefore": created_before}
+            if summary:
+                return await self._get_user_packages_summary(user_id, auth_token, filters)
 
-                if response.status_code == 200:
-                    packages = response.json()
-                    if not packages:
-                        return {
-                            "success": True,
-                            "data": [],
-                            "message": "You don't have any packages yet.",
-                            "suggestion": "Would you like to create your first package? You can start by clicking 'Create Package' in the dashboard."
-                        }
+            if limit is not None:
+                limit = max(1, min(limit, settings.user_packages_max_limit))
+            params = {**filters, "limit": limit, "cursor": cursor}
+            status_code, payload = await self._fetch_user_packages(user_id, auth_token, params)
 
+            if status_code == 200:
+                packages, total, next_cursor = self._paginate(payload, limit, cursor)
+                if not packages and cursor is None:
                     return {
                         "success": True,
-                        "data": packages,
-                        "count": len(packages),
-                        "message": f"Found {len(packages)} package(s) for this user."
-                    }
-                elif response.status_code == 401:
-                    return {
-                        "success": False,
-                        "message": "Authentication failed. Please log in again.",
-                        "suggestion": "Your session may have expired. Please refresh and log in again."
-                    }
-                else:
-                    return {
-                        "success": False,
-                        "message": f"Unable to fetch packages. Service returned status: {response.status_code}",
-                        "suggestion": "Please try again later."
+                        "data": [],
+                        "message": "You don't have any packages yet." if not any(filters.values())
+                        else "No packages match these filters.",
+                        "suggestion": "Would you like to create your first package? You can start by clicking 'Create Package' in the dashboard."
                     }
 
+                result = {
+                    "success": True,
+                    "data": packages,
+                    "count": len(packages),
+                    "message": f"Found {total} package(s) for this user."
+                }
+                if limit is not None or cursor is not None:
+                    result["total"] = total
+                    result["next_cursor"] = next_cursor
+                return result
+            return self._user_packages_failed(status_code)
+
+        except CircuitOpenError:
+            return self._service_unavailable("Your package list is not available right now.")
+        except InvalidCursorError as e:
+            return {
+                "success": False,
+                "message": str(e),
+                "suggestion": "Start again from the first page without a cursor."
+            }
         except Exception as e:
             return {
                 "success": False,
@@ -257,21 +824,217 @@ class PackageLookupTool(BaseTool):
                 "suggestion": "Please try again or contact support."
             }
 
+    async def prefetch_user(self, user_id: str, auth_token: str, max_packages: int = 10,
+                            concurrency: int = 5) -> Dict[str, Any]:
+        """
+        Warm the cache with what a user's first chat question most likely needs.
+
+        Fetches the user's package list (caching it and its summary), then the
+        tracking documents of up to max_packages packages still on their way,
+        soonest ETA first. Lookups a chat message makes while this runs join
+        the in-flight requests instead of repeating them.
+
+        Returns:
+            Dict with the number of packages listed and tracking documents prefetched
+        """
+        listing = await self.get_user_packages(user_id, auth_token, summary=True)
+        if not listing["success"]:
+            return {"success": False, "message": listing.get("message")}
+
+        _, payload = await self._fetch_user_packages(user_id, auth_token, {})
+        packages, total, _ = self._paginate(payload, None, None)
+        active = [
+            package for package in packages
+            if str(package.get("status") or "").lower() not in FINAL_STATUSES
+        ]
+        active.sort(key=lambda package: _parse_datetime(package.get("eta")) or datetime.max.replace(tzinfo=timezone.utc))
+        identifiers = [
+            str(package.get("trackingId") or package.get("_id"))
+            for package in active[:max_packages]
+            if package.get("trackingId") or package.get("_id")
+        ]
+
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def prefetch(identifier: str) -> bool:
+            async with semaphore:
+                status_code, _ = await self._fetch_tracking(identifier)
+                return status_code == 200
+
+        results = await asyncio.gather(*(prefetch(identifier) for identifier in identifiers), return_exceptions=True)
+        return {
+            "success": True,
+            "packages": total,
+            "prefetched": sum(1 for result in results if result is True)
+        }
+
+    async def _get_user_packages_summary(self, user_id: str, auth_token: str,
+                                         filters: Dict[str, Optional[str]]) -> Dict[str, Any]:
+        """Summarize a user's packages, caching the summary alongside the list"""
+        summary_key = (
+            USER_PACKAGES_ENDPOINT, user_id, _auth_scope(auth_token), "summary",
+            tuple(sorted((k, v) for k, v in filters.items() if v is not None))
+        )
+        summary = self.cache.get(summary_key)
+        if summary is None:
+            status_code, payload = await self._fetch_user_packages(user_id, auth_token, filters)
+            if status_code != 200:
+                return self._user_packages_failed(status_code)
+            packages, _, _ = self._paginate(payload, None, None)
+            summary = self._summarize(packages)
+            self.cache.set(summary_key, summary, ttl=self.cache_ttls[USER_PACKAGES_ENDPOINT])
+
+        if not summary["total"]:
+            return {
+                "success": True,
+                "summary": summary,
+                "count": 0,
+                "message": "You don't have any packages yet.",
+                "suggestion": "Would you like to create your first package? You can start by clicking 'Create Package' in the dashboard."
+            }
+        return {
+            "success": True,
+            "summary": summary,
+            "count": summary["total"],
+            "message": f"Found {summary['total']} package(s) for this user."
+        }
+
+    @staticmethod
+    def _paginate(payload: Any, limit: Optional[int],
+                  cursor: Optional[str]) -> Tuple[List[Dict[str, Any]], int, Optional[str]]:
+        """
+        Return (page, total matching, next cursor) from a _fetch_user_packages payload.
+
+        A page envelope ({"packages"/"items": [...], "nextCursor": ...}) is trusted as-is;
+        a bare list (already filtered) is paginated locally with an offset cursor.
+
+        Raises:
+            InvalidCursorError: if a bare list's cursor is not an offset into it
+        """
+        if isinstance(payload, dict):
+            packages = payload.get("packages", payload.get("items", []))
+            next_cursor = payload.get("nextCursor", payload.get("next_cursor"))
+            return packages, payload.get("total", len(packages)), next_cursor
+
+        packages = payload or []
+        total = len(packages)
+        if limit is None and cursor is None:
+            return packages, total, None
+
+        offset = 0
+        if cursor is not None:
+            if not cursor.isdigit() or int(cursor) >= total:
+                raise InvalidCursorError(f"Invalid or expired cursor: {cursor}")
+            offset = int(cursor)
+        end = total if limit is None else offset + limit
+        return packages[offset:end], total, str(end) if end < total else None
+
+    @staticmethod
+    def _matches(package: Dict[str, Any], filters: Dict[str, Optional[str]]) -> bool:
+        status = filters.get("status")
+        if status and str(package.get("status", "")).lower() != status.lower():
+            return False
+        created = _parse_datetime(package.get("createdAt"))
+        after = _parse_datetime(filters.get("createdAfter"))
+        before = _parse_datetime(filters.get("createdBefore"))
+        if (after or before) and created is None:
+            return False
+        if after and created < after:
+            return False
+        if before and created >= before:
+            return False
+        return True
+
+    @staticmethod
+    def _summarize(packages: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Counts by status plus the soonest ETAs of packages still on their way"""
+        by_status: Dict[str, int] = {}
+        upcoming = []
+        for package in packages:
+            status = str(package.get("status") or "unknown").lower()
+            by_status[status] = by_status.get(status, 0) + 1
+            eta = _parse_datetime(package.get("eta"))
+            if eta and status not in FINAL_STATUSES:
+                upcoming.append((eta, package))
+
+        upcoming.sort(key=lambda item: item[0])
+        return {
+            "total": len(packages),
+            "by_status": by_status,
+            "next_etas": [
+                {
+                    "id": package.get("_id") or package.get("id"),
+                    "tracking_number": package.get("trackingId") or package.get("trackingNumber"),
+                    "name": package.get("name"),
+                    "status": package.get("status"),
+                    "eta": package.get("eta")
+                }
+                for _, package in upcoming[:SUMMARY_NEXT_ETAS]
+            ]
+        }
+
+    @staticmethod
+    def _user_packages_failed(status_code: int) -> Dict[str, Any]:
+        """Map a user packages endpoint status to a user-facing error"""
+        if status_code == 401:
+            return {
+                "success": False,
+                "message": "Authentication failed. Please log in again.",
+                "suggestion": "Your session may have expired. Please refresh and log in again."
+            }
+        return {
+            "success": False,
+            "message": f"Unable to fetch packages. Service returned status: {status_code}",
+            "suggestion": "Please try again later."
+        }
+
+
+def get_tool_bridge() -> ToolBridge:
+    """
+    Return the bridge that runs PackageLookupTool calls for synchronous callers.
+
+    The bridge tool shares the lookup cache, circuit breakers and retry
+    budget with the app, but coalesces on its own loop since SingleFlight
+    futures belong to one event loop.
+    """
+    global _tool_bridge
+    if _tool_bridge is None:
+        _tool_bridge = ToolBridge(
+            lambda client: PackageLookupTool(client=client, singleflight=SingleFlight()),
+            timeout=settings.tool_bridge_timeout,
+            name="package-lookup-bridge"
+        )
+    return _tool_bridge
+
+
+def shutdown_tool_bridge() -> None:
+    """Stop the bridge loop if it was started (called from the app shutdown hook)"""
+    if _tool_bridge is not None:
+        _tool_bridge.stop()
+
+
+def _call_sync(method: str, *args: Any) -> Dict[str, Any]:
+    try:
+        return get_tool_bridge().call(method, *args)
+    except TimeoutError:
+        return {
+            "success": False,
+            "message": "The package lookup took too long to respond.",
+            "suggestion": "The service might be busy. Please try again in a moment."
+        }
+
 
 # Tool functions that will be registered with Google Generative AI
 def find_package_by_id_sync(package_id: str, auth_token: Optional[str] = None) -> Dict[str, Any]:
     """Synchronous wrapper for find_package_by_id"""
-    tool = PackageLookupTool()
-    return asyncio.run(tool.find_package_by_id(package_id, auth_token))
+    return _call_sync("find_package_by_id", package_id, auth_token)
 
 
 def track_package_by_tracking_number_sync(tracking_number: str) -> Dict[str, Any]:
     """Synchronous wrapper for track_package_by_tracking_number"""
-    tool = PackageLookupTool()
-    return asyncio.run(tool.track_package_by_tracking_number(tracking_number))
+    return _call_sync("track_package_by_tracking_number", tracking_number)
 
 
 def get_user_packages_sync(user_id: str, auth_token: str) -> Dict[str, Any]:
     """Synchronous wrapper for get_user_packages"""
-    tool = PackageLookupTool()
-    return asyncio.run(tool.get_user_packages(user_id, auth_token))
\ No newline at end of file
+    return _call_sync("get_user_packages", user_id, auth_token)
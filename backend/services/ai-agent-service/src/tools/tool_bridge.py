@@ -0,0 +1,145 @@
+"""
+Run async tools from synchronous callers on one persistent background loop
+"""
+import asyncio
+import concurrent.futures
+import logging
+import threading
+from typing import Any, Callable, Dict, Optional
+import httpx
+from .http_client import create_http_client
+
+logger = logging.getLogger(__name__)
+
+
+class ToolBridge:
+    """
+    Owns a daemon thread running a long-lived event loop and a tool built on it.
+
+    Synchronous callers (e.g. functions registered for Gemini function
+    calling) submit tool coroutines to this loop instead of paying for a new
+    event loop and HTTP client on every call with asyncio.run(), which also
+    fails outright when invoked from a thread whose loop is already running.
+    The tool gets its own pooled HTTP client, created on the bridge loop
+    since httpx clients are bound to the loop they were opened on.
+
+    Calling from the app's event loop works but blocks that loop until the
+    tool returns, so async code should await the tool directly.
+    """
+
+    def __init__(self, tool_factory: Callable[[httpx.AsyncClient], Any], timeout: float = 30.0,
+                 name: str = "tool-bridge"):
+        self.tool_factory = tool_factory
+        self.timeout = timeout
+        self.name = name
+        self.tool: Any = None
+        self._client: Optional[httpx.AsyncClient] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._calls = 0
+        self._failures = 0
+        self._timeouts = 0
+        self._in_flight = 0
+
+    @property
+    def running(self) -> bool:
+        return self._loop is not None and self._loop.is_running()
+
+    def start(self) -> None:
+        """Start the loop thread and build the tool on it (no-op if already running)"""
+        with self._lock:
+            if self.running:
+                return
+            loop = asyncio.new_event_loop()
+            ready = threading.Event()
+
+            def run() -> None:
+                asyncio.set_event_loop(loop)
+                loop.call_soon(ready.set)
+                loop.run_forever()
+                loop.close()
+
+            self._thread = threading.Thread(target=run, name=self.name, daemon=True)
+            self._thread.start()
+            ready.wait()
+            self._loop = loop
+            asyncio.run_coroutine_threadsafe(self._open(), loop).result()
+            logger.info(f"Tool bridge '{self.name}' started")
+
+    async def _open(self) -> None:
+        self._client = create_http_client()
+        self.tool = self.tool_factory(self._client)
+
+    def submit(self, method: str, *args: Any, **kwargs: Any) -> "concurrent.futures.Future[Any]":
+        """Schedule tool.<method>(*args, **kwargs) on the bridge loop and return its future"""
+        if not self.running:
+            self.start()
+        if threading.current_thread() is self._thread:
+            raise RuntimeError("ToolBridge cannot be called from its own event loop; await the tool instead")
+        coroutine = getattr(self.tool, method)(*args, **kwargs)
+        future = asyncio.run_coroutine_threadsafe(coroutine, self._loop)
+        with self._lock:
+            self._calls += 1
+            self._in_flight += 1
+        future.add_done_callback(self._on_done)
+        return future
+
+    def call(self, method: str, *args: Any, timeout: Optional[float] = None, **kwargs: Any) -> Any:
+        """
+        Run tool.<method>(*args, **kwargs) on the bridge loop and wait for its result.
+
+        Raises:
+            TimeoutError: if the call does not finish within timeout seconds
+                (default: the bridge timeout); the call is cancelled
+        """
+        future = self.submit(method, *args, **kwargs)
+        try:
+            return future.result(timeout=self.timeout if timeout is None else timeout)
+        except concurrent.futures.TimeoutError:
+            future.cancel()
+            with self._lock:
+                self._timeouts += 1
+            raise TimeoutError(f"Tool call {method} timed out") from None
+
+    def _on_done(self, future: "concurrent.futures.Future[Any]") -> None:
+        with self._lock:
+            self._in_flight -= 1
+            if not future.cancelled() and future.exception() is not None:
+                self._failures += 1
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """Close the tool's HTTP client, stop the loop and join its thread"""
+        with self._lock:
+            loop, thread = self._loop, self._thread
+            self._loop = self._thread = None
+        if loop is None or not loop.is_running():
+            return
+        try:
+            asyncio.run_coroutine_threadsafe(self._close(), loop).result(timeout=timeout)
+        except Exception as e:
+            logger.warning(f"Error closing tool bridge '{self.name}': {str(e)}")
+        loop.call_soon_threadsafe(loop.stop)
+        if thread is not None:
+            thread.join(timeout=timeout)
+        logger.info(f"Tool bridge '{self.name}' stopped")
+
+    async def _close(self) -> None:
+        pending = [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+        if self._client is not None:
+            await self._client.aclose()
+        self._client = None
+        self.tool = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "running": self.running,
+                "calls": self._calls,
+                "failures": self._failures,
+                "timeouts": self._timeouts,
+                "in_flight": self._in_flight
+            }
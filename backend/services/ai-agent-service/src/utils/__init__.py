@@ -0,0 +1,9 @@
+"""
+Shared utilities for AI Agent Service
+"""
+
+from .cache import TTLCache
+from .circuit_breaker import CircuitBreaker, CircuitOpenError, RetryBudget
+from .singleflight import SingleFlight
+
+__all__ = ["TTLCache", "CircuitBreaker", "CircuitOpenError", "RetryBudget", "SingleFlight"]
@@ -0,0 +1,128 @@
+"""
+Bounded in-process cache with per-entry TTL and LRU eviction
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+
+class TTLCache:
+    """
+    LRU cache where every entry carries its own expiry.
+
+    Keys are usually tuples so related entries can be dropped together
+    with invalidate_prefix (e.g. every cached view of one package).
+    """
+
+    def __init__(self, max_entries: int = 1000, default_ttl: float = 30.0):
+        self.max_entries = max_entries
+        self.default_ttl = default_ttl
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._expirations = 0
+        self._invalidations = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Return a live entry (marking it most recently used) or default"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._misses += 1
+                return default
+
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                self._expirations += 1
+                self._misses += 1
+                return default
+
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        """Store an entry, evicting the least recently used ones beyond max_entries"""
+        ttl = self.default_ttl if ttl is None else ttl
+        if ttl <= 0 or self.max_entries <= 0:
+            return
+
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._evictions += 1
+
+    def invalidate(self, key: Hashable) -> bool:
+        """Drop a single entry; returns whether it was present"""
+        with self._lock:
+            if self._entries.pop(key, None) is None:
+                return False
+            self._invalidations += 1
+            return True
+
+    def invalidate_prefix(self, prefix: Tuple) -> int:
+        """Drop every tuple key starting with prefix; returns the number removed"""
+        size = len(prefix)
+        with self._lock:
+            keys = [
+                key for key in self._entries
+                if isinstance(key, tuple) and key[:size] == prefix
+            ]
+            for key in keys:
+                del self._entries[key]
+            self._invalidations += len(keys)
+            return len(keys)
+
+    def update_prefix(self, prefix: Tuple, update: Callable[[Any], Any]) -> int:
+        """
+        Replace the value of every live tuple key starting with prefix by update(value).
+
+        Entries keep their expiry and LRU position. Returns the number updated.
+        """
+        size = len(prefix)
+        now = time.monotonic()
+        updated = 0
+        with self._lock:
+            for key, (expires_at, value) in list(self._entries.items()):
+                if isinstance(key, tuple) and key[:size] == prefix and expires_at > now:
+                    self._entries[key] = (expires_at, update(value))
+                    updated += 1
+        return updated
+
+    def find_keys(self, prefix: Tuple, predicate: Callable[[Any], bool]) -> List[Hashable]:
+        """Return the tuple keys starting with prefix whose value satisfies predicate"""
+        size = len(prefix)
+        with self._lock:
+            return [
+                key for key, (_, value) in self._entries.items()
+                if isinstance(key, tuple) and key[:size] == prefix and predicate(value)
+            ]
+
+    def clear(self) -> None:
+        """Drop all entries"""
+        with self._lock:
+            self._invalidations += len(self._entries)
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Return size and hit/miss/eviction counters"""
+        lookups = self._hits + self._misses
+        return {
+            "size": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self._hits,
+            "misses": self._misses,
+            "hit_ratio": round(self._hits / lookups, 4) if lookups else 0.0,
+            "evictions": self._evictions,
+            "expirations": self._expirations,
+            "invalidations": self._invalidations
+        }
@@ -0,0 +1,177 @@
+"""
+Circuit breaking and retry budgeting for upstream calls
+"""
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Tuple
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling an upstream whose circuit is open"""
+
+    def __init__(self, name: str, retry_after: float):
+        super().__init__(f"{name} is temporarily unavailable (circuit open, retry in {retry_after:.0f}s)")
+        self.name = name
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """
+    Failure-rate circuit breaker over a sliding time window.
+
+    Closed: calls pass and outcomes are recorded. Once at least min_calls
+    outcomes fall within window seconds and the failed fraction reaches
+    failure_rate, the circuit opens and calls are refused for open_seconds.
+    Half-open: up to half_open_probes calls are let through; a success
+    closes the circuit, a failure opens it again. Thread-safe, so callers
+    on different event loops share one view of the upstream.
+    """
+
+    def __init__(self, name: str, failure_rate: float = 0.5, min_calls: int = 10, window: float = 30.0,
+                 open_seconds: float = 15.0, half_open_probes: int = 1):
+        self.name = name
+        self.failure_rate = failure_rate
+        self.min_calls = min_calls
+        self.window = window
+        self.open_seconds = open_seconds
+        self.half_open_probes = half_open_probes
+        self._state = CLOSED
+        self._opened_at = 0.0
+        self._probes = 0
+        self._outcomes: Deque[Tuple[float, bool]] = deque()
+        self._failures = 0
+        self._rejected = 0
+        self._opened = 0
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._current_state()
+
+    def _current_state(self) -> str:
+        if self._state == OPEN and time.monotonic() - self._opened_at >= self.open_seconds:
+            self._state = HALF_OPEN
+            self._probes = 0
+        return self._state
+
+    def allow(self) -> bool:
+        """Return whether a call may proceed; every allowed call must be followed by record_*()"""
+        with self._lock:
+            state = self._current_state()
+            if state == CLOSED:
+                return True
+            if state == HALF_OPEN and self._probes < self.half_open_probes:
+                self._probes += 1
+                return True
+            self._rejected += 1
+            return False
+
+    def retry_after(self) -> float:
+        """Seconds until an open circuit lets a probe through"""
+        if self._state != OPEN:
+            return 0.0
+        return max(0.0, self.open_seconds - (time.monotonic() - self._opened_at))
+
+    def record_success(self) -> None:
+        with self._lock:
+            if self._state == HALF_OPEN:
+                self._close()
+                return
+            self._record(False)
+
+    def record_failure(self) -> None:
+        with self._lock:
+            if self._state == HALF_OPEN:
+                self._open()
+                return
+            self._record(True)
+            if len(self._outcomes) >= self.min_calls and self._failures / len(self._outcomes) >= self.failure_rate:
+                self._open()
+
+    def record_abandoned(self) -> None:
+        """Release an allowed call that ended without an outcome (e.g. cancelled)"""
+        with self._lock:
+            if self._state == HALF_OPEN and self._probes > 0:
+                self._probes -= 1
+
+    def _record(self, failed: bool) -> None:
+        now = time.monotonic()
+        self._outcomes.append((now, failed))
+        self._failures += failed
+        while self._outcomes and now - self._outcomes[0][0] > self.window:
+            self._failures -= self._outcomes.popleft()[1]
+
+    def _open(self) -> None:
+        self._state = OPEN
+        self._opened_at = time.monotonic()
+        self._opened += 1
+
+    def _close(self) -> None:
+        self._state = CLOSED
+        self._outcomes.clear()
+        self._failures = 0
+
+    def get_stats(self) -> Dict[str, Any]:
+        calls = len(self._outcomes)
+        return {
+            "state": self.state,
+            "window_calls": calls,
+            "window_failure_rate": round(self._failures / calls, 3) if calls else 0.0,
+            "retry_after": round(self.retry_after(), 1),
+            "rejected": self._rejected,
+            "opened": self._opened
+        }
+
+
+class RetryBudget:
+    """
+    Caps retries at a fraction of recent requests across all upstreams.
+
+    A retry is allowed while retries in the last window seconds stay below
+    ratio * requests in the same window plus min_retries, so a broad outage
+    cannot multiply upstream load by the per-call retry count.
+    """
+
+    def __init__(self, ratio: float = 0.2, min_retries: int = 10, window: float = 10.0):
+        self.ratio = ratio
+        self.min_retries = min_retries
+        self.window = window
+        self._requests: Deque[float] = deque()
+        self._retries: Deque[float] = deque()
+        self._exhausted = 0
+        self._lock = threading.Lock()
+
+    def record_request(self) -> None:
+        now = time.monotonic()
+        with self._lock:
+            self._requests.append(now)
+            self._prune(now)
+
+    def try_spend(self) -> bool:
+        """Consume one retry if the budget allows it"""
+        now = time.monotonic()
+        with self._lock:
+            self._prune(now)
+            if len(self._retries) >= self.ratio * len(self._requests) + self.min_retries:
+                self._exhausted += 1
+                return False
+            self._retries.append(now)
+            return True
+
+    def _prune(self, now: float) -> None:
+        for events in (self._requests, self._retries):
+            while events and now - events[0] > self.window:
+                events.popleft()
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "window_requests": len(self._requests),
+            "window_retries": len(self._retries),
+            "exhausted": self._exhausted
+        }
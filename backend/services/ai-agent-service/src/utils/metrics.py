@@ -0,0 +1,164 @@
+"""
+Prometheus instruments shared across the service
+"""
+import time
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+from prometheus_client import Counter, Gauge, Histogram
+from prometheus_client.core import GaugeMetricFamily, CounterMetricFamily, REGISTRY
+
+# Request latencies span cache hits (sub-millisecond) to long Gemini generations
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+HTTP_REQUEST_DURATION = Histogram(
+    "ai_agent_http_request_duration_seconds",
+    "HTTP request latency by route template",
+    ["method", "route", "status"],
+    buckets=LATENCY_BUCKETS
+)
+HTTP_REQUESTS_IN_FLIGHT = Gauge(
+    "ai_agent_http_requests_in_flight",
+    "HTTP requests currently being served"
+)
+TOOL_CALL_DURATION = Histogram(
+    "ai_agent_tool_call_duration_seconds",
+    "Upstream gateway call latency by lookup endpoint and status code",
+    ["endpoint", "status_code"],
+    buckets=LATENCY_BUCKETS
+)
+GEMINI_CALL_DURATION = Histogram(
+    "ai_agent_gemini_call_duration_seconds",
+    "Gemini generation latency, excluding time queued for a slot",
+    ["mode", "outcome"],
+    buckets=LATENCY_BUCKETS
+)
+FUNCTION_CALL_DURATION = Histogram(
+    "ai_agent_function_call_duration_seconds",
+    "Latency of tool calls requested by the model through function calling",
+    ["function", "outcome"],
+    buckets=LATENCY_BUCKETS
+)
+MODEL_ROUND_TRIPS = Histogram(
+    "ai_agent_model_round_trips",
+    "Gemini round trips per function-calling turn",
+    buckets=(1, 2, 3, 4, 5, 6, 8, 10)
+)
+MESSAGE_DURATION = Histogram(
+    "ai_agent_message_duration_seconds",
+    "Agent message handling latency by how the answer was produced",
+    ["mode", "response_path"],
+    buckets=LATENCY_BUCKETS
+)
+
+ADMISSION_REJECTIONS = Counter(
+    "ai_agent_admission_rejections",
+    "Chat requests rejected with 429 by admission control",
+    ["scope", "reason"]
+)
+
+
+class StatsCollector:
+    """
+    Exposes existing get_stats() counters at scrape time.
+
+    Cache ratios, in-flight counts and queue depths are already tracked by
+    the components themselves; reading them on scrape keeps the request hot
+    path free of extra metric updates.
+    """
+
+    def __init__(self):
+        self._sources: Dict[str, Tuple[Callable[[], Dict[str, Any]], Optional[str]]] = {}
+
+    def register(self, name: str, get_stats: Callable[[], Dict[str, Any]], label: Optional[str] = None) -> None:
+        """
+        Expose the numeric fields of get_stats() as ai_agent_<name>_<field>.
+
+        With a label, get_stats() returns {label value: stats} and each field
+        becomes one metric with a sample per label value.
+        """
+        self._sources[name] = (get_stats, label)
+
+    def collect(self) -> Iterable[Any]:
+        for name, (get_stats, label) in list(self._sources.items()):
+            try:
+                stats = get_stats()
+            except Exception:
+                continue
+            rows = stats.items() if label else [(None, stats)]
+            families: Dict[str, Any] = {}
+            for label_value, row in rows:
+                for field, value in row.items():
+                    if field == "state" and isinstance(value, str):
+                        field, value = "state_code", STATE_CODES.get(value, -1)
+                    if isinstance(value, bool) or not isinstance(value, (int, float)):
+                        continue
+                    family = families.get(field)
+                    if family is None:
+                        kind = CounterMetricFamily if field in COUNTER_FIELDS else GaugeMetricFamily
+                        family = families[field] = kind(
+                            f"ai_agent_{name}_{field}", f"{name} {field.replace('_', ' ')}",
+                            labels=[label] if label else []
+                        )
+                    family.add_metric([label_value] if label else [], value)
+            yield from families.values()
+
+
+# Numeric encoding of circuit breaker states
+STATE_CODES = {"closed": 0, "half_open": 1, "open": 2}
+
+# get_stats() fields that only ever increase
+COUNTER_FIELDS = frozenset({
+    "hits", "misses", "evictions", "expirations", "invalidations", "executed", "coalesced",
+    "completed", "failed", "rejected", "opened", "exhausted", "admitted", "admitted_after_wait",
+    "calls", "failures", "timeouts", "received", "malformed", "batches", "entries_updated",
+    "entries_invalidated", "reconnects", "requests", "slo_misses", "fallbacks", "abandoned",
+    "resyncs"
+})
+
+stats_collector = StatsCollector()
+REGISTRY.register(stats_collector)
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware recording per-route latency and in-flight requests.
+
+    Routes are labelled by their path template (e.g. /tools/find-package)
+    so path parameters cannot blow up label cardinality. Streaming responses
+    are timed until the last body chunk is sent.
+    """
+
+    def __init__(self, app: Any):
+        self.app = app
+        self._templates: Optional[Dict[Any, str]] = None
+
+    async def __call__(self, scope: Dict[str, Any], receive: Callable, send: Callable) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status = {"code": 500}
+
+        async def send_wrapper(message: Dict[str, Any]) -> None:
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        HTTP_REQUESTS_IN_FLIGHT.inc()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            HTTP_REQUESTS_IN_FLIGHT.dec()
+            HTTP_REQUEST_DURATION.labels(
+                scope["method"], self._route(scope), str(status["code"])
+            ).observe(time.perf_counter() - started)
+
+    def _route(self, scope: Dict[str, Any]) -> str:
+        endpoint = scope.get("endpoint")
+        if endpoint is None:
+            return "unmatched"
+        if self._templates is None:
+            self._templates = {
+                getattr(route, "endpoint", None): route.path for route in scope["app"].routes
+            }
+        return self._templates.get(endpoint, "unmatched")
@@ -0,0 +1,175 @@
+"""
+Token-bucket admission control with a bounded wait queue
+"""
+import asyncio
+import math
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+from src.utils.metrics import ADMISSION_REJECTIONS
+
+
+class TokenBucket:
+    """
+    Classic token bucket refilled at rate tokens per second up to burst.
+
+    take() may drive the balance negative: that reserves a future token for
+    a caller who has decided to wait for it.
+    """
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+
+    def wait_time(self, now: float) -> float:
+        """Seconds until a token is available (0 if one is available now)"""
+        # now may predate a bucket created after the caller read the clock
+        elapsed = max(0.0, now - self.updated)
+        self.tokens = min(self.burst, self.tokens + elapsed * self.rate)
+        self.updated += elapsed
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+    def take(self) -> None:
+        self.tokens -= 1
+
+    def give_back(self) -> None:
+        """Return a token taken by a caller who stopped waiting for it"""
+        self.tokens = min(self.burst, self.tokens + 1)
+
+
+class AdmissionRejected(Exception):
+    """Raised when a request cannot be admitted within the allowed wait"""
+
+    def __init__(self, scope: str, reason: str, retry_after: float):
+        super().__init__(f"Too many requests ({scope} limit, {reason})")
+        self.scope = scope
+        self.reason = reason
+        self.retry_after = retry_after
+
+    @property
+    def retry_after_header(self) -> str:
+        """Retry-After value in whole seconds"""
+        return str(max(1, math.ceil(self.retry_after)))
+
+
+class AdmissionController:
+    """
+    Admits requests against a global, a per-caller and a per-address token bucket.
+
+    The caller is the user ID, or the client address for requests without
+    one, so anonymous traffic is limited like any single user. Since user
+    IDs are supplied by the client, every request also draws from a bucket
+    for its client address with its own (larger) rate, which bounds what one
+    address can spend by rotating user IDs.
+
+    A request that finds every bucket non-empty proceeds immediately.
+    Otherwise it reserves its tokens and waits for them, provided the wait
+    is at most max_wait seconds and fewer than max_queue requests are
+    already waiting; if not, it is rejected straight away so clients can
+    back off instead of piling up. A waiting request that is cancelled
+    (e.g. the client disconnected) gives its reserved tokens back. Buckets
+    are kept for the max_users most recently seen callers and addresses.
+    Intended for use from a single event loop.
+    """
+
+    def __init__(self, global_rate: float, global_burst: float, user_rate: float, user_burst: float,
+                 client_rate: float = 10.0, client_burst: float = 20.0,
+                 max_queue: int = 50, max_wait: float = 2.0, max_users: int = 10000):
+        self.global_bucket = TokenBucket(global_rate, global_burst)
+        self.user_rate = user_rate
+        self.user_burst = user_burst
+        self.client_rate = client_rate
+        self.client_burst = client_burst
+        self.max_queue = max_queue
+        self.max_wait = max_wait
+        self.max_users = max_users
+        self._users: "OrderedDict[str, TokenBucket]" = OrderedDict()
+        self._clients: "OrderedDict[str, TokenBucket]" = OrderedDict()
+        self._queued = 0
+        self._admitted = 0
+        self._waited = 0
+        self._abandoned = 0
+        self._rejected: Dict[str, int] = {}
+
+    async def admit(self, user_id: Optional[str] = None, client: Optional[str] = None) -> float:
+        """
+        Wait for admission.
+
+        Args:
+            user_id: Caller's user ID, if any
+            client: Caller's network address
+
+        Returns:
+            Seconds spent waiting in the queue
+
+        Raises:
+            AdmissionRejected: if the request would wait too long or the queue is full
+        """
+        now = time.monotonic()
+        buckets: List[Tuple[str, TokenBucket]] = [("global", self.global_bucket)]
+        if user_id:
+            buckets.append(("user", self._bucket(self._users, user_id, self.user_rate, self.user_burst)))
+        elif client:
+            buckets.append(("user", self._bucket(self._users, f"client:{client}", self.user_rate, self.user_burst)))
+        if client:
+            buckets.append(("client", self._bucket(self._clients, client, self.client_rate, self.client_burst)))
+        waits = [(bucket.wait_time(now), scope) for scope, bucket in buckets]
+        wait, scope = max(waits, key=lambda item: item[0])
+
+        if wait > 0:
+            if self._queued >= self.max_queue:
+                self._reject(scope, "queue_full", wait)
+            if wait > self.max_wait:
+                self._reject(scope, "rate_limited", wait)
+
+        for _, bucket in buckets:
+            bucket.take()
+        if wait <= 0:
+            self._admitted += 1
+            return 0.0
+
+        self._queued += 1
+        try:
+            await asyncio.sleep(wait)
+        except asyncio.CancelledError:
+            for _, bucket in buckets:
+                bucket.give_back()
+            self._abandoned += 1
+            raise
+        finally:
+            self._queued -= 1
+        self._admitted += 1
+        self._waited += 1
+        return wait
+
+    def _bucket(self, buckets: "OrderedDict[str, TokenBucket]", key: str, rate: float,
+                burst: float) -> TokenBucket:
+        bucket = buckets.get(key)
+        if bucket is None:
+            bucket = buckets[key] = TokenBucket(rate, burst)
+            while len(buckets) > self.max_users:
+                buckets.popitem(last=False)
+        else:
+            buckets.move_to_end(key)
+        return bucket
+
+    def _reject(self, scope: str, reason: str, retry_after: float) -> None:
+        key = f"{scope}_{reason}"
+        self._rejected[key] = self._rejected.get(key, 0) + 1
+        ADMISSION_REJECTIONS.labels(scope, reason).inc()
+        raise AdmissionRejected(scope, reason, retry_after)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "queue_depth": self._queued,
+            "max_queue": self.max_queue,
+            "tracked_users": len(self._users),
+            "tracked_clients": len(self._clients),
+            "admitted": self._admitted,
+            "admitted_after_wait": self._waited,
+            "abandoned": self._abandoned,
+            "rejected": sum(self._rejected.values()),
+            "rejected_by_reason": dict(self._rejected)
+        }
@@ -0,0 +1,49 @@
+"""
+Single-flight coalescing of concurrent identical async calls
+"""
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+
+class SingleFlight:
+    """
+    Run at most one call per key at a time.
+
+    Callers arriving while a call for the same key is in flight await that
+    call instead of starting their own, and share its result or exception.
+    The shared call is shielded, so one caller being cancelled does not
+    cancel it for the others. Intended for use from a single event loop.
+    """
+
+    def __init__(self):
+        self._calls: Dict[Hashable, "asyncio.Future[Any]"] = {}
+        self._executed = 0
+        self._coalesced = 0
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """Await fn() for key, joining an in-flight call for the same key if there is one"""
+        call = self._calls.get(key)
+        if call is None:
+            call = asyncio.ensure_future(fn())
+            self._calls[key] = call
+            self._executed += 1
+            call.add_done_callback(lambda done: self._forget(key, done))
+        else:
+            self._coalesced += 1
+
+        return await asyncio.shield(call)
+
+    def _forget(self, key: Hashable, call: "asyncio.Future[Any]") -> None:
+        if self._calls.get(key) is call:
+            del self._calls[key]
+        # Mark the exception as retrieved in case every waiter was cancelled
+        if not call.cancelled():
+            call.exception()
+
+    def get_stats(self) -> Dict[str, int]:
+        """Return executed/coalesced call counters and the number in flight"""
+        return {
+            "in_flight": len(self._calls),
+            "executed": self._executed,
+            "coalesced": self._coalesced
+        }
@@ -0,0 +1,60 @@
+"""
+Per-request phase timings shared through a context variable
+"""
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, Optional
+
+
+class PhaseTimer:
+    """
+    Accumulates monotonic durations of named request phases.
+
+    Phases are reported in the order they first ran; a phase entered more
+    than once (e.g. several tool batches) accumulates its time.
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.phases: Dict[str, float] = {}
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """Time the enclosed block as part of the named phase"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, (time.perf_counter() - started) * 1000)
+
+    def add(self, name: str, duration_ms: float) -> None:
+        self.phases[name] = self.phases.get(name, 0.0) + duration_ms
+
+    def elapsed_ms(self) -> float:
+        return (time.perf_counter() - self.started) * 1000
+
+    def as_dict(self) -> Dict[str, float]:
+        """Phase durations in milliseconds plus the total elapsed so far"""
+        timings = {name: round(duration, 2) for name, duration in self.phases.items()}
+        timings["total"] = round(self.elapsed_ms(), 2)
+        return timings
+
+    def server_timing(self) -> str:
+        """Format the timings as a Server-Timing header value"""
+        return ", ".join(f"{name};dur={duration:.1f}" for name, duration in self.as_dict().items())
+
+
+_request_timer: ContextVar[Optional[PhaseTimer]] = ContextVar("request_timer", default=None)
+
+
+def start_timer() -> PhaseTimer:
+    """Start timing the current request; code awaited from here records into the same timer"""
+    timer = PhaseTimer()
+    _request_timer.set(timer)
+    return timer
+
+
+def current_timer() -> Optional[PhaseTimer]:
+    """Return the timer of the current request, if one was started"""
+    return _request_timer.get()
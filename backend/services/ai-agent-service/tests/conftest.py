@@ -0,0 +1,10 @@
+"""
+Shared test setup: import the service as `src` and keep it off external backends
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("CONVERSATION_STORE_BACKEND", "memory")
+os.environ.setdefault("PACKAGE_EVENTS_BROKER", "memory")
+os.environ.setdefault("GOOGLE_AI_API_KEY", "test")
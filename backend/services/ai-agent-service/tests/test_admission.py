@@ -0,0 +1,89 @@
+"""
+AdmissionController token buckets and the chat routes they guard
+"""
+import asyncio
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from src.config import settings
+from src.dependencies import get_chat_service, registry
+from src.models.schemas import ChatSessionResponse
+from src.routes import chat
+from src.utils.rate_limit import AdmissionController, AdmissionRejected
+
+
+def controller(**overrides) -> AdmissionController:
+    options = dict(global_rate=100, global_burst=100, user_rate=1, user_burst=2,
+                   client_rate=1, client_burst=4, max_queue=10, max_wait=0.0)
+    options.update(overrides)
+    return AdmissionController(**options)
+
+
+def test_anonymous_callers_are_limited_per_address():
+    async def scenario():
+        admission = controller()
+        await admission.admit(client="10.0.0.1")
+        await admission.admit(client="10.0.0.1")
+        with pytest.raises(AdmissionRejected) as rejected:
+            await admission.admit(client="10.0.0.1")
+        assert rejected.value.scope == "user"
+
+        await admission.admit(client="10.0.0.2")
+
+    asyncio.run(scenario())
+
+
+def test_rotating_user_ids_is_limited_per_address():
+    async def scenario():
+        admission = controller()
+        for i in range(4):
+            await admission.admit(user_id=f"user{i}", client="10.0.0.1")
+        with pytest.raises(AdmissionRejected) as rejected:
+            await admission.admit(user_id="user4", client="10.0.0.1")
+        assert rejected.value.scope == "client"
+
+    asyncio.run(scenario())
+
+
+def test_cancelled_waiter_gives_its_tokens_back():
+    async def scenario():
+        admission = controller(user_rate=5, user_burst=1, max_wait=5.0)
+        await admission.admit(user_id="u1", client="10.0.0.1")
+
+        waiter = asyncio.create_task(admission.admit(user_id="u1", client="10.0.0.1"))
+        await asyncio.sleep(0.01)
+        assert admission.get_stats()["queue_depth"] == 1
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+
+        stats = admission.get_stats()
+        assert stats["queue_depth"] == 0
+        assert stats["abandoned"] == 1
+        assert stats["admitted"] == 1
+        # The next caller waits only for the first request's token, not the abandoned one
+        assert await admission.admit(user_id="u1", client="10.0.0.1") <= 0.2
+
+    asyncio.run(scenario())
+
+
+def test_session_warm_up_goes_through_admission(monkeypatch):
+    class SessionService:
+        def open_session(self, request):
+            return ChatSessionResponse(success=True, prefetch="scheduled")
+
+    app = FastAPI()
+    app.include_router(chat.router)
+    app.dependency_overrides[get_chat_service] = SessionService
+    monkeypatch.setattr(settings, "admission_enabled", True)
+    monkeypatch.setattr(registry, "_admission", controller(user_burst=1))
+
+    with TestClient(app) as client:
+        body = {"user_id": "u1", "auth_token": "token"}
+        first = client.post("/chat/session", json=body)
+        second = client.post("/chat/session", json=body)
+
+    assert first.status_code == 202
+    assert second.status_code == 429 and "Retry-After" in second.headers
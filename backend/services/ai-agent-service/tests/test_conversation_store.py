@@ -0,0 +1,208 @@
+"""
+ConversationStore against the in-memory backend
+"""
+import asyncio
+from typing import List
+
+import pytest
+
+from src.models.schemas import ChatMessage, MessageRole
+from src.services.conversation_store import ConversationStore, InMemoryConversationBackend
+
+
+def user(content: str) -> ChatMessage:
+    return ChatMessage(role=MessageRole.USER, content=content)
+
+
+def contents(messages: List[ChatMessage]) -> List[str]:
+    return [m.content for m in messages]
+
+
+class FlakyBackend(InMemoryConversationBackend):
+    """Fails the next `failures` writes, optionally pausing each write for `delay` seconds"""
+
+    def __init__(self, failures: int = 0, delay: float = 0.0):
+        super().__init__()
+        self.failures = failures
+        self.delay = delay
+        self.writes = 0
+
+    async def append_batch(self, batch, max_messages):
+        self.writes += 1
+        await asyncio.sleep(self.delay)
+        if self.failures:
+            self.failures -= 1
+            raise ConnectionError("backend unavailable")
+        await super().append_batch(batch, max_messages)
+
+
+def test_window_is_capped_in_memory_and_backend():
+    async def scenario():
+        backend = InMemoryConversationBackend()
+        store = ConversationStore(backend, max_messages=3)
+        for i in range(5):
+            await store.append("c1", "u1", [user(str(i))])
+
+        assert contents(await store.get_history("c1", "u1")) == ["2", "3", "4"]
+        assert contents(backend.conversations["c1"].messages) == ["2", "3", "4"]
+
+    asyncio.run(scenario())
+
+
+def test_write_behind_flushes_on_batch_size():
+    async def scenario():
+        backend = InMemoryConversationBackend()
+        store = ConversationStore(backend, flush_interval=60.0, flush_batch_size=3)
+        await store.start()
+        try:
+            await store.append("c1", "u1", [user("1"), user("2")])
+            assert "c1" not in backend.conversations
+            assert store.get_stats()["pending_messages"] == 2
+            assert contents(await store.get_history("c1", "u1")) == ["1", "2"]
+
+            await store.append("c1", "u1", [user("3")])
+            await asyncio.sleep(0.05)
+            assert contents(backend.conversations["c1"].messages) == ["1", "2", "3"]
+            assert store.get_stats()["pending_messages"] == 0
+        finally:
+            await store.stop()
+
+    asyncio.run(scenario())
+
+
+def test_failed_flush_is_retried_in_order():
+    async def scenario():
+        backend = FlakyBackend(failures=1)
+        store = ConversationStore(backend, flush_interval=60.0)
+        await store.start()
+        try:
+            await store.append("c1", "u1", [user("1")])
+            await store.flush()
+            assert "c1" not in backend.conversations
+            assert store.get_stats()["pending_messages"] == 1
+
+            await store.append("c1", "u1", [user("2")])
+            await store.flush()
+            assert contents(backend.conversations["c1"].messages) == ["1", "2"]
+            assert backend.writes == 2
+        finally:
+            await store.stop()
+
+    asyncio.run(scenario())
+
+
+def test_stop_persists_pending_messages():
+    async def scenario():
+        backend = InMemoryConversationBackend()
+        store = ConversationStore(backend, flush_interval=60.0)
+        await store.start()
+        await store.append("c1", "u1", [user("1")])
+        await store.stop()
+        assert contents(backend.conversations["c1"].messages) == ["1"]
+
+    asyncio.run(scenario())
+
+
+def test_append_after_eviction_keeps_stored_history():
+    async def scenario():
+        backend = InMemoryConversationBackend()
+        store = ConversationStore(backend, hot_max_entries=1)
+        await store.append("a", "u1", [user("1")])
+        await store.append("b", "u1", [user("x")])
+        await store.append("a", "u1", [user("2")])
+
+        assert contents(await store.get_history("a", "u1")) == ["1", "2"]
+        assert contents(backend.conversations["a"].messages) == ["1", "2"]
+
+    asyncio.run(scenario())
+
+
+def test_history_of_evicted_unflushed_conversation_comes_from_pending():
+    async def scenario():
+        backend = InMemoryConversationBackend()
+        store = ConversationStore(backend, hot_max_entries=1, flush_interval=60.0)
+        await store.start()
+        try:
+            await store.append("a", "u1", [user("1")])
+            await store.append("b", "u1", [user("x")])
+            assert contents(await store.get_history("a", "u1")) == ["1"]
+        finally:
+            await store.stop()
+
+    asyncio.run(scenario())
+
+
+def test_other_users_cannot_read_append_or_delete():
+    async def scenario():
+        backend = InMemoryConversationBackend()
+        store = ConversationStore(backend, hot_max_entries=1)
+        await store.append("c1", "owner", [user("1")])
+        await store.append("c2", "owner", [user("1")])
+
+        with pytest.raises(PermissionError):
+            await store.get_history("c1", "intruder")
+        with pytest.raises(PermissionError):
+            await store.append("c1", "intruder", [user("2")])
+        with pytest.raises(PermissionError):
+            await store.delete("c1", "intruder")
+        assert contents(backend.conversations["c1"].messages) == ["1"]
+
+        assert await store.delete_user("intruder") == 0
+        assert set(backend.conversations) == {"c1", "c2"}
+
+    asyncio.run(scenario())
+
+
+def test_reset_deletes_only_the_callers_conversations():
+    async def scenario():
+        backend = InMemoryConversationBackend()
+        store = ConversationStore(backend)
+        await store.append("c1", "u1", [user("1")])
+        await store.append("c2", "u1", [user("1")])
+        await store.append("c3", "u2", [user("1")])
+
+        assert await store.delete("c1", "u1") == 1
+        assert await store.delete("c1", "u1") == 0
+        assert await store.get_history("c1", "u1") == []
+
+        assert await store.delete_user("u1") == 1
+        assert set(backend.conversations) == {"c3"}
+
+    asyncio.run(scenario())
+
+
+def test_delete_counts_conversations_not_yet_flushed():
+    async def scenario():
+        backend = InMemoryConversationBackend()
+        store = ConversationStore(backend, flush_interval=60.0)
+        await store.start()
+        try:
+            await store.append("c1", "u1", [user("1")])
+            await store.append("c2", "u1", [user("1")])
+            assert await store.delete("c1", "u1") == 1
+            assert await store.delete_user("u1") == 1
+            await store.flush()
+            assert backend.conversations == {}
+        finally:
+            await store.stop()
+
+    asyncio.run(scenario())
+
+
+def test_delete_waits_for_in_flight_flush():
+    async def scenario():
+        backend = FlakyBackend(delay=0.1)
+        store = ConversationStore(backend, flush_interval=60.0)
+        await store.start()
+        try:
+            await store.append("c1", "u1", [user("1")])
+            flush = asyncio.create_task(store.flush())
+            await asyncio.sleep(0.01)
+
+            assert await store.delete("c1", "u1") == 1
+            await flush
+            assert "c1" not in backend.conversations
+        finally:
+            await store.stop()
+
+    asyncio.run(scenario())
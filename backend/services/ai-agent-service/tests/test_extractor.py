@@ -0,0 +1,49 @@
+"""
+Single-pass intent and entity extraction
+"""
+from src.agents.extractor import Entity, EntityType, Intent, MessageExtractor, default_extractor
+
+
+def test_attribute_question_about_a_package_id():
+    extraction = default_extractor.extract("What is the status of PKG175800611738388?")
+
+    assert extraction.intent == Intent.PACKAGE_STATUS
+    assert extraction.confidence == 0.95
+    assert extraction.package_ids == ["PKG175800611738388"]
+    assert extraction.needs_tools
+
+
+def test_every_entity_is_found_once_in_message_order():
+    extraction = default_extractor.extract("Track TR123456789, pkg42 and 507f1f77bcf86cd799439011 (tr123456789 again)")
+
+    assert extraction.entities == [
+        Entity(EntityType.TRACKING_NUMBER, "TR123456789"),
+        Entity(EntityType.PACKAGE_ID, "PKG42"),
+        Entity(EntityType.OBJECT_ID, "507f1f77bcf86cd799439011")
+    ]
+    assert extraction.intent == Intent.FIND_PACKAGE
+    assert extraction.tracking_numbers == ["TR123456789"]
+
+
+def test_number_qualified_phrases_need_a_number():
+    assert not default_extractor.extract("where is the nearest office").needs_tools
+    assert not default_extractor.extract("status").needs_tools
+
+    extraction = default_extractor.extract("where is order 12345")
+    assert extraction.intents == [Intent.PACKAGE_LOCATION]
+    assert extraction.confidence == 0.6
+
+
+def test_user_package_requests_and_general_questions():
+    mine = default_extractor.extract("Show me all my packages")
+    general = default_extractor.extract("How do I create a new package?")
+
+    assert (mine.intent, mine.confidence, mine.wants_user_packages) == (Intent.USER_PACKAGES, 0.8, True)
+    assert (general.intent, general.confidence, general.needs_tools) == (Intent.GENERAL, 0.5, False)
+
+
+def test_phrases_match_on_word_boundaries_and_can_overlap():
+    extractor = MessageExtractor({"packages": Intent.FIND_PACKAGE, "my packages": Intent.USER_PACKAGES})
+
+    assert extractor.extract("list subpackages").intents == []
+    assert extractor.extract("show my packages").intents == [Intent.USER_PACKAGES, Intent.FIND_PACKAGE]
@@ -0,0 +1,129 @@
+"""
+Native function-calling turns driven by a scripted model
+"""
+import asyncio
+import copy
+import google.generativeai as genai
+import httpx
+import pytest
+
+from src.agents.package_assistant import PackageAssistantAgent
+from src.config import settings
+from src.tools.package_lookup import PackageLookupTool
+from src.utils.cache import TTLCache
+from src.utils.singleflight import SingleFlight
+
+PACKAGE = {"_id": "65f0c0ffee", "trackingId": "PKG123", "status": "in transit"}
+
+
+class TextResponse:
+    candidates = []
+
+    def __init__(self, text):
+        self.text = text
+
+
+def calls_response(*calls):
+    """A model response requesting each (name, args) function call"""
+    return genai.protos.GenerateContentResponse(candidates=[genai.protos.Candidate(
+        content=genai.protos.Content(role="model", parts=[
+            genai.protos.Part(function_call=genai.protos.FunctionCall(name=name, args=args))
+            for name, args in calls
+        ])
+    )])
+
+
+class ScriptedModel:
+    """Answers generate_content_async with the scripted responses in order"""
+
+    model_name = "models/scripted"
+
+    def __init__(self, responses):
+        self.responses = list(responses)
+        self.tool_configs = []
+
+    async def generate_content_async(self, contents, tools=None, tool_config=None):
+        self.tool_configs.append(copy.deepcopy(tool_config))
+        if tool_config is not None:
+            # The SDK converts the config in place, leaving the caller's dict empty
+            tool_config.clear()
+        return self.responses.pop(0)
+
+
+@pytest.fixture(autouse=True)
+def function_calling(monkeypatch):
+    monkeypatch.setattr(settings, "agent_function_calling", True)
+    monkeypatch.setattr(settings, "router_enabled", False)
+    monkeypatch.setattr(settings, "response_cache_enabled", False)
+
+
+def make_agent(responses):
+    requests = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request.url.path)
+        return httpx.Response(200, json=PACKAGE)
+
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    tool = PackageLookupTool(client=client, cache=TTLCache(), singleflight=SingleFlight())
+    model = ScriptedModel(responses)
+    return PackageAssistantAgent(package_tool=tool, model=model), model, requests
+
+
+def test_function_calls_run_and_their_results_reach_the_answer():
+    async def scenario():
+        agent, _, requests = make_agent([
+            calls_response(("track_package_by_tracking_number", {"tracking_number": "PKG123"})),
+            TextResponse("PKG123 is in transit.")
+        ])
+        result = await agent.handle_message("Where is PKG123?")
+
+        assert result["response"] == "PKG123 is in transit."
+        assert result["tools_used"] == ["track_package_by_tracking_number"]
+        assert result["metadata"]["model_round_trips"] == 2
+        assert result["metadata"]["tool_calls"] == 1
+        assert requests == ["/api/track/PKG123"]
+
+    asyncio.run(scenario())
+
+
+def test_calls_over_the_budget_are_refused_and_not_reported(monkeypatch):
+    monkeypatch.setattr(settings, "agent_max_tool_calls", 1)
+
+    async def scenario():
+        agent, _, requests = make_agent([
+            calls_response(
+                ("track_package_by_tracking_number", {"tracking_number": "PKG123"}),
+                ("find_package_by_id", {"package_id": "65f0c0ffee"})
+            ),
+            TextResponse("PKG123 is in transit.")
+        ])
+        events = [event async for event in agent.stream_message("Where are PKG123 and 65f0c0ffee?")]
+        tool_result = next(event for event in events if event["event"] == "tool_result")
+        done = events[-1]["data"]
+
+        assert tool_result["data"]["tools_used"] == ["track_package_by_tracking_number"]
+        assert done["tools_used"] == ["track_package_by_tracking_number"]
+        assert done["metadata"]["tool_calls"] == 1
+        assert requests == ["/api/track/PKG123"]
+
+    asyncio.run(scenario())
+
+
+def test_last_round_trip_disables_function_calling_on_every_turn(monkeypatch):
+    monkeypatch.setattr(settings, "agent_max_model_round_trips", 2)
+    lookup = ("track_package_by_tracking_number", {"tracking_number": "PKG123"})
+
+    async def scenario():
+        agent, model, _ = make_agent([
+            calls_response(lookup), TextResponse("First."),
+            calls_response(lookup), TextResponse("Second.")
+        ])
+        first = await agent.handle_message("Where is PKG123?")
+        second = await agent.handle_message("Where is PKG123 now?")
+
+        assert (first["response"], second["response"]) == ("First.", "Second.")
+        no_calls = {"function_calling_config": {"mode": "none"}}
+        assert model.tool_configs == [None, no_calls, None, no_calls]
+
+    asyncio.run(scenario())
@@ -0,0 +1,77 @@
+"""
+Hedged find_package_by_id: both endpoints at once, the loser really cancelled
+"""
+import asyncio
+
+import httpx
+import pytest
+
+from src.config import settings
+from src.tools.package_lookup import PACKAGE_ENDPOINT, TRACK_ENDPOINT, USER_PACKAGES_ENDPOINT, PackageLookupTool
+from src.utils.cache import TTLCache
+from src.utils.circuit_breaker import CircuitBreaker
+from src.utils.singleflight import SingleFlight
+
+PACKAGE = {"_id": "65f0c0ffee", "trackingId": "PKG123", "status": "in transit"}
+
+
+@pytest.fixture(autouse=True)
+def hedged(monkeypatch):
+    monkeypatch.setattr(settings, "lookup_hedged_requests", True)
+
+
+def make_tool(delays, statuses=None):
+    """Gateway answering each endpoint ("track"/"package") after its delay"""
+    statuses = statuses or {}
+    finished = []
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        endpoint = TRACK_ENDPOINT if request.url.path.startswith("/api/track/") else PACKAGE_ENDPOINT
+        await asyncio.sleep(delays[endpoint])
+        finished.append(endpoint)
+        return httpx.Response(statuses.get(endpoint, 200), json=PACKAGE)
+
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    breakers = {
+        endpoint: CircuitBreaker(endpoint)
+        for endpoint in (TRACK_ENDPOINT, PACKAGE_ENDPOINT, USER_PACKAGES_ENDPOINT)
+    }
+    tool = PackageLookupTool(client=client, cache=TTLCache(), singleflight=SingleFlight(), breakers=breakers)
+    return tool, finished
+
+
+def test_fastest_success_wins_and_the_loser_is_cancelled():
+    async def scenario():
+        tool, finished = make_tool({TRACK_ENDPOINT: 0.1, PACKAGE_ENDPOINT: 0.01})
+        result = await tool.find_package_by_id("65f0c0ffee", "token")
+        await asyncio.sleep(0.2)
+
+        assert result["lookup"]["strategy"] == "hedged" and result["lookup"]["source"] == PACKAGE_ENDPOINT
+        assert finished == [PACKAGE_ENDPOINT]
+        assert tool.breakers[TRACK_ENDPOINT].get_stats()["window_calls"] == 0
+        assert tool.cache.find_keys((TRACK_ENDPOINT,), lambda value: True) == []
+        assert len(tool.cache) == 1
+
+    asyncio.run(scenario())
+
+
+def test_failed_fast_answer_waits_for_the_other_endpoint():
+    async def scenario():
+        tool, finished = make_tool({TRACK_ENDPOINT: 0.05, PACKAGE_ENDPOINT: 0.01}, {PACKAGE_ENDPOINT: 404})
+        result = await tool.find_package_by_id("65f0c0ffee", "token")
+
+        assert result["success"] and result["lookup"]["source"] == TRACK_ENDPOINT
+        assert finished == [PACKAGE_ENDPOINT, TRACK_ENDPOINT]
+
+    asyncio.run(scenario())
+
+
+def test_authenticated_outcome_decides_the_error_when_both_fail():
+    async def scenario():
+        tool, _ = make_tool({TRACK_ENDPOINT: 0.01, PACKAGE_ENDPOINT: 0.02}, {TRACK_ENDPOINT: 404, PACKAGE_ENDPOINT: 401})
+        result = await tool.find_package_by_id("65f0c0ffee", "token")
+
+        assert not result["success"]
+        assert result["message"].startswith("Authentication required")
+
+    asyncio.run(scenario())
@@ -0,0 +1,126 @@
+"""
+Single-flight coalescing of gateway lookups and the TTL cache behind it
+"""
+import asyncio
+import time
+
+import httpx
+
+from src.tools.package_lookup import PackageLookupTool
+from src.utils.cache import TTLCache
+from src.utils.singleflight import SingleFlight
+
+PACKAGE = {"_id": "65f0c0ffee", "trackingId": "PKG123", "status": "in transit"}
+
+
+def make_tool(status_code=200, delay=0.05):
+    requests = []
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        await asyncio.sleep(delay)
+        return httpx.Response(status_code, json=PACKAGE)
+
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    tool = PackageLookupTool(client=client, cache=TTLCache(), singleflight=SingleFlight())
+    return tool, requests
+
+
+def test_concurrent_identical_lookups_share_one_request_and_its_cached_result():
+    async def scenario():
+        tool, requests = make_tool()
+        results = await asyncio.gather(*(tool.track_package_by_tracking_number("PKG123") for _ in range(50)))
+        later = await tool.track_package_by_tracking_number("PKG123")
+
+        assert all(result["success"] for result in results + [later])
+        assert len(requests) == 1
+        assert tool.singleflight.get_stats() == {"in_flight": 0, "executed": 1, "coalesced": 49}
+        assert tool.cache.get_stats()["hits"] == 1
+
+    asyncio.run(scenario())
+
+
+def test_authenticated_lookups_are_coalesced_per_token():
+    async def scenario():
+        tool, requests = make_tool()
+        await asyncio.gather(
+            tool._fetch_package("65f0c0ffee", "token-a"),
+            tool._fetch_package("65f0c0ffee", "token-a"),
+            tool._fetch_package("65f0c0ffee", "token-b")
+        )
+
+        assert sorted(request.headers["Authorization"] for request in requests) == [
+            "Bearer token-a", "Bearer token-b"
+        ]
+
+    asyncio.run(scenario())
+
+
+def test_failures_are_shared_but_never_cached():
+    async def scenario():
+        tool, requests = make_tool(status_code=404)
+        results = await asyncio.gather(*(tool._fetch_tracking("PKG123") for _ in range(5)))
+        await tool._fetch_tracking("PKG123")
+
+        assert results == [(404, None)] * 5
+        assert len(requests) == 2
+        assert len(tool.cache) == 0
+
+    asyncio.run(scenario())
+
+
+def test_cancelled_caller_does_not_cancel_the_shared_request():
+    async def scenario():
+        tool, requests = make_tool()
+        impatient = asyncio.create_task(tool._fetch_tracking("PKG123"))
+        patient = asyncio.create_task(tool._fetch_tracking("PKG123"))
+        await asyncio.sleep(0.01)
+        impatient.cancel()
+
+        assert await patient == (200, PACKAGE)
+        assert impatient.cancelled()
+        assert len(requests) == 1
+
+    asyncio.run(scenario())
+
+
+def test_entries_expire_and_least_recently_used_are_evicted():
+    cache = TTLCache(max_entries=2)
+    cache.set("a", 1, ttl=60)
+    cache.set("b", 2, ttl=0.01)
+    cache.get("a")
+    cache.set("c", 3, ttl=60)
+    time.sleep(0.02)
+    cache.set("d", 4, ttl=60)
+
+    assert (cache.get("a"), cache.get("b"), cache.get("c"), cache.get("d")) == (None, None, 3, 4)
+    assert cache.get_stats()["evictions"] == 2
+
+
+def test_update_prefix_keeps_expiry_and_skips_expired_entries():
+    cache = TTLCache()
+    cache.set(("track", "PKG1"), {"status": "processing"}, ttl=0.05)
+    cache.set(("track", "PKG2"), {"status": "processing"}, ttl=0.01)
+    cache.set(("package", "PKG1", "scope"), {"status": "processing"}, ttl=60)
+    time.sleep(0.02)
+
+    updated = cache.update_prefix(("track",), lambda value: {**value, "status": "delivered"})
+
+    assert updated == 1
+    assert cache.get(("track", "PKG1")) == {"status": "delivered"}
+    assert cache.get(("package", "PKG1", "scope")) == {"status": "processing"}
+    time.sleep(0.04)
+    assert cache.get(("track", "PKG1")) is None
+
+
+def test_find_keys_matches_prefix_and_predicate():
+    cache = TTLCache()
+    cache.set(("track", "PKG1"), {"status": "delivered"})
+    cache.set(("track", "PKG2"), {"status": "processing"})
+    cache.set(("package", "PKG3", "scope"), {"status": "delivered"})
+    cache.set("plain", {"status": "delivered"})
+
+    delivered = lambda value: value["status"] == "delivered"
+
+    assert cache.find_keys(("track",), delivered) == [("track", "PKG1")]
+    assert sorted(cache.find_keys((), delivered)) == [("package", "PKG3", "scope"), ("track", "PKG1")]
@@ -0,0 +1,141 @@
+"""
+Fast/large model routing, its latency SLOs and response caching per answering model
+"""
+import asyncio
+import pytest
+
+from src.agents.extractor import Entity, EntityType, Extraction, Intent
+from src.agents.generation_pool import GenerationPool
+from src.agents.model_router import FAST_ROUTE, LARGE_ROUTE, ModelRouter
+from src.agents.package_assistant import PackageAssistantAgent
+from src.agents.response_cache import ResponseCache
+from src.config import settings
+
+QUESTION = "How do I create a new package?"
+
+
+class TextResponse:
+    def __init__(self, text):
+        self.text = text
+
+
+class SlowModel:
+    """Answers every generation with its name after delay seconds"""
+
+    def __init__(self, name, delay=0.0):
+        self.model_name = f"models/{name}"
+        self.delay = delay
+        self.calls = 0
+
+    async def generate_content_async(self, contents, **kwargs):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        return TextResponse(f"answer from {self.model_name}")
+
+
+@pytest.fixture(autouse=True)
+def routing(monkeypatch):
+    monkeypatch.setattr(settings, "router_enabled", True)
+    monkeypatch.setattr(settings, "router_large_intents", "general")
+    monkeypatch.setattr(settings, "router_large_slo", 0.05)
+    monkeypatch.setattr(settings, "agent_function_calling", False)
+    monkeypatch.setattr(settings, "response_cache_enabled", True)
+
+
+def make_agent(fast, large):
+    agent = PackageAssistantAgent(model=fast, large_model=large)
+    agent.generation_pool = GenerationPool(max_concurrency=1)
+    return agent
+
+
+def test_routes_by_entities_intent_and_prompt_size():
+    router = ModelRouter("fast", "fast-model", "large", "large-model", large_intents=["package_eta"])
+    entities = [Entity(EntityType.TRACKING_NUMBER, f"TR{i}") for i in range(2)]
+
+    assert router.route(Extraction(Intent.GENERAL, 0.5), 10).reason == "simple"
+    assert router.route(Extraction(Intent.GENERAL, 0.5, entities), 10).reason == "entities"
+    assert router.route(Extraction(Intent.PACKAGE_ETA, 0.9), 10).reason == "intent"
+    assert router.route(Extraction(Intent.GENERAL, 0.5), 1500).reason == "prompt_size"
+    assert router.model_names == ("large-model", "fast-model")
+    assert ModelRouter("fast", "fast-model").route(Extraction(Intent.PACKAGE_ETA, 0.9), 5000).reason == "single_model"
+
+
+def test_fallback_sends_large_requests_to_the_fast_model_during_cooldown():
+    router = ModelRouter("fast", "fast-model", "large", "large-model", large_slo=1.0, cooldown=60)
+    extraction = Extraction(Intent.GENERAL, 0.5)
+
+    assert router.fallback().name == FAST_ROUTE
+    route = router.route(extraction, 5000)
+    router.record(route, 5.0)
+
+    assert (route.name, route.reason) == (FAST_ROUTE, "large_over_budget")
+    stats = router.get_stats()
+    assert stats[LARGE_ROUTE]["fallbacks"] == 1 and stats[FAST_ROUTE]["slo_misses"] == 1
+    assert stats[LARGE_ROUTE]["cooldown_remaining"] > 0
+
+
+def test_slow_large_model_falls_back_to_the_fast_model():
+    async def scenario():
+        fast, large = SlowModel("fast"), SlowModel("large", delay=1.0)
+        agent = make_agent(fast, large)
+        result = await agent.handle_message(QUESTION)
+
+        assert result["response"] == "answer from models/fast"
+        assert result["metadata"]["model_used"] == "fast"
+        assert result["metadata"]["model_route_reason"] == "fallback"
+
+    asyncio.run(scenario())
+
+
+def test_queue_wait_does_not_count_against_the_large_model_slo():
+    async def scenario():
+        fast, large = SlowModel("fast"), SlowModel("large", delay=0.01)
+        agent = make_agent(fast, large)
+
+        async def hold_slot():
+            async with agent.generation_pool.slot():
+                await asyncio.sleep(0.2)
+
+        holder = asyncio.create_task(hold_slot())
+        await asyncio.sleep(0)
+        result = await agent.handle_message(QUESTION)
+        await holder
+
+        assert result["metadata"]["model_used"] == "large"
+        assert result["metadata"]["queue_wait_ms"] >= 100
+        assert fast.calls == 0
+        assert agent.model_router.get_stats()[LARGE_ROUTE]["slo_misses"] == 0
+
+    asyncio.run(scenario())
+
+
+def test_cached_answers_are_keyed_by_the_model_that_answered():
+    async def scenario():
+        fast, large = SlowModel("fast"), SlowModel("large", delay=1.0)
+        agent = make_agent(fast, large)
+        await agent.handle_message(QUESTION)
+
+        # The fallback answer is served as the fast model's even once the large model recovers
+        agent.model_router._cooldown_until = 0.0
+        large.delay = 0.0
+        cached = await agent.handle_message(QUESTION + "!")
+        agent.response_cache.clear()
+        answered = await agent.handle_message(QUESTION)
+        again = await agent.handle_message(QUESTION)
+
+        assert cached["metadata"]["response_path"] == "cache" and cached["metadata"]["model_used"] == "fast"
+        assert answered["metadata"]["model_used"] == "large"
+        assert again["metadata"]["response_path"] == "cache" and again["metadata"]["model_used"] == "large"
+        assert again["response"] == "answer from models/large"
+
+    asyncio.run(scenario())
+
+
+def test_response_cache_ignores_answers_from_models_not_in_use():
+    cache = ResponseCache()
+    cache.set(QUESTION, "old-model", "prompt", "stale")
+    cache.set(QUESTION, "fast-model", "prompt", "fresh")
+
+    assert cache.get(QUESTION, ("large-model", "fast-model"), "prompt") == ("fresh", "fast-model")
+    assert cache.get(QUESTION, ("large-model",), "prompt") is None
+    assert cache.get(QUESTION, ("fast-model",), "new prompt") is None
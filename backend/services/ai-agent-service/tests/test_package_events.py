@@ -0,0 +1,148 @@
+"""
+Package status events applied to the lookup cache through the in-memory broker
+"""
+import asyncio
+import httpx
+
+from src.services.package_events import InMemoryEventBroker, PackageEventConsumer, topic_matches
+from src.tools.package_lookup import PackageLookupTool
+from src.utils.cache import TTLCache
+from src.utils.singleflight import SingleFlight
+
+PACKAGE = {"_id": "65f0c0ffee", "trackingId": "PKG123", "ownerId": "u1", "status": "processing"}
+
+
+def make_tool():
+    requests = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request.url.path)
+        if request.url.path.startswith("/api/packages/user/"):
+            return httpx.Response(200, json=[PACKAGE])
+        return httpx.Response(200, json=PACKAGE)
+
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    tool = PackageLookupTool(client=client, cache=TTLCache(), singleflight=SingleFlight())
+    return tool, requests
+
+
+async def run_consumer(tool, events):
+    broker = InMemoryEventBroker()
+    consumer = PackageEventConsumer(tool, broker, batch_interval=0.01)
+    consumer.start()
+    try:
+        await asyncio.sleep(0.01)
+        for routing_key, payload in events:
+            broker.publish(routing_key, payload)
+        for _ in range(100):
+            if broker.acked == len(events):
+                break
+            await asyncio.sleep(0.01)
+    finally:
+        await consumer.stop()
+    return consumer.get_stats()
+
+
+def test_topic_matching():
+    assert topic_matches("package.*", "package.updated")
+    assert topic_matches("#", "delivery.updated")
+    assert not topic_matches("package.*", "delivery.updated")
+
+
+def test_delivery_event_by_package_id_updates_lookup_cached_by_tracking_id():
+    async def scenario():
+        tool, requests = make_tool()
+        await tool.track_package_by_tracking_number("PKG123")
+
+        stats = await run_consumer(tool, [("delivery.updated", {"packageId": "65f0c0ffee", "status": "delivered"})])
+        result = await tool.track_package_by_tracking_number("PKG123")
+
+        assert stats["entries_updated"] == 1
+        assert result["data"]["status"] == "delivered"
+        assert requests == ["/api/track/PKG123"]
+
+    asyncio.run(scenario())
+
+
+def test_newest_event_wins_and_user_lists_are_invalidated():
+    async def scenario():
+        tool, requests = make_tool()
+        await tool.track_package_by_tracking_number("PKG123")
+        await tool.get_user_packages("u1", "token")
+
+        stats = await run_consumer(tool, [
+            ("package.updated", {"id": "65f0c0ffee", "trackingId": "PKG123", "status": "in transit"}),
+            ("delivery.updated", {"packageId": "65f0c0ffee", "status": "failed"})
+        ])
+        tracked = await tool.track_package_by_tracking_number("PKG123")
+        await tool.get_user_packages("u1", "token")
+
+        assert tracked["data"]["status"] == "cancelled"
+        assert stats["batches"] == 1 and stats["entries_invalidated"] == 1
+        assert requests.count("/api/packages/user/u1") == 2
+
+    asyncio.run(scenario())
+
+
+def test_event_without_status_invalidates_the_cached_document():
+    async def scenario():
+        tool, requests = make_tool()
+        await tool.track_package_by_tracking_number("PKG123")
+
+        stats = await run_consumer(tool, [("delivery.updated", {"packageId": "65f0c0ffee"})])
+        await tool.track_package_by_tracking_number("PKG123")
+
+        assert stats["entries_invalidated"] == 1
+        assert requests == ["/api/track/PKG123", "/api/track/PKG123"]
+
+    asyncio.run(scenario())
+
+
+def test_malformed_events_are_counted_and_acknowledged():
+    async def scenario():
+        tool, _ = make_tool()
+        stats = await run_consumer(tool, [
+            ("package.updated", ["not", "an", "object"]),
+            ("package.updated", {"id": "65f0c0ffee", "status": "in transit"})
+        ])
+
+        assert stats["received"] == 2
+        assert stats["malformed"] == 1
+
+    asyncio.run(scenario())
+
+
+def test_resubscribing_drops_lookups_that_missed_events():
+    async def scenario():
+        tool, requests = make_tool()
+        broker = InMemoryEventBroker()
+        consumer = PackageEventConsumer(tool, broker, batch_interval=0.01, reconnect_initial=0.01)
+        consumer.start()
+        try:
+            await asyncio.sleep(0.01)
+            await tool.track_package_by_tracking_number("PKG123")
+
+            broker.disconnect()
+            broker.publish("delivery.updated", {"packageId": "65f0c0ffee", "status": "delivered"})
+            for _ in range(100):
+                if consumer.get_stats()["resyncs"]:
+                    break
+                await asyncio.sleep(0.01)
+            await tool.track_package_by_tracking_number("PKG123")
+
+            broker.publish("delivery.updated", {"packageId": "65f0c0ffee", "status": "delivered"})
+            for _ in range(100):
+                if broker.acked:
+                    break
+                await asyncio.sleep(0.01)
+            result = await tool.track_package_by_tracking_number("PKG123")
+        finally:
+            await consumer.stop()
+        stats = consumer.get_stats()
+
+        assert stats["reconnects"] == 1 and stats["resyncs"] == 1
+        assert stats["received"] == 1 and stats["entries_updated"] == 1
+        assert result["data"]["status"] == "delivered"
+        assert requests == ["/api/track/PKG123", "/api/track/PKG123"]
+
+    asyncio.run(scenario())
@@ -0,0 +1,75 @@
+"""
+Token-budgeted prompt assembly and compact tool results
+"""
+import json
+
+from src.agents.prompt_builder import PromptBuilder
+from src.models.schemas import ChatMessage, MessageRole
+
+SYSTEM_PROMPT = "You are a Package Assistant AI."
+
+
+def package(i):
+    return {
+        "_id": f"id{i}", "trackingId": f"PKG{i}", "status": "in transit", "location": "Leeds depot",
+        "recipientName": "Sam", "weight": 2.5, "description": "A very long description " * 5, "eta": None
+    }
+
+
+def user_packages(count):
+    return {"success": True, "data": {"success": True, "data": [package(i) for i in range(count)], "count": count}}
+
+
+def tool_results(prompt_text):
+    payload = prompt_text.split("Tool Results: ", 1)[1].split("\n\n", 1)[0]
+    return json.loads(payload)
+
+
+def test_packages_are_projected_and_serialized_compactly():
+    builder = PromptBuilder(token_budget=3000, max_list_items=3)
+    prompt = builder.build(SYSTEM_PROMPT, "Show my packages", tool_result=user_packages(5))
+    results = tool_results(prompt.text)
+
+    assert results["packages"][0] == {
+        "id": "id0", "tracking_number": "PKG0", "status": "in transit",
+        "location": "Leeds depot", "recipient_name": "Sam"
+    }
+    assert len(results["packages"]) == 3
+    assert results["total"] == 5 and results["more"] == "2 more not shown"
+    assert ": " not in prompt.text.split("Tool Results: ", 1)[1].split("\n\n", 1)[0]
+    assert not prompt.truncated
+    assert prompt.estimated_tokens == builder.estimate_tokens(prompt.text)
+
+
+def test_long_lists_shrink_to_fit_the_budget():
+    builder = PromptBuilder(token_budget=200, max_list_items=20)
+    prompt = builder.build(SYSTEM_PROMPT, "Show my packages", tool_result=user_packages(20))
+    results = tool_results(prompt.text)
+
+    assert prompt.truncated
+    assert prompt.estimated_tokens <= 200
+    assert 0 < len(results["packages"]) < 20
+    assert results["more"] == f"{20 - len(results['packages'])} more not shown"
+
+
+def test_history_fills_the_remaining_budget_newest_first():
+    history = [
+        ChatMessage(role=MessageRole.USER if i % 2 == 0 else MessageRole.ASSISTANT, content=f"turn {i} " + "x" * 80)
+        for i in range(10)
+    ]
+    builder = PromptBuilder(token_budget=120)
+    prompt = builder.build(SYSTEM_PROMPT, "And the other one?", history)
+
+    assert prompt.truncated
+    assert prompt.estimated_tokens <= 120
+    assert "turn 9" in prompt.text and "turn 0" not in prompt.text
+    assert prompt.text.index("turn 8") < prompt.text.index("turn 9") < prompt.text.index("User: And the other one?")
+
+
+def test_system_prompt_and_message_are_always_kept():
+    builder = PromptBuilder(token_budget=1)
+    prompt = builder.build(SYSTEM_PROMPT, "Where is PKG1?", tool_result={"success": False, "error": "Gateway down"})
+
+    assert prompt.text.startswith(SYSTEM_PROMPT)
+    assert "User: Where is PKG1?" in prompt.text
+    assert "Tool Error: Gateway down" in prompt.text
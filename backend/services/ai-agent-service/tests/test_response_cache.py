@@ -0,0 +1,99 @@
+"""
+Answer cache for general questions: keying, invalidation and when the agent uses it
+"""
+import asyncio
+import time
+
+import pytest
+
+from src.agents.package_assistant import PackageAssistantAgent
+from src.agents.response_cache import ResponseCache
+from src.config import settings
+from src.models.schemas import ChatMessage, MessageRole
+
+QUESTION = "How do I create a new package?"
+
+
+class TextResponse:
+    def __init__(self, text):
+        self.text = text
+
+
+class CountingModel:
+    model_name = "models/counting"
+
+    def __init__(self):
+        self.calls = 0
+
+    async def generate_content_async(self, contents, **kwargs):
+        self.calls += 1
+        return TextResponse(f"answer {self.calls}")
+
+
+@pytest.fixture(autouse=True)
+def response_cache(monkeypatch):
+    monkeypatch.setattr(settings, "response_cache_enabled", True)
+    monkeypatch.setattr(settings, "router_enabled", False)
+    monkeypatch.setattr(settings, "agent_function_calling", False)
+
+
+def test_messages_are_normalized_before_lookup():
+    cache = ResponseCache()
+    cache.set(QUESTION, "model", "prompt", "Click Create Package.")
+
+    assert cache.get("  how do I   CREATE a new package ?!", ("model",), "prompt") == ("Click Create Package.", "model")
+    assert cache.get("How do I create a package?", ("model",), "prompt") is None
+
+
+def test_system_prompt_change_drops_every_entry():
+    cache = ResponseCache()
+    cache.set(QUESTION, "model", "prompt v1", "old")
+    cache.set("Another question", "model", "prompt v1", "old")
+
+    assert cache.get(QUESTION, ("model",), "prompt v2") is None
+    assert cache.get_stats()["size"] == 0
+    assert cache.get(QUESTION, ("model",), "prompt v1") is None
+
+
+def test_empty_answers_are_not_cached_and_entries_expire():
+    cache = ResponseCache(ttl=0.01)
+    cache.set(QUESTION, "model", "prompt", "")
+    cache.set("Another question", "model", "prompt", "answer")
+
+    assert cache.get(QUESTION, ("model",), "prompt") is None
+    time.sleep(0.02)
+    assert cache.get("Another question", ("model",), "prompt") is None
+
+
+def test_agent_serves_repeated_general_questions_from_the_cache():
+    async def scenario():
+        model = CountingModel()
+        agent = PackageAssistantAgent(model=model)
+        first = await agent.handle_message(QUESTION)
+        second = await agent.handle_message(QUESTION.upper())
+        agent.system_prompt += "\nAlways answer in one sentence."
+        third = await agent.handle_message(QUESTION)
+
+        assert (first["response"], second["response"], third["response"]) == ("answer 1", "answer 1", "answer 2")
+        assert second["metadata"]["response_path"] == "cache"
+        assert model.calls == 2
+
+    asyncio.run(scenario())
+
+
+def test_agent_does_not_cache_answers_that_depend_on_history():
+    async def scenario():
+        model = CountingModel()
+        agent = PackageAssistantAgent(model=model)
+        context = {"history": [
+            ChatMessage(role=MessageRole.USER, content="Hi"),
+            ChatMessage(role=MessageRole.ASSISTANT, content="Hello!")
+        ]}
+        first = await agent.handle_message(QUESTION, context)
+        await agent.handle_message(QUESTION, context)
+
+        assert first["success"]
+        assert model.calls == 2
+        assert agent.response_cache.get_stats()["size"] == 0
+
+    asyncio.run(scenario())
@@ -0,0 +1,89 @@
+"""
+Template answers for simple single-package questions
+"""
+import asyncio
+
+import httpx
+import pytest
+
+from src.agents.extractor import default_extractor
+from src.agents.package_assistant import PackageAssistantAgent
+from src.agents.response_templates import ResponseRenderer
+from src.config import settings
+from src.tools.package_lookup import PackageLookupTool
+from src.utils.cache import TTLCache
+from src.utils.singleflight import SingleFlight
+
+PACKAGE = {
+    "_id": "65f0c0ffee", "trackingId": "PKG123", "name": "Books", "status": "In Transit",
+    "location": "Leeds depot", "eta": "2024-05-02T10:00:00Z"
+}
+
+
+def lookup(package):
+    return {"success": True, "data": {"success": True, "data": package}}
+
+
+class FailingModel:
+    model_name = "models/unused"
+
+    def __init__(self):
+        self.calls = 0
+
+    async def generate_content_async(self, contents, **kwargs):
+        self.calls += 1
+        raise AssertionError("the template path must not call the model")
+
+
+@pytest.fixture(autouse=True)
+def fast_path(monkeypatch):
+    monkeypatch.setattr(settings, "fast_path_intents", "package_status,package_eta")
+    monkeypatch.setattr(settings, "router_enabled", False)
+    monkeypatch.setattr(settings, "agent_function_calling", False)
+
+
+def test_renders_status_location_and_eta_answers():
+    renderer = ResponseRenderer(["package_status", "package_location", "package_eta"])
+
+    status = renderer.render(default_extractor.extract("What's the status of PKG123?"), lookup(PACKAGE))
+    location = renderer.render(default_extractor.extract("Where is PKG123?"), lookup(PACKAGE))
+    eta = renderer.render(default_extractor.extract("When will PKG123 arrive?"), lookup(PACKAGE))
+    delivered = renderer.render(default_extractor.extract("When will PKG123 arrive?"),
+                                lookup({**PACKAGE, "status": "Delivered"}))
+
+    assert status == ("Package **Books** (PKG123) is currently **in transit**. "
+                      "Last reported location: Leeds depot. Estimated delivery: May 02, 2024.")
+    assert location == "Package **Books** (PKG123) was last reported at **Leeds depot**. Its current status is in transit."
+    assert eta == "Package **Books** (PKG123) is expected to arrive on **May 02, 2024**. Its current status is in transit."
+    assert delivered == "Package **Books** (PKG123) has already been delivered."
+
+
+def test_falls_back_when_the_question_or_result_is_not_a_clean_fit():
+    renderer = ResponseRenderer(["package_status"])
+    status_question = default_extractor.extract("What's the status of PKG123?")
+
+    assert renderer.render(default_extractor.extract("Where is PKG123?"), lookup(PACKAGE)) is None
+    assert renderer.render(default_extractor.extract("Status of PKG123 and PKG456?"), lookup(PACKAGE)) is None
+    assert renderer.render(default_extractor.extract("PKG123"), lookup(PACKAGE)) is None
+    assert renderer.render(status_question, {"success": False, "error": "not found"}) is None
+    assert renderer.render(status_question, lookup({**PACKAGE, "status": None})) is None
+    assert ResponseRenderer(["package_status"], min_confidence=0.99).render(status_question, lookup(PACKAGE)) is None
+
+
+def test_agent_answers_enabled_intents_without_the_model():
+    async def scenario():
+        client = httpx.AsyncClient(transport=httpx.MockTransport(lambda request: httpx.Response(200, json=PACKAGE)))
+        tool = PackageLookupTool(client=client, cache=TTLCache(), singleflight=SingleFlight())
+        model = FailingModel()
+        agent = PackageAssistantAgent(package_tool=tool, model=model)
+
+        result = await agent.handle_message("What's the status of PKG123?")
+        events = [event async for event in agent.stream_message("When will PKG123 arrive?")]
+
+        assert result["metadata"]["response_path"] == "template"
+        assert result["response"].startswith("Package **Books** (PKG123) is currently **in transit**.")
+        assert events[-1]["data"]["metadata"]["response_path"] == "template"
+        assert "May 02, 2024" in events[-2]["data"]["text"]
+        assert model.calls == 0
+
+    asyncio.run(scenario())
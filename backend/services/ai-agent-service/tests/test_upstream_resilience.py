@@ -0,0 +1,107 @@
+"""
+Circuit breaking, retries and the retry budget around gateway lookups
+"""
+import asyncio
+import httpx
+import pytest
+
+from src.config import settings
+from src.tools.package_lookup import PACKAGE_ENDPOINT, TRACK_ENDPOINT, USER_PACKAGES_ENDPOINT, PackageLookupTool
+from src.utils.cache import TTLCache
+from src.utils.circuit_breaker import CircuitBreaker, CircuitOpenError, RetryBudget
+from src.utils.singleflight import SingleFlight
+
+PACKAGE = {"_id": "65f0c0ffee", "trackingId": "PKG123", "status": "processing"}
+
+
+@pytest.fixture(autouse=True)
+def fast_retries(monkeypatch):
+    monkeypatch.setattr(settings, "lookup_max_retries", 2)
+    monkeypatch.setattr(settings, "lookup_retry_backoff", 0.001)
+
+
+def make_tool(responses, min_calls=10, min_retries=10):
+    """Build a tool whose gateway answers with responses in order (an exception is raised)"""
+    requests = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request.url.path)
+        response = responses[min(len(requests), len(responses)) - 1]
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    breakers = {
+        endpoint: CircuitBreaker(endpoint, min_calls=min_calls, open_seconds=60)
+        for endpoint in (TRACK_ENDPOINT, PACKAGE_ENDPOINT, USER_PACKAGES_ENDPOINT)
+    }
+    tool = PackageLookupTool(client=client, cache=TTLCache(), singleflight=SingleFlight(),
+                             breakers=breakers, retry_budget=RetryBudget(ratio=0, min_retries=min_retries))
+    return tool, requests
+
+
+def test_gateway_errors_are_retried_until_success():
+    async def scenario():
+        tool, requests = make_tool([httpx.Response(503), httpx.ConnectError("refused"), httpx.Response(200, json=PACKAGE)])
+        status, data = await tool._fetch_tracking("PKG123")
+
+        assert (status, data) == (200, PACKAGE)
+        assert len(requests) == 3
+        assert tool.retry_budget.get_stats()["window_retries"] == 2
+
+    asyncio.run(scenario())
+
+
+def test_read_timeouts_and_client_errors_are_not_retried():
+    async def scenario():
+        tool, requests = make_tool([httpx.Response(404)])
+        assert await tool._fetch_tracking("PKG123") == (404, None)
+
+        tool, requests = make_tool([httpx.ReadTimeout("slow")])
+        with pytest.raises(httpx.ReadTimeout):
+            await tool._fetch_tracking("PKG123")
+        assert len(requests) == 1
+        assert tool.breakers[TRACK_ENDPOINT].get_stats()["window_failure_rate"] == 1.0
+
+    asyncio.run(scenario())
+
+
+def test_exhausted_retry_budget_stops_retrying():
+    async def scenario():
+        tool, requests = make_tool([httpx.Response(503)], min_retries=1)
+
+        assert await tool._fetch_tracking("PKG123") == (503, None)
+        assert len(requests) == 2
+        assert tool.retry_budget.get_stats()["exhausted"] == 1
+
+    asyncio.run(scenario())
+
+
+def test_breaker_opens_on_failures_and_refuses_calls():
+    async def scenario():
+        tool, requests = make_tool([httpx.Response(500)], min_calls=3)
+        for _ in range(3):
+            assert await tool._fetch_tracking("PKG123") == (500, None)
+
+        with pytest.raises(CircuitOpenError):
+            await tool._fetch_tracking("PKG123")
+        assert len(requests) == 3
+        assert tool.breakers[TRACK_ENDPOINT].state == "open"
+        assert tool.breakers[PACKAGE_ENDPOINT].state == "closed"
+
+    asyncio.run(scenario())
+
+
+def test_pool_timeout_fails_fast_without_blaming_the_upstream():
+    async def scenario():
+        tool, requests = make_tool([httpx.PoolTimeout("no free connection")], min_calls=1)
+        with pytest.raises(httpx.PoolTimeout):
+            await tool._fetch_tracking("PKG123")
+
+        assert len(requests) == 1
+        assert tool.breakers[TRACK_ENDPOINT].get_stats()["window_calls"] == 0
+        assert tool.breakers[TRACK_ENDPOINT].state == "closed"
+        assert tool.retry_budget.get_stats()["window_retries"] == 0
+
+    asyncio.run(scenario())
@@ -0,0 +1,125 @@
+"""
+User package listing: pagination and filtering over the gateway's bare list
+"""
+import asyncio
+
+import httpx
+
+from src.tools.package_lookup import PackageLookupTool
+from src.utils.cache import TTLCache
+from src.utils.singleflight import SingleFlight
+
+
+def packages(count: int):
+    return [
+        {
+            "_id": f"id{i}",
+            "trackingId": f"PKG{i}",
+            "status": "delivered" if i % 2 else "in transit",
+            "createdAt": f"2024-01-{i % 28 + 1:02d}T00:00:00Z"
+        }
+        for i in range(count)
+    ]
+
+
+def make_tool(payload):
+    requests = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        return httpx.Response(200, json=payload)
+
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    tool = PackageLookupTool(client=client, cache=TTLCache(), singleflight=SingleFlight())
+    return tool, requests
+
+
+def test_pages_of_a_bare_list_share_one_fetch_and_one_cached_copy():
+    async def scenario():
+        tool, requests = make_tool(packages(1000))
+        seen, cursor = [], None
+        for _ in range(10):
+            result = await tool.get_user_packages("u1", "token", limit=100, cursor=cursor)
+            assert result["success"] and result["total"] == 1000
+            seen.extend(package["_id"] for package in result["data"])
+            cursor = result["next_cursor"]
+
+        assert cursor is None
+        assert seen == [f"id{i}" for i in range(1000)]
+        assert len(requests) == 1
+        assert requests[0].url.params["limit"] == "100"
+        assert len(tool.cache) == 1
+
+    asyncio.run(scenario())
+
+
+def test_filters_are_applied_once_and_cached_per_filter_set():
+    async def scenario():
+        tool, requests = make_tool(packages(10))
+        first = await tool.get_user_packages("u1", "token", status="delivered", limit=2)
+        second = await tool.get_user_packages("u1", "token", status="delivered", limit=2,
+                                              cursor=first["next_cursor"])
+        in_transit = await tool.get_user_packages("u1", "token", status="in transit")
+
+        assert [p["_id"] for p in first["data"] + second["data"]] == ["id1", "id3", "id5", "id7"]
+        assert first["total"] == 5
+        assert in_transit["count"] == 5
+        assert len(requests) == 2
+
+    asyncio.run(scenario())
+
+
+def test_page_envelopes_are_cached_per_page():
+    async def scenario():
+        envelope = {"packages": packages(2), "total": 4, "nextCursor": "abc"}
+        tool, requests = make_tool(envelope)
+        result = await tool.get_user_packages("u1", "token", limit=2)
+        again = await tool.get_user_packages("u1", "token", limit=2)
+        other = await tool.get_user_packages("u1", "token", limit=2, cursor="abc")
+
+        assert result["next_cursor"] == "abc" and result["total"] == 4
+        assert again["data"] == result["data"]
+        assert other["success"]
+        assert len(requests) == 2
+
+    asyncio.run(scenario())
+
+
+def test_bare_list_that_may_be_a_page_is_refetched_whole():
+    async def scenario():
+        everything = packages(250)
+        requests = []
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            requests.append(request)
+            offset = int(request.url.params.get("cursor", 0))
+            limit = int(request.url.params.get("limit", len(everything)))
+            return httpx.Response(200, json=everything[offset:offset + limit])
+
+        client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        tool = PackageLookupTool(client=client, cache=TTLCache(), singleflight=SingleFlight())
+        first = await tool.get_user_packages("u1", "token", limit=100)
+        tool.cache.clear()
+        second = await tool.get_user_packages("u1", "token", limit=100, cursor=first["next_cursor"])
+
+        assert first["total"] == second["total"] == 250
+        assert [p["_id"] for p in second["data"]] == [f"id{i}" for i in range(100, 200)]
+        assert [dict(request.url.params) for request in requests] == [
+            {"limit": "100"}, {}, {"limit": "100", "cursor": "100"}, {}
+        ]
+
+    asyncio.run(scenario())
+
+
+def test_malformed_or_stale_cursors_are_rejected():
+    async def scenario():
+        tool, _ = make_tool(packages(10))
+        malformed = await tool.get_user_packages("u1", "token", limit=5, cursor="abc")
+        stale = await tool.get_user_packages("u1", "token", limit=5, cursor="10")
+        valid = await tool.get_user_packages("u1", "token", limit=5, cursor="5")
+
+        assert not malformed["success"] and "cursor" in malformed["message"]
+        assert not stale["success"] and "cursor" in stale["message"]
+        assert valid["success"] and valid["next_cursor"] is None
+
+    asyncio.run(scenario())